@@ -7,9 +7,13 @@ This agent focuses on data analysis and statistical operations.
 """
 
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.utils.gemini_client import GeminiClient
+from backend.utils.token_budget import PromptSection
 from backend.utils.data_processor import DataProcessor
+from backend.utils.profiler import DataProfile
+from backend.utils.time_index import describe_trend
+from backend.utils.sql_engine import SQL_MIN_ROWS
+from typing import Optional
 import pandas as pd
 import numpy as np
 import logging
@@ -30,11 +34,7 @@ class AnalystAgent:
             gemini_client: Initialized Gemini client
         """
         self.gemini_client = gemini_client
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=gemini_client.api_key,
-            temperature=0.1
-        )
+        self.llm = gemini_client.chat_model(temperature=0.1)
         
         self.agent = Agent(
             role="Data Analyst",
@@ -68,7 +68,7 @@ class AnalystAgent:
         data = data_processor.get_data_for_analysis()
         
         # Perform basic statistical analysis
-        analysis_results = self._perform_basic_analysis(data)
+        analysis_results = self._perform_basic_analysis(data, data_processor.get_profile())
         
         # Use Gemini to interpret the results
         interpretation_prompt = f"""
@@ -88,10 +88,18 @@ class AnalystAgent:
         5. Recommendations for further analysis
         """
         
-        return self.gemini_client.generate_response(interpretation_prompt)
+        return self.gemini_client.generate_response(interpretation_prompt, sections=[
+            PromptSection('data_info', data_info, priority=1),
+            PromptSection('analysis_results', analysis_results, priority=2)
+        ])
     
-    def _perform_basic_analysis(self, data: pd.DataFrame) -> str:
-        """Perform basic statistical analysis on the data."""
+    def _perform_basic_analysis(self, data: pd.DataFrame, profile: Optional[DataProfile] = None) -> str:
+        """
+        Perform basic statistical analysis on the data.
+        
+        Column statistics are read from the processor's profile when one is
+        available instead of being recomputed from the data.
+        """
         results = []
         
         # Basic statistics for numeric columns
@@ -99,16 +107,22 @@ class AnalystAgent:
         if len(numeric_cols) > 0:
             results.append("Numeric Columns Analysis:")
             for col in numeric_cols:
-                col_stats = data[col].describe()
+                col_stats = profile.column(col).describe() if profile else data[col].describe()
                 results.append(f"  {col}: mean={col_stats['mean']:.2f}, std={col_stats['std']:.2f}")
         
         # Categorical analysis
-        categorical_cols = data.select_dtypes(include=['object']).columns
+        categorical_cols = data.select_dtypes(include=['object', 'string', 'category']).columns
         if len(categorical_cols) > 0:
             results.append("\nCategorical Columns Analysis:")
             for col in categorical_cols:
-                unique_count = data[col].nunique()
-                top_value = data[col].value_counts().iloc[0] if len(data[col].value_counts()) > 0 else "N/A"
+                if profile:
+                    col_profile = profile.column(col)
+                    unique_count = col_profile.unique
+                    top_value = next(iter(col_profile.top_values), "N/A")
+                else:
+                    value_counts = data[col].value_counts()
+                    unique_count = len(value_counts)
+                    top_value = value_counts.index[0] if len(value_counts) > 0 else "N/A"
                 results.append(f"  {col}: {unique_count} unique values, most common: {top_value}")
         
         # Correlation analysis for numeric columns
@@ -146,7 +160,7 @@ class AnalystAgent:
         data = data_processor.get_data_for_analysis()
         
         # Perform targeted analysis based on the question
-        analysis_results = self._perform_targeted_analysis(data, question)
+        analysis_results = self._perform_targeted_analysis(data, question, data_processor)
         
         # Use Gemini to provide a comprehensive answer
         answer_prompt = f"""
@@ -168,21 +182,59 @@ class AnalystAgent:
         5. Recommendations for further investigation
         """
         
-        return self.gemini_client.generate_response(answer_prompt)
+        # Wide datasets make both sections long; the general summary gives way first
+        return self.gemini_client.generate_response(answer_prompt, sections=[
+            PromptSection('data_info', data_info, priority=1),
+            PromptSection('analysis_results', analysis_results, priority=2)
+        ])
     
-    def _perform_targeted_analysis(self, data: pd.DataFrame, question: str) -> str:
+    def _numeric_aggregates(self, data: pd.DataFrame, numeric_cols,
+                            data_processor: Optional[DataProcessor] = None) -> pd.DataFrame:
+        """
+        Compute mean, median, std, min and max of numeric columns.
+        
+        Large frames are aggregated in a single multi-threaded SQL scan when
+        the SQL backend is available; otherwise pandas is used.
+        
+        Returns:
+            DataFrame indexed by column with one column per statistic
+        """
+        stats = ['mean', 'median', 'std', 'min', 'max']
+        
+        if (data_processor is not None and len(data) >= SQL_MIN_ROWS and
+                data_processor.sql_engine.available):
+            functions = {'mean': 'avg', 'median': 'median', 'std': 'stddev_samp', 'min': 'min', 'max': 'max'}
+            select = ", ".join(
+                f'{functions[stat]}("{str(col).replace(chr(34), chr(34) * 2)}") AS "{stat}_{i}"'
+                for i, col in enumerate(numeric_cols) for stat in stats
+            )
+            success, result, error = data_processor.query_sql(f"SELECT {select} FROM df")
+            if success:
+                row = result.iloc[0]
+                return pd.DataFrame(
+                    [[row[f"{stat}_{i}"] for stat in stats] for i in range(len(numeric_cols))],
+                    index=numeric_cols, columns=stats, dtype=float
+                )
+            logger.warning(f"Falling back to pandas aggregation: {error}")
+        
+        return data[numeric_cols].agg(stats).T
+    
+    def _perform_targeted_analysis(self, data: pd.DataFrame, question: str,
+                                   data_processor: Optional[DataProcessor] = None) -> str:
         """Perform targeted analysis based on the specific question."""
         results = []
         question_lower = question.lower()
+        aggregates = None
         
         # Analyze based on question keywords
         if any(keyword in question_lower for keyword in ['average', 'mean', 'median']):
             numeric_cols = data.select_dtypes(include=[np.number]).columns
             if len(numeric_cols) > 0:
+                aggregates = self._numeric_aggregates(data, numeric_cols, data_processor)
                 results.append("Central Tendency Analysis:")
                 for col in numeric_cols:
-                    mean_val = data[col].mean()
-                    median_val = data[col].median()
+                    mean_val = aggregates.at[col, 'mean']
+                    median_val = aggregates.at[col, 'median']
                     results.append(f"  {col}: mean={mean_val:.2f}, median={median_val:.2f}")
         
         if any(keyword in question_lower for keyword in ['correlation', 'relationship', 'related']):
@@ -197,20 +249,27 @@ class AnalystAgent:
         
         if any(keyword in question_lower for keyword in ['trend', 'over time', 'time series']):
             # Look for date columns
-            date_cols = data.select_dtypes(include=['datetime64']).columns
+            date_cols = data.select_dtypes(include=['datetime64', 'datetimetz']).columns
             if len(date_cols) > 0:
                 results.append("\nTime Series Analysis:")
                 for col in date_cols:
-                    results.append(f"  Date range in {col}: {data[col].min()} to {data[col].max()}")
+                    # Answer from the precomputed period rollups when available
+                    index = data_processor.get_time_index(col) if data_processor is not None else None
+                    if index is not None:
+                        results.extend(describe_trend(index))
+                    else:
+                        results.append(f"  Date range in {col}: {data[col].min()} to {data[col].max()}")
         
         if any(keyword in question_lower for keyword in ['distribution', 'spread', 'variation']):
             numeric_cols = data.select_dtypes(include=[np.number]).columns
             if len(numeric_cols) > 0:
+                if aggregates is None:
+                    aggregates = self._numeric_aggregates(data, numeric_cols, data_processor)
                 results.append("\nDistribution Analysis:")
                 for col in numeric_cols:
-                    std_val = data[col].std()
-                    min_val = data[col].min()
-                    max_val = data[col].max()
+                    std_val = aggregates.at[col, 'std']
+                    min_val = aggregates.at[col, 'min']
+                    max_val = aggregates.at[col, 'max']
                     results.append(f"  {col}: std={std_val:.2f}, range=[{min_val:.2f}, {max_val:.2f}]")
         
         if not results:
@@ -219,7 +278,8 @@ class AnalystAgent:
             numeric_cols = data.select_dtypes(include=[np.number]).columns
             if len(numeric_cols) > 0:
                 results.append(f"  {len(numeric_cols)} numeric columns available for analysis")
-                results.append(f"  Sample statistics: {data[numeric_cols].describe().to_string()}")
+                # One line per column, so wide datasets can be shortened line by line to fit the prompt
+                results.append(f"  Sample statistics:\n{data[numeric_cols].describe().T.to_string()}")
         
         return "\n".join(results)
     
@@ -238,7 +298,9 @@ class AnalystAgent:
         
         # Perform comprehensive analysis
         data_info = data_processor.get_data_summary()
-        basic_analysis = self._perform_basic_analysis(data_processor.get_data_for_analysis())
+        basic_analysis = self._perform_basic_analysis(
+            data_processor.get_data_for_analysis(), data_processor.get_profile()
+        )
         
         insights_prompt = f"""
         As a senior data analyst, generate key business insights from the following data:
@@ -257,4 +319,7 @@ class AnalystAgent:
         5. Recommendations for data collection improvements
         """
         
-        return self.gemini_client.generate_response(insights_prompt)
+        return self.gemini_client.generate_response(insights_prompt, sections=[
+            PromptSection('data_info', data_info, priority=1),
+            PromptSection('basic_analysis', basic_analysis, priority=2)
+        ])
@@ -7,37 +7,85 @@ This agent creates Python scripts for specific analytical tasks.
 """
 
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.utils.gemini_client import GeminiClient
+from backend.utils.token_budget import PromptSection
 from backend.utils.data_processor import DataProcessor
+from backend.utils.workspace import Workspace
+from backend.utils.memory_budget import get_memory_manager
+from backend.utils.sql_engine import extract_sql, SQL_MIN_ROWS
 import pandas as pd
 import numpy as np
 import io
+import os
+import re
 import sys
 import traceback
+from typing import Optional
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Execution backends for analysis workflows: 'pandas', 'sql' or 'auto'
+# ('auto' uses SQL for frames of at least SQL_MIN_ROWS rows)
+EXECUTION_BACKENDS = ('pandas', 'sql', 'auto')
+
+
+def _print_to(buffer: io.StringIO):
+    """
+    Build a print for executed code that writes to buffer.
+
+    sys.stdout is left alone, since swapping it is not safe when several
+    questions run at once.
+
+    Args:
+        buffer: Output of one execution
+
+    Returns:
+        Function with the signature of print
+    """
+    def _print(*args, **kwargs):
+        if kwargs.get('file') is None:
+            kwargs['file'] = buffer
+        print(*args, **kwargs)
+    return _print
+
+
+def extract_code(text: str) -> str:
+    """
+    Pull Python code out of an LLM response.
+
+    Args:
+        text: Response that may wrap the code in a markdown code fence
+
+    Returns:
+        Code without fences
+    """
+    match = re.search(r'```(?:python|py)?[ \t]*\n?(.*?)```', text, re.DOTALL | re.IGNORECASE)
+    return (match.group(1) if match else text).strip()
+
 
 class CodeExecutorAgent:
     """Code executor agent that generates and executes Python code for data analysis."""
     
-    def __init__(self, gemini_client: GeminiClient):
+    def __init__(self, gemini_client: GeminiClient, workspace: Optional[Workspace] = None,
+                 backend: Optional[str] = None):
         """
         Initialize the code executor agent.
         
         Args:
             gemini_client: Initialized Gemini client
+            workspace: Workspace whose tables generated code may join
+            backend: 'pandas', 'sql' or 'auto'. Defaults to the ANALYSIS_BACKEND
+                environment variable, or 'auto'.
         """
         self.gemini_client = gemini_client
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=gemini_client.api_key,
-            temperature=0.1
-        )
+        self.workspace = workspace
+        self.backend = backend or os.getenv('ANALYSIS_BACKEND', 'auto')
+        if self.backend not in EXECUTION_BACKENDS:
+            raise ValueError(f"Unknown analysis backend '{self.backend}', use one of {EXECUTION_BACKENDS}")
+        self.llm = gemini_client.chat_model(temperature=0.1)
         
         self.agent = Agent(
             role="Python Code Generator and Executor",
@@ -53,6 +101,16 @@ class CodeExecutorAgent:
         
         logger.info("Code executor agent initialized")
     
+    def _tables_context(self) -> str:
+        """Describe the other workspace tables for code generation prompts."""
+        if self.workspace is None or len(self.workspace.table_names()) < 2:
+            return ""
+        
+        return f"""
+        Other Tables (available as tables['<name>'], join them with pd.merge on shared key columns):
+        {self.workspace.describe_tables()}
+        """
+    
     def generate_analysis_code(self, data_processor: DataProcessor, task: str) -> str:
         """
         Generate Python code for a specific analysis task.
@@ -69,10 +127,9 @@ class CodeExecutorAgent:
         
         # Get data information for code generation
         data_info = data_processor.get_data_summary()
-        data = data_processor.get_data_for_analysis()
         
-        # Create a data sample for the code context
-        sample_data = data.head(10).to_dict('records')
+        # Representative rows, one column per line to keep the prompt small
+        sample_data = data_processor.get_sample_text(10)
         
         code_generation_prompt = f"""
         Generate Python code for the following data analysis task:
@@ -82,8 +139,9 @@ class CodeExecutorAgent:
         Data Information:
         {data_info}
         
-        Sample Data (first 10 rows):
+        Sample Data (representative rows, one column per line):
         {sample_data}
+        {self._tables_context()}
         
         Requirements:
         1. Use pandas and numpy for data manipulation
@@ -97,7 +155,11 @@ class CodeExecutorAgent:
         Generate only the Python code, no explanations.
         """
         
-        return self.gemini_client.generate_response(code_generation_prompt)
+        response = self.gemini_client.generate_response(code_generation_prompt, sections=[
+            PromptSection('sample_data', sample_data, priority=1),
+            PromptSection('data_info', data_info, priority=2)
+        ])
+        return extract_code(response)
     
     def execute_code_safely(self, code: str, data_processor: DataProcessor) -> tuple:
         """
@@ -113,13 +175,22 @@ class CodeExecutorAgent:
         if data_processor.data is None:
             return False, "", "No data loaded for code execution"
         
+        # Models usually wrap code in a markdown fence
+        code = extract_code(code)
+        
         try:
-            # Create a safe execution environment
+            # Generated code often builds a modified copy of df; make room for one
+            get_memory_manager().enforce(reserve=data_processor.memory_usage()['resident'])
+            
+            # Create a safe execution environment; df is a copy-on-write
+            # handle, so user code only pays for a copy if it mutates data
+            captured_output = io.StringIO()
             safe_globals = {
                 'pd': pd,
                 'np': np,
                 'df': data_processor.get_data_for_analysis(),
-                'print': print,
+                'tables': self.workspace.frames() if self.workspace is not None else {},
+                'print': _print_to(captured_output),
                 'len': len,
                 'str': str,
                 'int': int,
@@ -139,28 +210,111 @@ class CodeExecutorAgent:
                 'range': range
             }
             
-            # Capture output
-            old_stdout = sys.stdout
-            sys.stdout = captured_output = io.StringIO()
-            
             # Execute the code
             exec(code, safe_globals)
             
             # Get the output
             output = captured_output.getvalue()
-            sys.stdout = old_stdout
             
             logger.info("Code executed successfully")
             return True, output, None
             
         except Exception as e:
-            # Restore stdout
-            sys.stdout = old_stdout
-            
             error_msg = f"Code execution error: {str(e)}\n{traceback.format_exc()}"
             logger.error(f"Code execution failed: {error_msg}")
             return False, "", error_msg
     
+    def generate_sql_query(self, data_processor: DataProcessor, question: str) -> str:
+        """
+        Generate a SQL query that answers a question about the data.
+        
+        Args:
+            data_processor: DataProcessor instance with loaded data
+            question: User's analytical question
+            
+        Returns:
+            Generated SQL query
+        """
+        if data_processor.data is None:
+            return ""
+        
+        schema = data_processor.sql_engine.describe_schema('df', data_processor.data)
+        for name, frame in self._referenced_tables(question).items():
+            schema += "\n" + data_processor.sql_engine.describe_schema(name, frame)
+        sample_data = data_processor.get_sample_text(10)
+        
+        sql_prompt = f"""
+        Write one DuckDB SQL query that answers the following question:
+        
+        Question: {question}
+        
+        Tables:
+        {schema}
+        
+        Sample Data (representative rows of df, one column per line):
+        {sample_data}
+        {self._tables_context()}
+        Requirements:
+        1. A single read-only SELECT statement (CTEs allowed)
+        2. Aggregate in SQL (GROUP BY, window functions) rather than returning raw rows
+        3. Quote column names with double quotes
+        4. Give result columns readable aliases
+        5. Return at most 100 rows
+        
+        Generate only the SQL query.
+        """
+        
+        # The schema is needed to write valid SQL; sample rows are only a hint
+        response = self.gemini_client.generate_response(sql_prompt, sections=[
+            PromptSection('sample_data', sample_data, priority=1),
+            PromptSection('schema', schema, priority=2)
+        ])
+        return extract_sql(response)
+    
+    def _referenced_tables(self, text: str) -> dict:
+        """Get the workspace tables mentioned in a question or query, loading them if needed."""
+        if self.workspace is None:
+            return {}
+        
+        frames = self.workspace.frames()
+        return {name: frames[name] for name in self.workspace.table_names()
+                if name != self.workspace.active_table and
+                re.search(rf'\b{re.escape(name)}\b', text, re.IGNORECASE)}
+    
+    def execute_sql_safely(self, sql: str, data_processor: DataProcessor) -> tuple:
+        """
+        Execute a read-only SQL query against the loaded data.
+        
+        The active table is 'df'; other workspace tables referenced by name
+        are registered under their own names.
+        
+        Args:
+            sql: SQL query to execute
+            data_processor: DataProcessor instance with loaded data
+            
+        Returns:
+            Tuple of (success, output, error_message)
+        """
+        if data_processor.data is None:
+            return False, "", "No data loaded for SQL execution"
+        
+        engine = data_processor.sql_engine
+        for name, frame in self._referenced_tables(sql).items():
+            engine.register(name, frame)
+        
+        success, result, error = data_processor.query_sql(sql)
+        if not success:
+            return False, "", error
+        
+        logger.info(f"SQL query returned {len(result)} rows")
+        return True, result.to_string(index=False, max_rows=100), None
+    
+    def _use_sql(self, data_processor: DataProcessor) -> bool:
+        """Whether analysis workflows should run on the SQL backend."""
+        if self.backend == 'pandas' or not data_processor.sql_engine.available:
+            return False
+        return self.backend == 'sql' or len(data_processor.data) >= SQL_MIN_ROWS
+    
     def generate_visualization_code(self, data_processor: DataProcessor, visualization_type: str) -> str:
         """
         Generate code for data visualization.
@@ -200,7 +354,7 @@ class CodeExecutorAgent:
         Generate only the Python code.
         """
         
-        return self.gemini_client.generate_response(viz_prompt)
+        return extract_code(self.gemini_client.generate_response(viz_prompt))
     
     def create_analysis_script(self, data_processor: DataProcessor, question: str) -> str:
         """
@@ -217,7 +371,6 @@ class CodeExecutorAgent:
             return "# No data loaded for analysis"
         
         data_info = data_processor.get_data_summary()
-        data = data_processor.get_data_for_analysis()
         
         script_prompt = f"""
         Create a complete Python analysis script to answer the following question:
@@ -226,7 +379,7 @@ class CodeExecutorAgent:
         
         Data Information:
         {data_info}
-        
+        {self._tables_context()}
         Requirements:
         1. Start with data loading and exploration
         2. Include data cleaning if needed
@@ -240,7 +393,7 @@ class CodeExecutorAgent:
         Generate a complete, executable Python script.
         """
         
-        return self.gemini_client.generate_response(script_prompt)
+        return extract_code(self.gemini_client.generate_response(script_prompt))
     
     def validate_code(self, code: str) -> tuple:
         """
@@ -297,6 +450,19 @@ class CodeExecutorAgent:
         Returns:
             Dictionary with execution results
         """
+        if data_processor.data is not None and self._use_sql(data_processor):
+            sql = self.generate_sql_query(data_processor, question)
+            success, output, error = self.execute_sql_safely(sql, data_processor)
+            if success:
+                return {
+                    'success': True,
+                    'backend': 'sql',
+                    'script': sql,
+                    'output': output,
+                    'error': None
+                }
+            logger.warning(f"SQL backend failed, falling back to pandas: {error}")
+        
         # Generate the analysis script
         script = self.create_analysis_script(data_processor, question)
         
@@ -306,6 +472,7 @@ class CodeExecutorAgent:
         if not is_valid:
             return {
                 'success': False,
+                'backend': 'pandas',
                 'script': script,
                 'output': '',
                 'error': f"Code validation failed: {validation_msg}"
@@ -316,6 +483,7 @@ class CodeExecutorAgent:
         
         return {
             'success': success,
+            'backend': 'pandas',
             'script': script,
             'output': output,
             'error': error
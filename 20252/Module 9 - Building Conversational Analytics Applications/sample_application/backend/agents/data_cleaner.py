@@ -7,9 +7,9 @@ This agent identifies and fixes data quality issues.
 """
 
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.utils.gemini_client import GeminiClient
 from backend.utils.data_processor import DataProcessor
+from backend.utils.cleaning import CleaningPlan, PLAN_FORMAT
 import logging
 
 # Set up logging
@@ -28,11 +28,7 @@ class DataCleanerAgent:
             gemini_client: Initialized Gemini client
         """
         self.gemini_client = gemini_client
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=gemini_client.api_key,
-            temperature=0.1
-        )
+        self.llm = gemini_client.chat_model(temperature=0.1)
         
         self.agent = Agent(
             role="Data Cleaning Specialist",
@@ -93,27 +89,33 @@ class DataCleanerAgent:
             user_question: User's analytical question
             
         Returns:
-            Detailed cleaning plan
+            Cleaning plan as JSON, followed by the reasoning
         """
         data_info = data_processor.get_data_summary()
         
         prompt = f"""
-        Create a detailed data cleaning plan for the following scenario:
+        Create a data cleaning plan for the following scenario:
         
         User's Analytical Question: {user_question}
         Data Information: {data_info}
         
-        Provide a step-by-step cleaning plan that addresses:
+        The plan must address:
         1. Missing value handling strategy
         2. Outlier treatment approach
         3. Data type corrections
         4. Duplicate removal strategy
-        5. Data validation steps
         
-        Explain the reasoning behind each cleaning decision.
+        Write the plan as one JSON object in a ```json code block, using exactly
+        this format and the column names above:
+        {PLAN_FORMAT}
+        
+        After the code block, briefly explain the reasoning behind each cleaning decision.
         """
         
-        return self.gemini_client.generate_response(prompt)
+        response = self.gemini_client.generate_response(prompt)
+        if CleaningPlan.parse(response) is None:
+            logger.warning("Cleaning plan response holds no JSON plan; the standard plan will be used")
+        return response
     
     def execute_cleaning(self, data_processor: DataProcessor, cleaning_plan: str) -> tuple:
         """
@@ -7,7 +7,6 @@ This agent decides which other agents to call based on the user's request.
 """
 
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.utils.gemini_client import GeminiClient
 import logging
 
@@ -27,11 +26,7 @@ class ManagerAgent:
             gemini_client: Initialized Gemini client
         """
         self.gemini_client = gemini_client
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=gemini_client.api_key,
-            temperature=0.1
-        )
+        self.llm = gemini_client.chat_model(temperature=0.1)
         
         self.agent = Agent(
             role="Analytics Manager",
@@ -103,8 +98,8 @@ class ManagerAgent:
             agents_needed.append('analyst')
         
         # Check if code generation is needed
-        if any(keyword in question_lower for keyword in ['code', 'script', 'code', 'program']):
-            or not agents_needed:  # Default to analyst if no specific agent identified
+        if any(keyword in question_lower for keyword in ['code', 'script', 'program', 'join', 'merge', 'combine']) \
+                or not agents_needed:  # Default to code executor if no specific agent identified
             agents_needed.append('code_executor')
         
         # Always include report writer for final output
@@ -7,8 +7,9 @@ This agent creates well-formatted, professional reports.
 """
 
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.utils.gemini_client import GeminiClient
+from backend.utils.token_budget import PromptSection
+from typing import Iterator, List
 import logging
 
 # Set up logging
@@ -27,11 +28,7 @@ class ReportWriterAgent:
             gemini_client: Initialized Gemini client
         """
         self.gemini_client = gemini_client
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=gemini_client.api_key,
-            temperature=0.1
-        )
+        self.llm = gemini_client.chat_model(temperature=0.1)
         
         self.agent = Agent(
             role="Technical Report Writer",
@@ -59,7 +56,37 @@ class ReportWriterAgent:
         Returns:
             Executive summary
         """
-        summary_prompt = f"""
+        return self.gemini_client.generate_response(
+            self._executive_summary_prompt(question, analysis_results, data_summary),
+            sections=self._summary_sections(analysis_results, data_summary))
+    
+    def stream_executive_summary(self, question: str, analysis_results: str, data_summary: str) -> Iterator[str]:
+        """
+        Stream an executive summary of the analysis as it is generated.
+        
+        Args:
+            question: Original user question
+            analysis_results: Results from data analysis
+            data_summary: Summary of the dataset
+            
+        Yields:
+            Text chunks of the executive summary
+        """
+        return self.gemini_client.stream_response(
+            self._executive_summary_prompt(question, analysis_results, data_summary),
+            sections=self._summary_sections(analysis_results, data_summary))
+    
+    @staticmethod
+    def _summary_sections(analysis_results: str, data_summary: str) -> List[PromptSection]:
+        """Context of a summary or report prompt, the dataset overview giving way first."""
+        return [
+            PromptSection('data_summary', data_summary, priority=1),
+            PromptSection('analysis_results', analysis_results, priority=2)
+        ]
+    
+    def _executive_summary_prompt(self, question: str, analysis_results: str, data_summary: str) -> str:
+        """Build the executive summary prompt."""
+        return f"""
         Create an executive summary for the following data analysis:
         
         Original Question: {question}
@@ -78,8 +105,6 @@ class ReportWriterAgent:
         
         Keep it concise (2-3 paragraphs) and suitable for business stakeholders.
         """
-        
-        return self.gemini_client.generate_response(summary_prompt)
     
     def write_comprehensive_report(self, question: str, analysis_results: str, 
                                  data_summary: str, code_output: str = None) -> str:
@@ -122,7 +147,8 @@ class ReportWriterAgent:
         Make the report professional, well-structured, and easy to understand.
         """
         
-        return self.gemini_client.generate_response(report_prompt)
+        return self.gemini_client.generate_response(
+            report_prompt, sections=self._summary_sections(analysis_results, data_summary))
     
     def create_technical_report(self, question: str, analysis_results: str, 
                               data_summary: str, code_script: str = None) -> str:
@@ -0,0 +1,142 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Offline throughput and latency benchmark of the analysis pipeline.
+Runs questions through the full agent workflow with the local stand-in
+language model, from several simulated users at once, and reports latency
+percentiles, time to first summary token, throughput and tokens used.
+
+Usage:
+    python -m backend.benchmark examples/sample_data.csv --users 4 --latency-ms 200
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+import logging
+
+import numpy as np
+
+from backend.utils.llm_providers import LocalProvider
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTIONS = [
+    "What is the average salary by department?",
+    "Are there any outliers in the performance scores?",
+    "What is the correlation between age and salary?",
+    "What data cleaning is needed for this dataset?",
+]
+
+
+def load_questions(path: str) -> List[str]:
+    """Read questions from a markdown list, one '- question' per line."""
+    with open(path, encoding='utf-8') as fh:
+        return [line[2:].strip() for line in fh if line.startswith('- ') and line[2:].strip()]
+
+
+def run_user(data_path: str, questions: List[str], provider: LocalProvider) -> List[Dict[str, Any]]:
+    """
+    Answer questions one after another as a single user would.
+
+    Args:
+        data_path: Dataset to load
+        questions: Questions to ask
+        provider: Shared stand-in model
+
+    Returns:
+        One dictionary of timings per question
+    """
+    # Imported here so the log level and cache settings apply first
+    from backend.main import ConversationalAnalytics
+
+    system = ConversationalAnalytics(provider=provider)
+    result = system.load_data(data_path)
+    if not result.get('success'):
+        raise RuntimeError(f"Could not load {data_path}: {result.get('message')}")
+
+    timings = []
+    for question in questions:
+        started = time.perf_counter()
+        result = system.process_question(question)
+        timing = dict(result.get('timing') or {})
+        timing['latency_seconds'] = time.perf_counter() - started
+        timing['success'] = result['success']
+        timing['tokens'] = result.get('token_usage', {}).get('total_tokens', 0)
+        timings.append(timing)
+    return timings
+
+
+def summarize(timings: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """
+    Aggregate per-question timings.
+
+    Args:
+        timings: Timings of every question
+        elapsed: Wall-clock seconds of the whole run
+
+    Returns:
+        Dictionary of percentiles and throughput
+    """
+    latencies = np.array([t['latency_seconds'] for t in timings])
+    first_tokens = np.array([t['first_token_seconds'] for t in timings if t.get('first_token_seconds') is not None])
+    summary = {
+        'questions': len(timings),
+        'failures': sum(1 for t in timings if not t['success']),
+        'elapsed_seconds': elapsed,
+        'questions_per_second': len(timings) / elapsed if elapsed else 0.0,
+        'latency_p50': float(np.percentile(latencies, 50)),
+        'latency_p95': float(np.percentile(latencies, 95)),
+        'latency_max': float(latencies.max()),
+        'tokens_per_question': float(np.mean([t['tokens'] for t in timings]))
+    }
+    if len(first_tokens):
+        summary['first_token_p50'] = float(np.percentile(first_tokens, 50))
+        summary['first_token_p95'] = float(np.percentile(first_tokens, 95))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline with a local stand-in model")
+    parser.add_argument('data', help="CSV or Excel file to analyze")
+    parser.add_argument('--questions', help="Markdown file with one '- question' per line")
+    parser.add_argument('--users', type=int, default=1, help="Simulated concurrent users")
+    parser.add_argument('--rounds', type=int, default=1, help="Times each user asks every question")
+    parser.add_argument('--latency-ms', type=float, default=200, help="Stand-in time to first token")
+    parser.add_argument('--tokens-per-second', type=float, default=200, help="Stand-in generation rate")
+    parser.add_argument('--response-tokens', type=int, default=200, help="Stand-in reply length in words")
+    parser.add_argument('--cache', action='store_true', help="Keep the response cache enabled")
+    args = parser.parse_args()
+
+    if not args.cache:
+        # Otherwise repeated prompts are answered from disk and the model is never measured
+        os.environ['RESPONSE_CACHE_MAX_MB'] = '0'
+    logging.getLogger().setLevel(logging.WARNING)
+
+    questions = load_questions(args.questions) if args.questions else DEFAULT_QUESTIONS
+    questions = questions * args.rounds
+    provider = LocalProvider(args.latency_ms / 1000, args.tokens_per_second, args.response_tokens)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        runs = list(pool.map(lambda _: run_user(args.data, questions, provider), range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    summary = summarize([timing for run in runs for timing in run], elapsed)
+    print(f"{summary['questions']} questions from {args.users} users in {elapsed:.2f}s "
+          f"({summary['questions_per_second']:.2f}/s), {summary['failures']} failed")
+    print(f"latency: p50 {summary['latency_p50']:.3f}s, p95 {summary['latency_p95']:.3f}s, "
+          f"max {summary['latency_max']:.3f}s")
+    print(f"tokens per question: {summary['tokens_per_question']:,.0f}")
+    if 'first_token_p50' in summary:
+        print(f"first summary token: p50 {summary['first_token_p50']:.3f}s, "
+              f"p95 {summary['first_token_p95']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
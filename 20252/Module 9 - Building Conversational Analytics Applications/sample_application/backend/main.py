@@ -7,12 +7,18 @@ Orchestrates all agents and handles the analysis workflow.
 """
 
 import os
+import re
+import time
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator
 from dotenv import load_dotenv
 
-from backend.utils.gemini_client import GeminiClient
+from backend.utils.gemini_client import GeminiClient, ModelUnavailableError
+from backend.utils.llm_providers import LLMProvider
 from backend.utils.data_processor import DataProcessor
+from backend.utils.workspace import Workspace
+from backend.utils.memory_budget import get_memory_manager
 from backend.agents.manager import ManagerAgent
 from backend.agents.data_cleaner import DataCleanerAgent
 from backend.agents.analyst import AnalystAgent
@@ -30,25 +36,28 @@ logger = logging.getLogger(__name__)
 class ConversationalAnalytics:
     """Main class for orchestrating the conversational analytics workflow."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, provider: Optional[LLMProvider] = None):
         """
         Initialize the conversational analytics system.
         
         Args:
             api_key: Gemini API key. If None, will try to get from environment.
+            provider: Language model backend, e.g. LocalProvider for offline
+                benchmarks. If None, chosen by the LLM_PROVIDER environment variable.
         """
         try:
             # Initialize Gemini client
-            self.gemini_client = GeminiClient(api_key)
+            self.gemini_client = GeminiClient(api_key, provider=provider)
             
-            # Initialize data processor
-            self.data_processor = DataProcessor()
+            # Workspace of named tables; questions go to the active one
+            self.workspace = Workspace()
+            self._empty_processor = DataProcessor()
             
             # Initialize all agents
             self.manager = ManagerAgent(self.gemini_client)
             self.data_cleaner = DataCleanerAgent(self.gemini_client)
             self.analyst = AnalystAgent(self.gemini_client)
-            self.code_executor = CodeExecutorAgent(self.gemini_client)
+            self.code_executor = CodeExecutorAgent(self.gemini_client, self.workspace)
             self.report_writer = ReportWriterAgent(self.gemini_client)
             
             logger.info("Conversational analytics system initialized successfully")
@@ -57,18 +66,35 @@ class ConversationalAnalytics:
             logger.error(f"Failed to initialize system: {str(e)}")
             raise
     
-    def load_data(self, file_path: str) -> Dict[str, Any]:
+    @property
+    def data_processor(self) -> DataProcessor:
+        """Processor of the active table, restored from disk if it was spilled."""
+        return self.workspace.get_processor() or self._empty_processor
+    
+    def load_data(self, file_path: str, table_name: Optional[str] = None,
+                  sheet_name: Optional[str] = None) -> Dict[str, Any]:
         """
-        Load a CSV file for analysis.
+        Load a CSV or Excel file for analysis as a workspace table and make it active.
         
         Args:
-            file_path: Path to the CSV file
+            file_path: Path to the CSV or Excel file
+            table_name: Name of the table. Defaults to the file name without extension.
+            sheet_name: Worksheet to load for Excel files. Defaults to the first sheet.
             
         Returns:
             Dictionary with loading results
         """
         try:
-            success, message = self.data_processor.load_csv(file_path)
+            if table_name is None:
+                stem = os.path.splitext(os.path.basename(file_path))[0]
+                table_name = re.sub(r'\W+', '_', stem).strip('_').lower() or 'data'
+            
+            success, message = self.workspace.add_table(table_name, file_path, sheet_name)
+            if success:
+                self.workspace.set_active(table_name)
+                success, message = self.workspace.load(table_name)
+                if not success:
+                    self.workspace.remove_table(table_name)
             
             if success:
                 data_summary = self.data_processor.get_data_summary()
@@ -105,48 +131,96 @@ class ConversationalAnalytics:
         Returns:
             Dictionary with analysis results
         """
+        for event in self.process_question_stream(question):
+            if event['type'] == 'result':
+                return event['result']
+    
+    def process_question_stream(self, question: str) -> Iterator[Dict[str, Any]]:
+        """
+        Process a user's analytical question, reporting progress as it happens.
+        
+        Events are dictionaries with a 'type':
+        - 'status': an agent is starting; 'stage' names it
+        - 'token': 'text' is the next chunk of the final summary
+        - 'result': 'result' is what process_question returns, with a
+          'timing' entry reporting time to first token and a 'token_usage'
+          entry with the tokens and cost of every model call. Stages the
+          model could not answer are listed in results['errors']; the
+          question fails if the summary is one of them.
+        
+        Args:
+            question: User's question about the data
+            
+        Yields:
+            Progress events, ending with the result
+        """
+        started = time.perf_counter()
+        # Every model call made for this question counts against its token budget
+        self.gemini_client.begin_question()
+        token_usage = None
         try:
             if self.data_processor.data is None:
-                return {
+                yield {'type': 'result', 'result': {
                     'success': False,
                     'message': 'No data loaded. Please upload a CSV file first.',
                     'results': None
-                }
+                }}
+                return
             
             # Get data summary
             data_summary = self.data_processor.get_data_summary()
             
             # Let manager coordinate the workflow
+            yield {'type': 'status', 'stage': 'manager'}
             workflow = self.manager.coordinate_analysis(question, data_summary)
             
             # Execute the workflow
-            results = self._execute_workflow(workflow)
+            results = yield from self._execute_workflow(workflow, started)
+            token_usage = self.gemini_client.end_question()
             
-            return {
-                'success': True,
-                'message': 'Analysis completed successfully',
+            # Without a summary there is no answer; failed agents are marked in their results
+            summary_error = results.get('errors', {}).get('summary')
+            yield {'type': 'result', 'result': {
+                'success': summary_error is None,
+                'message': summary_error or 'Analysis completed successfully',
                 'results': results,
-                'workflow_plan': workflow['workflow_plan']
-            }
+                'workflow_plan': workflow['workflow_plan'],
+                'timing': results.get('timing', {}),
+                'token_usage': token_usage
+            }}
             
         except Exception as e:
             logger.error(f"Error processing question: {str(e)}")
-            return {
+            if token_usage is None:
+                token_usage = self.gemini_client.end_question()
+            yield {'type': 'result', 'result': {
                 'success': False,
-                'message': f"Error processing question: {str(e)}",
-                'results': None
-            }
+                'message': str(e) if isinstance(e, ModelUnavailableError) else f"Error processing question: {str(e)}",
+                'results': None,
+                'token_usage': token_usage
+            }}
+        
+        finally:
+            # Stops accounting when there was no data or the caller stopped early
+            if token_usage is None:
+                self.gemini_client.end_question()
     
-    def _execute_workflow(self, workflow: Dict[str, Any]) -> Dict[str, Any]:
+    def _execute_workflow(self, workflow: Dict[str, Any], started: Optional[float] = None
+                          ) -> Iterator[Dict[str, Any]]:
         """
         Execute the analysis workflow based on the manager's plan.
         
+        A generator: it yields a status event as each agent starts and the
+        final summary's tokens, and returns the results.
+        
         Args:
             workflow: Workflow plan from the manager
+            started: perf_counter() when the question was received
             
         Returns:
             Dictionary with analysis results
         """
+        started = started if started is not None else time.perf_counter()
         results = {
             'question': workflow['question'],
             'data_info': workflow['data_info'],
@@ -155,67 +229,26 @@ class ConversationalAnalytics:
         }
         
         try:
+            # Resolve the active table once; the agents' calls below share it
+            data_processor = self.data_processor
+            
             # Execute each agent in the workflow
             for agent_name in workflow['agents_needed']:
                 logger.info(f"Executing agent: {agent_name}")
-                
-                if agent_name == 'data_cleaner':
-                    # Data cleaning workflow
-                    quality_analysis = self.data_cleaner.analyze_data_quality(self.data_processor)
-                    cleaning_plan = self.data_cleaner.create_cleaning_plan(
-                        self.data_processor, workflow['question']
-                    )
-                    success, message, cleaned_info = self.data_cleaner.execute_cleaning(
-                        self.data_processor, cleaning_plan
-                    )
-                    validation = self.data_cleaner.validate_cleaning_results(self.data_processor)
-                    
-                    results['agent_results']['data_cleaner'] = {
-                        'quality_analysis': quality_analysis,
-                        'cleaning_plan': cleaning_plan,
-                        'execution_success': success,
-                        'execution_message': message,
-                        'validation': validation,
-                        'cleaned_data_info': cleaned_info
-                    }
-                
-                elif agent_name == 'analyst':
-                    # Analysis workflow
-                    eda_results = self.analyst.perform_exploratory_analysis(self.data_processor)
-                    specific_analysis = self.analyst.answer_specific_question(
-                        self.data_processor, workflow['question']
-                    )
-                    insights = self.analyst.generate_insights(self.data_processor)
-                    
-                    results['agent_results']['analyst'] = {
-                        'eda_results': eda_results,
-                        'specific_analysis': specific_analysis,
-                        'insights': insights
-                    }
-                
-                elif agent_name == 'code_executor':
-                    # Code execution workflow
-                    analysis_workflow = self.code_executor.execute_analysis_workflow(
-                        self.data_processor, workflow['question']
-                    )
-                    
-                    results['agent_results']['code_executor'] = analysis_workflow
-                
-                elif agent_name == 'report_writer':
-                    # Report writing workflow
-                    # Collect results from other agents
-                    analysis_results = self._collect_analysis_results(results['agent_results'])
-                    
-                    report_output = self.report_writer.format_analysis_output(
-                        workflow['question'],
-                        analysis_results,
-                        workflow['data_info']
-                    )
-                    
-                    results['agent_results']['report_writer'] = report_output
+                yield {'type': 'status', 'stage': agent_name}
+                try:
+                    agent_result = self._run_agent(agent_name, workflow, data_processor, results['agent_results'])
+                    if agent_result is not None:
+                        results['agent_results'][agent_name] = agent_result
+                except ModelUnavailableError as e:
+                    # The apology is shown to the user, never passed on to later prompts
+                    logger.error(f"Agent {agent_name} got no answer from the model: {str(e)}")
+                    results['agent_results'][agent_name] = {'success': False, 'error': str(e)}
+                    results.setdefault('errors', {})[agent_name] = str(e)
             
-            # Generate final summary
-            results['final_summary'] = self._generate_final_summary(results)
+            # Generate final summary, streaming it as it is written
+            yield {'type': 'status', 'stage': 'summary'}
+            results['final_summary'] = yield from self._stream_final_summary(results, started)
             
             logger.info("Workflow execution completed successfully")
             return results
@@ -225,6 +258,99 @@ class ConversationalAnalytics:
             results['error'] = str(e)
             return results
     
+    def _run_agent(self, agent_name: str, workflow: Dict[str, Any], data_processor: DataProcessor,
+                   agent_results: Dict[str, Any]) -> Any:
+        """
+        Run one agent of the workflow.
+        
+        Args:
+            agent_name: Agent to run
+            workflow: Workflow plan from the manager
+            data_processor: Processor of the active table
+            agent_results: Results of the agents that already ran
+            
+        Returns:
+            The agent's results, or None for an unknown agent
+        """
+        if agent_name == 'data_cleaner':
+            # Data cleaning workflow; the quality review and the plan
+            # are independent, so their model calls overlap
+            quality_analysis, cleaning_plan = self._run_concurrently(
+                lambda: self.data_cleaner.analyze_data_quality(data_processor),
+                lambda: self.data_cleaner.create_cleaning_plan(data_processor, workflow['question'])
+            )
+            success, message, cleaned_info = self.data_cleaner.execute_cleaning(
+                data_processor, cleaning_plan
+            )
+            validation = self.data_cleaner.validate_cleaning_results(data_processor)
+            
+            return {
+                'quality_analysis': quality_analysis,
+                'cleaning_plan': cleaning_plan,
+                'execution_success': success,
+                'execution_message': message,
+                'cleaning_metrics': data_processor.last_cleaning_metrics,
+                'validation': validation,
+                'cleaned_data_info': cleaned_info
+            }
+        
+        if agent_name == 'analyst':
+            # Analysis workflow; the three analyses only read the data
+            eda_results, specific_analysis, insights = self._run_concurrently(
+                lambda: self.analyst.perform_exploratory_analysis(data_processor),
+                lambda: self.analyst.answer_specific_question(data_processor, workflow['question']),
+                lambda: self.analyst.generate_insights(data_processor)
+            )
+            
+            return {
+                'eda_results': eda_results,
+                'specific_analysis': specific_analysis,
+                'insights': insights
+            }
+        
+        if agent_name == 'code_executor':
+            # Code execution workflow
+            return self.code_executor.execute_analysis_workflow(data_processor, workflow['question'])
+        
+        if agent_name == 'report_writer':
+            # Report writing workflow
+            # Collect results from other agents
+            analysis_results = self._collect_analysis_results(agent_results)
+            
+            return self.report_writer.format_analysis_output(
+                workflow['question'],
+                analysis_results,
+                workflow['data_info']
+            )
+        
+        return None
+    
+    def _run_concurrently(self, *calls) -> List[Any]:
+        """
+        Run independent agent calls at the same time.
+        
+        Each call blocks on its model request; the Gemini client performs the
+        requests concurrently on one connection within its concurrency limit.
+        
+        Args:
+            calls: Functions taking no arguments
+            
+        Returns:
+            Their results in the same order
+        """
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+    
+    def cancel_question(self) -> int:
+        """
+        Cancel the model requests of the question being processed.
+        
+        Returns:
+            Number of requests cancelled
+        """
+        return self.gemini_client.cancel_pending()
+    
     def _collect_analysis_results(self, agent_results: Dict[str, Any]) -> str:
         """Collect and format results from all agents."""
         results_text = []
@@ -237,37 +363,162 @@ class ConversationalAnalytics:
         
         return "\n\n".join(results_text) if results_text else "No analysis results available"
     
-    def _generate_final_summary(self, results: Dict[str, Any]) -> str:
-        """Generate a final summary of all analysis results."""
+    def _stream_final_summary(self, results: Dict[str, Any], started: float) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a final summary of all analysis results, yielding its tokens.
+        
+        Records in results['timing'] the seconds from the question and from
+        the summary request to the first token, and the total time.
+        
+        Returns:
+            The complete summary
+        """
+        parts = []
+        timing = results.setdefault('timing', {})
         try:
             # Use the report writer to create a final summary
             analysis_results = self._collect_analysis_results(results['agent_results'])
             
-            final_summary = self.report_writer.create_executive_summary(
+            requested = time.perf_counter()
+            for text in self.report_writer.stream_executive_summary(
                 results['question'],
                 analysis_results,
                 results['data_info']
-            )
+            ):
+                if not parts:
+                    now = time.perf_counter()
+                    timing['first_token_seconds'] = now - started
+                    timing['summary_ttfb_seconds'] = now - requested
+                    logger.info(f"First summary token after {timing['summary_ttfb_seconds']:.2f}s "
+                                f"({timing['first_token_seconds']:.2f}s since the question)")
+                parts.append(text)
+                yield {'type': 'token', 'text': text}
+            
+            return ''.join(parts)
             
-            return final_summary
+        except ModelUnavailableError as e:
+            logger.error(f"Final summary got no answer from the model: {str(e)}")
+            results.setdefault('errors', {})['summary'] = str(e)
+            return ''.join(parts) or None
             
         except Exception as e:
             logger.error(f"Error generating final summary: {str(e)}")
-            return f"Error generating summary: {str(e)}"
+            return ''.join(parts) or f"Error generating summary: {str(e)}"
+        
+        finally:
+            timing['total_seconds'] = time.perf_counter() - started
     
     def get_data_info(self) -> Dict[str, Any]:
         """Get information about the currently loaded data."""
-        if self.data_processor.data is None:
+        data_processor = self.data_processor
+        if data_processor.data is None:
             return {'loaded': False, 'message': 'No data loaded'}
         
         return {
             'loaded': True,
-            'data_summary': self.data_processor.get_data_summary(),
-            'data_info': self.data_processor.data_info,
-            'cleaning_suggestions': self.data_processor.get_cleaning_suggestions()
+            'active_table': self.workspace.active_table,
+            'data_summary': data_processor.get_data_summary(),
+            'data_info': data_processor.data_info,
+            'cleaning_suggestions': data_processor.get_cleaning_suggestions(),
+            'cache_stats': data_processor.cache.stats(),
+            'tables': self.workspace.list_tables(),
+            'workspace_stats': self.workspace.stats(),
+            'memory_stats': get_memory_manager().stats(),
+            'response_cache_stats': self.gemini_client.cache_stats(),
+            'request_stats': self.gemini_client.scheduler_stats(),
+            'token_usage': self.gemini_client.usage_stats()
+        }
+    
+    def list_tables(self) -> Dict[str, Any]:
+        """Describe the tables in the workspace without loading them."""
+        return {
+            'active_table': self.workspace.active_table,
+            'tables': self.workspace.list_tables(),
+            'workspace_stats': self.workspace.stats()
+        }
+    
+    def set_active_table(self, table_name: str) -> Dict[str, Any]:
+        """
+        Direct subsequent questions at another table.
+        
+        Args:
+            table_name: Name of a workspace table
+            
+        Returns:
+            Dictionary with the result and the new table's summary
+        """
+        success, message = self.workspace.set_active(table_name)
+        if success:
+            success, message = self.workspace.load(table_name)
+        
+        return {
+            'success': success,
+            'message': message,
+            'data_summary': self.data_processor.get_data_summary() if success else None
+        }
+    
+    def join_tables(self, left: str, right: str, on: Optional[List[str]] = None,
+                    how: str = 'inner', table_name: Optional[str] = None,
+                    make_active: bool = True) -> Dict[str, Any]:
+        """
+        Join two workspace tables into a new table.
+        
+        Args:
+            left: Left table name
+            right: Right table name
+            on: Key columns. If None, shared id-like columns are used.
+            how: 'inner', 'left', 'right' or 'outer'
+            table_name: Name of the joined table. Defaults to '<left>_<right>'.
+            make_active: Ask subsequent questions about the joined table
+            
+        Returns:
+            Dictionary with the join result
+        """
+        table_name = table_name or f"{left}_{right}"
+        success, message = self.workspace.join(left, right, on=on, how=how, name=table_name)
+        
+        if success and make_active:
+            self.workspace.set_active(table_name)
+        
+        return {
+            'success': success,
+            'message': message,
+            'table': table_name if success else None,
+            'data_summary': self.workspace.get_processor(table_name).get_data_summary() if success else None
+        }
+    
+    def undo_change(self) -> Dict[str, Any]:
+        """
+        Undo the last cleaning or append on the active table.
+        
+        Returns:
+            Dictionary with the result and a comparison with the undone version
+        """
+        success, message = self.data_processor.undo()
+        return {
+            'success': success,
+            'message': message,
+            'comparison': self.data_processor.compare_versions(after=self.data_processor.versions.current + 1)
+            if success else None,
+            'history': self.data_processor.get_version_history()
+        }
+    
+    def redo_change(self) -> Dict[str, Any]:
+        """
+        Reapply the last undone change on the active table.
+        
+        Returns:
+            Dictionary with the result and a comparison with the previous version
+        """
+        success, message = self.data_processor.redo()
+        return {
+            'success': success,
+            'message': message,
+            'comparison': self.data_processor.compare_versions() if success else None,
+            'history': self.data_processor.get_version_history()
         }
     
     def reset_data(self):
-        """Reset the data processor to clear loaded data."""
-        self.data_processor = DataProcessor()
-        logger.info("Data processor reset")
+        """Remove every table from the workspace."""
+        self.workspace.clear()
+        logger.info("Workspace reset")
@@ -0,0 +1,367 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Chunked CSV ingestion engine for the conversational analytics application.
+Sniffs encoding and delimiter from a byte sample, infers compact dtypes from a
+sampled pass and streams the file in chunks into a single typed DataFrame.
+"""
+
+import codecs
+import csv
+import sys
+import time
+import warnings
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, List, Optional, Iterator
+import logging
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Encodings tried in order, same order the processor has always used
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+
+# Delimiters considered by the sniffer
+DELIMITERS = ',;\t|'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        Peak RSS in MB, or None if the platform does not report it
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def downcast_numeric(series: pd.Series) -> pd.Series:
+    """
+    Downcast a numeric series to the smallest lossless dtype.
+
+    Args:
+        series: Numeric pandas Series
+
+    Returns:
+        Downcast Series (or the original if no smaller dtype is lossless)
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        # Only use float32 when every value survives the round trip
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(narrowed, index=series.index, name=series.name)
+
+    return series
+
+
+def _chunk_as_text(series: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    """
+    Render a typed chunk of a column as text, with missing values kept.
+
+    Args:
+        series: Chunk converted to a numeric, datetime or bool dtype
+        fmt: Format the column's datetimes were parsed with, if known
+
+    Returns:
+        Object Series of str
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime(fmt or '%Y-%m-%d %H:%M:%S')
+    else:
+        text = series.astype(str)
+    return text.astype(object).where(series.notna(), np.nan)
+
+
+def combine_column_chunks(parts: Dict[str, List[pd.Series]],
+                          schema: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, pd.Series]:
+    """
+    Concatenate the per-chunk pieces of each column once.
+
+    A chunk whose values did not fit the inferred dtype is kept as raw text.
+    The column's other chunks are then rendered as text too, so every column
+    has one dtype, as it would if the whole file were parsed at once.
+
+    Args:
+        parts: Column name to the list of its chunk Series
+        schema: Inferred schema, used for the datetime format of text fallbacks
+
+    Returns:
+        Column name to the combined Series with a fresh RangeIndex
+    """
+    columns = {}
+    for col, pieces in parts.items():
+        if not pieces:
+            columns[col] = pd.Series([], dtype=object, name=col)
+        elif len(pieces) == 1:
+            columns[col] = pieces[0]
+        elif all(isinstance(p.dtype, pd.CategoricalDtype) for p in pieces):
+            # Merge dictionaries instead of falling back to object
+            merged = pd.api.types.union_categoricals([p.array for p in pieces])
+            columns[col] = pd.Series(merged, name=col)
+        else:
+            text = [pd.api.types.is_string_dtype(p.dtype) for p in pieces]
+            if any(text):
+                fmt = (schema or {}).get(col, {}).get('format')
+                pieces = [p if is_text else _chunk_as_text(p, fmt) for p, is_text in zip(pieces, text)]
+            columns[col] = pd.concat(pieces, ignore_index=True)
+        columns[col] = columns[col].reset_index(drop=True)
+
+    return columns
+
+
+def infer_datetime_format(values: pd.Series, candidates: int = 5) -> Optional[str]:
+    """
+    Find one datetime format that parses every sampled value.
+
+    Formats are guessed from the first few distinct values, since a single
+    value such as '01/02/2024' cannot tell day-first from month-first.
+
+    Args:
+        values: Non-null sample values as text
+        candidates: Number of distinct values to guess formats from
+
+    Returns:
+        strftime-style format, or None if no guessed format parses them all
+    """
+    if values.empty:
+        return None
+    # Purely numeric text is far more likely to be an id or amount
+    if values.str.fullmatch(r'[+-]?\d+(\.\d+)?').all():
+        return None
+
+    formats = []
+    with warnings.catch_warnings():
+        # Day-first guesses warn; both orders are tried against the sample anyway
+        warnings.simplefilter('ignore', UserWarning)
+        for value in values.drop_duplicates().head(candidates):
+            fmt = guess_datetime_format(value)
+            if fmt is not None and fmt not in formats:
+                formats.append(fmt)
+
+    for fmt in formats:
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+        if parsed.notna().all():
+            return fmt
+    return None
+
+
+class CsvIngestor:
+    """Streams CSV files into compactly typed DataFrames."""
+
+    def __init__(self, sample_bytes: int = 1024 * 1024, sample_rows: int = 10000,
+                 chunk_rows: int = 200000, category_ratio: float = 0.5,
+                 max_categories: int = 10000):
+        """
+        Initialize the CSV ingestor.
+
+        Args:
+            sample_bytes: Number of bytes read to sniff encoding and delimiter
+            sample_rows: Number of rows read for dtype inference
+            chunk_rows: Number of rows parsed per streamed chunk
+            category_ratio: Maximum unique/non-null ratio for category columns
+            max_categories: Maximum number of distinct values for category columns
+        """
+        self.sample_bytes = sample_bytes
+        self.sample_rows = sample_rows
+        self.chunk_rows = chunk_rows
+        self.category_ratio = category_ratio
+        self.max_categories = max_categories
+
+    def sniff(self, file_path: str) -> Tuple[str, str]:
+        """
+        Detect the encoding and delimiter of a CSV file from a byte sample.
+
+        Args:
+            file_path: Path to the CSV file
+
+        Returns:
+            Tuple of (encoding, delimiter)
+        """
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.sample_bytes)
+
+        encoding = None
+        text = ''
+        if sample.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+            text = sample[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
+        else:
+            for candidate in ENCODINGS:
+                try:
+                    # Incremental decode so a multi-byte character cut at the
+                    # end of the sample does not count as a decoding failure
+                    decoder = codecs.getincrementaldecoder(candidate)()
+                    text = decoder.decode(sample, final=False)
+                    encoding = candidate
+                    break
+                except UnicodeDecodeError:
+                    continue
+
+        if encoding is None:
+            raise ValueError("Could not decode CSV file with any standard encoding")
+
+        try:
+            # Only sniff complete lines
+            lines = text.splitlines()
+            if len(lines) > 1 and len(sample) == self.sample_bytes:
+                lines = lines[:-1]
+            delimiter = csv.Sniffer().sniff('\n'.join(lines), delimiters=DELIMITERS).delimiter
+        except csv.Error:
+            delimiter = ','
+
+        logger.info(f"Sniffed CSV encoding={encoding}, delimiter={delimiter!r}")
+        return encoding, delimiter
+
+    def infer_schema(self, file_path: str, encoding: str, delimiter: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Infer a compact schema from a sample of the file.
+
+        Args:
+            file_path: Path to the CSV file
+            encoding: File encoding
+            delimiter: Field delimiter
+
+        Returns:
+            Dictionary mapping column names to {'kind': ..., 'format': ...}
+        """
+        sample = pd.read_csv(file_path, encoding=encoding, sep=delimiter, nrows=self.sample_rows)
+
+        schema = {}
+        for col in sample.columns:
+            series = sample[col]
+            kind = 'object'
+            fmt = None
+
+            if pd.api.types.is_bool_dtype(series):
+                kind = 'bool'
+            elif pd.api.types.is_numeric_dtype(series):
+                kind = 'numeric'
+            elif series.notna().any():
+                non_null = series.dropna().astype(str)
+                fmt = infer_datetime_format(non_null)
+                if fmt is not None:
+                    kind = 'datetime'
+                else:
+                    unique_count = non_null.nunique()
+                    if (unique_count <= self.max_categories and
+                            unique_count <= self.category_ratio * len(non_null)):
+                        kind = 'category'
+
+            schema[col] = {'kind': kind, 'format': fmt}
+
+        logger.info(f"Inferred schema for {len(schema)} columns from {len(sample)} sample rows")
+        return schema
+
+    def read(self, file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Stream a CSV file into a single compactly typed DataFrame.
+
+        Args:
+            file_path: Path to the CSV file
+
+        Returns:
+            Tuple of (DataFrame, load statistics)
+        """
+        start = time.perf_counter()
+        encoding, delimiter = self.sniff(file_path)
+
+        # The sample may decode cleanly while a later byte does not, so fall
+        # back through the remaining encodings on a mid-stream failure
+        candidates = [encoding] + [e for e in ENCODINGS if e != encoding]
+        for candidate in candidates:
+            try:
+                schema = self.infer_schema(file_path, candidate, delimiter)
+                columns, chunk_count = self._stream_columns(file_path, candidate, delimiter, schema)
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                logger.info(f"Encoding {candidate} failed mid-stream, trying next encoding")
+                continue
+        else:
+            raise ValueError("Could not decode CSV file with any standard encoding")
+
+        data = pd.DataFrame(columns, columns=list(schema.keys()))
+
+        load_stats = {
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'chunks': chunk_count,
+            'schema': {col: spec['kind'] for col, spec in schema.items()},
+            'load_time_seconds': time.perf_counter() - start,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        logger.info(f"Ingested {len(data)} rows in {chunk_count} chunks "
+                    f"in {load_stats['load_time_seconds']:.2f}s")
+        return data, load_stats
+
+    def iter_chunks(self, file_path: str, encoding: str, delimiter: str,
+                    schema: Dict[str, Dict[str, Any]]) -> Iterator[pd.DataFrame]:
+        """
+        Parse the file chunk by chunk with the inferred compact dtypes.
+
+        Args:
+            file_path: Path to the CSV file
+            encoding: File encoding
+            delimiter: Field delimiter
+            schema: Schema returned by infer_schema
+
+        Yields:
+            Typed DataFrame chunks of at most chunk_rows rows
+        """
+        read_dtypes = {col: 'category' for col, spec in schema.items() if spec['kind'] == 'category'}
+
+        reader = pd.read_csv(file_path, encoding=encoding, sep=delimiter,
+                             dtype=read_dtypes, chunksize=self.chunk_rows)
+        with reader:
+            for chunk in reader:
+                yield pd.DataFrame({col: self._convert_chunk_column(chunk[col], schema[col])
+                                    for col in chunk.columns})
+
+    def _stream_columns(self, file_path: str, encoding: str, delimiter: str,
+                        schema: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, pd.Series], int]:
+        """Parse the file chunk by chunk and combine each column once."""
+        parts: Dict[str, List[pd.Series]] = {col: [] for col in schema}
+        chunk_count = 0
+        for chunk in self.iter_chunks(file_path, encoding, delimiter, schema):
+            chunk_count += 1
+            for col in chunk.columns:
+                parts[col].append(chunk[col])
+
+        return combine_column_chunks(parts, schema), chunk_count
+
+    def _convert_chunk_column(self, series: pd.Series, spec: Dict[str, Any]) -> pd.Series:
+        """Apply the inferred compact dtype to one column of one chunk."""
+        if spec['kind'] == 'numeric' and pd.api.types.is_numeric_dtype(series):
+            return downcast_numeric(series)
+
+        if spec['kind'] == 'datetime':
+            parsed = pd.to_datetime(series, format=spec['format'], errors='coerce')
+            # Keep the raw text if this chunk has values the format cannot parse
+            if parsed.isna().sum() == series.isna().sum():
+                return parsed
+
+        return series
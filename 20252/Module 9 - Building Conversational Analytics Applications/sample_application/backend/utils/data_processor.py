@@ -8,49 +8,136 @@ Handles CSV file processing, data cleaning, and analysis preparation.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Tuple, List
+import os
+import time
+from typing import Dict, Any, Tuple, List, Optional
 import logging
 
+from backend.utils.cleaning import CleaningPlan, apply_plan, default_plan, format_metrics
+from backend.utils.csv_ingest import CsvIngestor, downcast_numeric, peak_rss_mb
+from backend.utils.dataset_cache import DatasetCache, get_default_cache
+from backend.utils.excel_ingest import ExcelIngestor, is_excel_file
+from backend.utils.memory_budget import (can_memory_map, estimate_object_bytes, estimate_series_bytes,
+                                         get_memory_manager, is_memory_mapped, memory_map_column)
+from backend.utils.profiler import DataProfile, build_profile
+from backend.utils.sampling import build_sample, format_columnar
+from backend.utils.sql_engine import SqlEngine
+from backend.utils.streaming_stats import StreamingProfiler
+from backend.utils.string_pool import add_categories, encode_text_columns, get_default_pool
+from backend.utils.time_index import TimeIndex, detect_datetime_columns, parse_datetime_columns
+from backend.utils.version_store import VersionStore, compare_frames
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Copy-on-write lets every agent share the loaded frame's buffers; a column is
+# only copied when someone actually writes to it. Always on from pandas 3.0.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+def _default_out_of_core_threshold() -> Optional[int]:
+    """Files above a quarter of physical memory are streamed instead of loaded."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 4
+    except (AttributeError, ValueError, OSError):  # Not available on Windows
+        return None
+
 
 class DataProcessor:
-    """Handles data processing operations for uploaded CSV files."""
+    """Handles data processing operations for uploaded CSV and Excel files."""
     
-    def __init__(self):
-        """Initialize the data processor."""
+    def __init__(self, cache: Optional[DatasetCache] = None, profile_workers: Optional[int] = None):
+        """
+        Initialize the data processor.
+        
+        Args:
+            cache: Dataset cache to use. If None, the shared default cache is used.
+            profile_workers: Worker processes used to profile wide datasets.
+                Defaults to the PROFILE_WORKERS environment variable or the
+                number of CPUs; 1 always profiles serially.
+        """
         self.data = None
         self.data_info = {}
+        self.profile = None
+        self.load_stats = {}
+        
+        # Bumped whenever the data changes; derived results are memoized per generation
+        self.generation = 0
+        self._memo = {}
+        
+        # Column information served by get_column_info, built from the profile
+        # on first use and dropped per column when that column changes
+        self._column_info: Dict[str, Dict[str, Any]] = {}
+        
+        self.profile_workers = profile_workers or int(os.getenv('PROFILE_WORKERS', os.cpu_count() or 1))
+        self.ingestor = CsvIngestor()
+        self.excel_ingestor = ExcelIngestor()
+        self.cache = cache or get_default_cache()
+        self.string_pool = get_default_pool()
+        
+        # Out-of-core mode: statistics come from sketches over the streamed
+        # file and self.data holds only a uniform sample of its rows
+        self.out_of_core = False
+        self.out_of_core_threshold = _default_out_of_core_threshold()
+        self.streaming_profiler = StreamingProfiler()
+        
+        # Embedded SQL backend, created on first query
+        self._sql_engine = None
+        
+        # Per-step metrics of the last clean_data call
+        self.last_cleaning_metrics: List[Dict[str, Any]] = []
+        
+        # Undo/redo history; versions share unchanged columns
+        self.versions = VersionStore()
+        
+        # Last access time per column; the coldest columns are spilled first
+        self._column_access: Dict[str, float] = {}
+        
+        # Memoized results are evicted before any data is spilled
+        self.memory_manager = get_memory_manager()
+        self.memory_manager.register(f"data_processor-{id(self)}:cache", 'cache',
+                                     self._cache_bytes, self._release_caches)
+        self.memory_manager.register(f"data_processor-{id(self)}:profile", 'cache',
+                                     self._profile_bytes, self._release_profile_state, priority=1)
+        self.memory_manager.register(f"data_processor-{id(self)}:data", 'dataset',
+                                     self._resident_bytes, self.spill_cold_columns, priority=1)
         logger.info("Data processor initialized")
     
-    def load_csv(self, file_path: str) -> Tuple[bool, str]:
+    def load_csv(self, file_path: str, out_of_core: Optional[bool] = None) -> Tuple[bool, str]:
         """
         Load a CSV file into a pandas DataFrame.
         
+        The file is streamed in chunks with encoding, delimiter and compact
+        dtypes inferred from a sample, so it is only parsed once. The typed
+        result is cached by content hash and memory-mapped on later loads.
+        
         Args:
             file_path: Path to the CSV file
+            out_of_core: Compute approximate statistics over the stream and keep
+                only a row sample in memory. If None, enabled for files larger
+                than out_of_core_threshold.
             
         Returns:
             Tuple of (success, message)
         """
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+            if out_of_core is None:
+                out_of_core = (self.out_of_core_threshold is not None and
+                               os.path.getsize(file_path) > self.out_of_core_threshold)
+            if out_of_core:
+                return self._load_csv_out_of_core(file_path)
+            self.out_of_core = False
             
-            for encoding in encodings:
-                try:
-                    self.data = pd.read_csv(file_path, encoding=encoding)
-                    logger.info(f"Successfully loaded CSV with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                raise ValueError("Could not decode CSV file with any standard encoding")
+            key = self.cache.key_for_file(file_path) if self.cache.available else None
+            # Sniff, infer dtypes and stream the file in a single pass
+            self._load_cached(key, lambda: self.ingestor.read(file_path))
+            self.versions.reset(self.data)
             
             # Generate data information
             self._generate_data_info()
+            self.versions.remember_profile(self.profile)
             
             return True, f"Successfully loaded {len(self.data)} rows and {len(self.data.columns)} columns"
             
@@ -58,26 +145,301 @@ class DataProcessor:
             logger.error(f"Error loading CSV: {str(e)}")
             return False, f"Error loading CSV file: {str(e)}"
     
+    def load_excel(self, file_path: str, sheet_name: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Load one worksheet of an Excel workbook.
+        
+        Rows are streamed from a read-only workbook and typed like CSV
+        columns; the result goes into the same dataset cache, keyed by the
+        workbook contents and the sheet.
+        
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Worksheet to load. Defaults to the first sheet.
+            
+        Returns:
+            Tuple of (success, message)
+        """
+        try:
+            self.out_of_core = False
+            if sheet_name is None:
+                sheet_name = self.excel_ingestor.sheet_names(file_path)[0]
+            
+            key = None
+            if self.cache.available:
+                key = self.cache.derive_key(self.cache.key_for_file(file_path), 'sheet', sheet_name)
+            self._load_cached(key, lambda: self.excel_ingestor.read(file_path, sheet_name))
+            self.versions.reset(self.data)
+            
+            self._generate_data_info()
+            self.versions.remember_profile(self.profile)
+            
+            return True, (f"Successfully loaded {len(self.data)} rows and {len(self.data.columns)} columns "
+                          f"from sheet '{sheet_name}'")
+            
+        except Exception as e:
+            logger.error(f"Error loading Excel file: {str(e)}")
+            return False, f"Error loading Excel file: {str(e)}"
+    
+    def load_file(self, file_path: str, sheet_name: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Load a CSV or Excel file, chosen by extension.
+        
+        Args:
+            file_path: Path to the file
+            sheet_name: Worksheet to load for Excel files
+            
+        Returns:
+            Tuple of (success, message)
+        """
+        if is_excel_file(file_path):
+            return self.load_excel(file_path, sheet_name)
+        return self.load_csv(file_path)
+    
+    def _load_cached(self, key: Optional[str], read):
+        """
+        Set self.data from the dataset cache, or from read() on a miss.
+        
+        Args:
+            key: Cache key, or None when the cache is unavailable
+            read: Callable returning (DataFrame, load statistics)
+        """
+        start = time.perf_counter()
+        cached = self.cache.get(key) if key else None
+        
+        if cached is not None:
+            metadata = self.cache.get_metadata(key)
+            # Cached dictionaries are moved onto the shared string pool
+            self.data, _ = encode_text_columns(cached, self.string_pool, self.ingestor.category_ratio,
+                                               self.ingestor.max_categories)
+            self.load_stats = dict(metadata['load_stats'] if metadata else {})
+            self.load_stats.update({
+                'cache': 'hit',
+                'load_time_seconds': time.perf_counter() - start,
+                'peak_rss_mb': peak_rss_mb()
+            })
+            logger.info(f"Loaded data from dataset cache ({key})")
+        else:
+            data, self.load_stats = read()
+            self.data = self._prepare_columns(data)
+            self.load_stats['cache'] = 'miss'
+            if key:
+                self.cache.put(key, self.data, self.load_stats)
+            logger.info(f"Parsed {len(self.data)} rows and stored them in the dataset cache")
+    
+    def load_dataframe(self, data: pd.DataFrame, load_stats: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        Load an in-memory DataFrame, such as a join result or a restored table.
+        
+        Args:
+            data: DataFrame to load
+            load_stats: Statistics describing where the data came from
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        try:
+            self.out_of_core = False
+            self.load_stats = dict(load_stats or {})
+            self.data = self._prepare_columns(data)
+            self.versions.reset(self.data)
+            self._generate_data_info()
+            self.versions.remember_profile(self.profile)
+        
+            return True, f"Successfully loaded {len(self.data)} rows and {len(self.data.columns)} columns"
+        
+        except Exception as e:
+            logger.error(f"Error loading DataFrame: {str(e)}")
+            return False, f"Error loading data: {str(e)}"
+    
+    def _prepare_columns(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse text columns that hold dates and dictionary-encode compact text columns.
+        
+        Category dictionaries draw their strings from the shared string pool,
+        so datasets loaded side by side hold each distinct value once.
+        """
+        data, parsed = parse_datetime_columns(data, detect_datetime_columns(data))
+        if parsed:
+            self.load_stats['parsed_dates'] = parsed
+        data, encoded = encode_text_columns(data, self.string_pool, self.ingestor.category_ratio,
+                                            self.ingestor.max_categories)
+        if encoded:
+            self.load_stats['encoded_columns'] = encoded
+        return data
+    
+    def _load_csv_out_of_core(self, file_path: str) -> Tuple[bool, str]:
+        """Stream a CSV file through the sketches, keeping a row sample."""
+        self.profile, self.data, self.load_stats = self.streaming_profiler.profile_csv(file_path)
+        self.out_of_core = True
+        # Only a sample is in memory, so there is nothing to version
+        self.versions.clear()
+        self._refresh_data_info()
+        
+        return True, (f"Streamed {self.profile.rows} rows and {len(self.data.columns)} columns "
+                      f"(approximate statistics, {len(self.data)}-row sample kept for analysis)")
+    
     def _generate_data_info(self):
         """Generate comprehensive information about the loaded data."""
         if self.data is None:
             return
         
+        # One profiling pass feeds the data info and the cleaning suggestions
+        self.profile = build_profile(self.data, workers=self.profile_workers)
+        self._refresh_data_info()
+        self.memory_manager.enforce()
+    
+    def _bump_generation(self, changed_columns: Optional[List[str]] = None):
+        """
+        Mark the data as changed and drop results memoized for older data.
+        
+        Args:
+            changed_columns: Columns whose values changed while the rows stayed
+                the same. If None, every column is treated as changed.
+        """
+        self.generation += 1
+        self._memo = {}
+        if changed_columns is None:
+            self._column_info = {}
+        else:
+            for col in changed_columns:
+                self._column_info.pop(col, None)
+    
+    def _memoized(self, key: Any, compute):
+        """Return the result of compute() cached for the current data generation."""
+        # Read and written through one reference: the memory manager may
+        # replace the memo from another thread at any point
+        memo = self._memo
+        if key in memo:
+            return memo[key]
+        value = compute()
+        memo[key] = value
+        return value
+    
+    def _cache_bytes(self) -> int:
+        """Memory held by memoized results and the cached profiles of other versions."""
+        # A snapshot, since analyst threads may be adding results meanwhile
+        return (sum(estimate_object_bytes(value) for value in list(self._memo.values())) +
+                self.versions.profile_memory_usage())
+    
+    def _release_caches(self, nbytes: int) -> int:
+        """Drop memoized results, cached history frames and profiles; all are rebuilt on demand."""
+        freed = self._cache_bytes()
+        self._memo = {}
+        self.versions.drop_frames()
+        return freed
+    
+    def _profile_bytes(self) -> int:
+        """Memory held by the profile's sorted values, value counts and row hashes."""
+        return self.profile.nbytes if self.profile is not None else 0
+    
+    def _release_profile_state(self, nbytes: int) -> int:
+        """Swap the profile's sorted values for t-digests; statistics stay valid."""
+        if self.profile is None:
+            return 0
+        freed = self.profile.release_order_state()
+        if freed:
+            logger.info("Profile quartiles of numeric columns are approximate from now on")
+        return freed
+    
+    def _resident_bytes(self) -> int:
+        """Memory held by the data and its history, excluding memory-mapped columns."""
+        if self.data is None:
+            return 0
+        mapped = sum(estimate_series_bytes(self.data[col]) for col in self.data.columns
+                     if is_memory_mapped(self.data[col]))
+        return self.data_info.get('memory_usage', 0) - mapped + self.versions.memory_usage()
+    
+    def _touch(self, column: str):
+        """Record that a column was used."""
+        self._column_access[column] = time.monotonic()
+    
+    def spill_cold_columns(self, nbytes: int) -> int:
+        """
+        Move the least recently used columns to memory-mapped files.
+        
+        Only columns backed by plain NumPy arrays are spilled; their values and
+        dtypes are unchanged, so profiles and column information stay valid.
+        
+        Args:
+            nbytes: Bytes to free
+            
+        Returns:
+            Bytes moved out of memory
+        """
+        if self.data is None or self.out_of_core or nbytes <= 0:
+            return 0
+        
+        # Coldest first, biggest first among columns never accessed
+        candidates = [col for col in self.data.columns
+                      if can_memory_map(self.data[col]) and not is_memory_mapped(self.data[col])]
+        candidates.sort(key=lambda col: (self._column_access.get(col, 0.0), -self.data[col].array.nbytes))
+        
+        data = self.data.copy(deep=False)
+        freed = 0
+        spilled = []
+        try:
+            for col in candidates:
+                if freed >= nbytes:
+                    break
+                original = data[col]
+                mapped, _ = memory_map_column(original, self.memory_manager.spill_dir)
+                data[col] = mapped
+                # The history must not keep the in-memory copy alive either
+                self.versions.replace_buffer(original, mapped)
+                freed += original.array.nbytes
+                spilled.append(col)
+        except OSError as e:
+            logger.error(f"Error spilling columns to disk: {str(e)}")
+        
+        if spilled:
+            self.data = data
+            # Values are unchanged, but memoized results may reference the old buffers
+            self._bump_generation([])
+            logger.info(f"Spilled {len(spilled)} columns ({freed / 1024 / 1024:.1f} MB) to memory-mapped files: "
+                        f"{', '.join(map(str, spilled))}")
+        return freed
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Get the memory held by the data, its history, its profile and memoized results.
+        
+        Returns:
+            Dictionary of bytes per part
+        """
+        return {
+            'resident': self._resident_bytes(),
+            'history': self.versions.memory_usage(),
+            'profile': self._profile_bytes(),
+            'cache': self._cache_bytes()
+        }
+    
+    def _refresh_data_info(self, changed_columns: Optional[List[str]] = None):
+        """
+        Rebuild the data information from the current profile.
+        
+        Args:
+            changed_columns: Columns changed since the last refresh, if only
+                some columns changed and no rows were added or removed
+        """
+        self._bump_generation(changed_columns)
         self.data_info = {
-            'shape': self.data.shape,
+            'shape': (self.profile.rows, len(self.data.columns)),
             'columns': list(self.data.columns),
             'dtypes': self.data.dtypes.to_dict(),
-            'missing_values': self.data.isnull().sum().to_dict(),
-            'numeric_columns': list(self.data.select_dtypes(include=[np.number]).columns),
-            'categorical_columns': list(self.data.select_dtypes(include=['object']).columns),
-            'date_columns': list(self.data.select_dtypes(include=['datetime64']).columns),
-            'memory_usage': self.data.memory_usage(deep=True).sum(),
-            'sample_data': self.data.head(5).to_dict('records')
+            'missing_values': self.profile.missing_values(),
+            'numeric_columns': self.profile.columns_of_kind('numeric'),
+            'categorical_columns': self.profile.columns_of_kind('text'),
+            'date_columns': self.profile.columns_of_kind('datetime'),
+            'memory_usage': self.profile.memory_usage + self.data.index.memory_usage(),
+            'sample_data': self.get_sample(5).to_dict('records'),
+            'load_stats': self.load_stats,
+            'approximate': self.profile.approximate
         }
         
         # Add basic statistics for numeric columns
         if self.data_info['numeric_columns']:
-            self.data_info['numeric_stats'] = self.data[self.data_info['numeric_columns']].describe().to_dict()
+            self.data_info['numeric_stats'] = self.profile.numeric_stats()
         
         logger.info("Generated comprehensive data information")
     
@@ -91,6 +453,10 @@ class DataProcessor:
         if self.data is None:
             return "No data loaded"
         
+        return self._memoized('summary', self._build_data_summary)
+    
+    def _build_data_summary(self) -> str:
+        """Build the summary text for the current data generation."""
         summary = f"""
         Dataset Overview:
         - Shape: {self.data_info['shape'][0]} rows × {self.data_info['shape'][1]} columns
@@ -110,6 +476,10 @@ class DataProcessor:
         if missing_details:
             summary += "\nMissing Values:\n" + "\n".join(missing_details)
         
+        if self.out_of_core:
+            summary += (f"\nNote: statistics are approximate (streamed over {self.profile.rows} rows); "
+                        f"row-level analysis uses a uniform sample of {len(self.data)} rows")
+        
         return summary.strip()
     
     def get_cleaning_suggestions(self) -> str:
@@ -122,6 +492,10 @@ class DataProcessor:
         if self.data is None:
             return "No data loaded"
         
+        return self._memoized('cleaning_suggestions', self._build_cleaning_suggestions)
+    
+    def _build_cleaning_suggestions(self) -> str:
+        """Build the cleaning suggestions for the current data generation."""
         suggestions = []
         
         # Check for missing values
@@ -131,26 +505,22 @@ class DataProcessor:
             suggestions.append("Consider: dropping rows, filling with mean/median, or using forward fill")
         
         # Check for duplicate rows
-        duplicates = self.data.duplicated().sum()
+        duplicates = self.profile.duplicate_rows
         if duplicates > 0:
             suggestions.append(f"Found {duplicates} duplicate rows - consider removing them")
+            if self.profile.row_index is not None:
+                largest = self.profile.row_index.duplicate_groups(max_groups=1)[0]
+                suggestions.append(f"The most repeated row occurs {len(largest)} times "
+                                   f"(first at row {int(largest[0])})")
         
         # Check for potential data type issues
         for col in self.data_info['categorical_columns']:
-            if self.data[col].dtype == 'object':
-                # Check if it might be numeric
-                try:
-                    pd.to_numeric(self.data[col], errors='raise')
-                    suggestions.append(f"Column '{col}' might be numeric but stored as text")
-                except:
-                    pass
+            if self.profile.column(col).numeric_coercible:
+                suggestions.append(f"Column '{col}' might be numeric but stored as text")
         
         # Check for outliers in numeric columns
         for col in self.data_info['numeric_columns']:
-            Q1 = self.data[col].quantile(0.25)
-            Q3 = self.data[col].quantile(0.75)
-            IQR = Q3 - Q1
-            outliers = ((self.data[col] < (Q1 - 1.5 * IQR)) | (self.data[col] > (Q3 + 1.5 * IQR))).sum()
+            outliers = self.profile.column(col).outliers
             if outliers > 0:
                 suggestions.append(f"Column '{col}' has {outliers} potential outliers")
         
@@ -164,7 +534,10 @@ class DataProcessor:
         Apply data cleaning based on provided instructions.
         
         Args:
-            cleaning_instructions: Instructions for cleaning the data
+            cleaning_instructions: Text holding a JSON cleaning plan (see
+                backend.utils.cleaning.PLAN_FORMAT). Without a plan, duplicate
+                rows are dropped and missing values filled with the median or
+                'Unknown'.
             
         Returns:
             Tuple of (success, message)
@@ -172,48 +545,359 @@ class DataProcessor:
         if self.data is None:
             return False, "No data loaded"
         
+        if self.out_of_core:
+            return False, "Data cleaning is not available for out-of-core datasets; clean the source file instead"
+        
         try:
             original_shape = self.data.shape
+            if self.profile is None:
+                self._generate_data_info()
             
-            # Apply common cleaning operations
-            # Remove duplicates
-            self.data = self.data.drop_duplicates()
+            # Instructions may hold a JSON cleaning plan; otherwise apply the standard one
+            plan = CleaningPlan.parse(cleaning_instructions) or default_plan(self.profile)
+            problems = plan.validate(self.data)
+            if problems:
+                return False, "Invalid cleaning plan: " + "; ".join(problems)
             
-            # Handle missing values in numeric columns
-            for col in self.data_info['numeric_columns']:
-                if self.data[col].isnull().any():
-                    self.data[col].fillna(self.data[col].median(), inplace=True)
+            result = apply_plan(self.data, plan, self.profile)
+            previous, previous_profile = self.data, self.profile
+            self.data = result.data
+            try:
+                if plan.incremental:
+                    # Update the data info from the cleaning deltas instead of reprofiling,
+                    # on a copy so the previous version keeps its profile for undo
+                    self.profile = self.profile.copy()
+                    if result.rows_removed > 0:
+                        self.profile.remove_rows(previous[~result.keep_mask], result.keep_mask)
+                    for col, (value, count) in result.fills.items():
+                        self.profile.fill_missing(col, value, count, str(self.data[col].dtype))
+                    self.profile.refresh_rows(self.data, result.changed_rows)
+                    # Row removal changes every column's statistics
+                    self._refresh_data_info(None if result.rows_removed else result.changed_columns)
+                else:
+                    # Coercion and clipping change values everywhere, so profile again
+                    self._generate_data_info()
+            except Exception:
+                # Keep the data and its profile as they were
+                self.data, self.profile = previous, previous_profile
+                self._refresh_data_info()
+                raise
             
-            # Handle missing values in categorical columns
-            for col in self.data_info['categorical_columns']:
-                if self.data[col].isnull().any():
-                    self.data[col].fillna('Unknown', inplace=True)
-            
-            # Regenerate data info after cleaning
-            self._generate_data_info()
+            # Recorded only once the new data and its profile are in place
+            self.last_cleaning_metrics = [m.to_dict() for m in result.metrics]
+            self.versions.commit(self.data, 'clean', changed_columns=result.changed_columns,
+                                 keep_mask=result.keep_mask, metrics=self.last_cleaning_metrics)
+            self.versions.remember_profile(self.profile)
             
             new_shape = self.data.shape
             removed_rows = original_shape[0] - new_shape[0]
             
-            message = f"Data cleaning completed. Removed {removed_rows} duplicate rows."
+            message = f"Data cleaning completed. Removed {removed_rows} rows."
             if removed_rows > 0:
                 message += f" New shape: {new_shape[0]} rows × {new_shape[1]} columns"
+            if result.metrics:
+                message += "\n" + format_metrics(result.metrics)
             
             logger.info("Data cleaning completed successfully")
             return True, message
             
         except Exception as e:
+            # The data was restored, but results memoized during the attempt are not valid
+            self._bump_generation()
             logger.error(f"Error during data cleaning: {str(e)}")
             return False, f"Error cleaning data: {str(e)}"
     
-    def get_data_for_analysis(self) -> pd.DataFrame:
+    def append_data(self, rows: pd.DataFrame) -> Tuple[bool, str]:
+        """
+        Append rows with the same columns to the loaded data.
+        
+        The new rows are cast to the loaded dtypes, and only they are
+        profiled and hashed into the duplicate index.
+        
+        Args:
+            rows: Rows to append
+            
+        Returns:
+            Tuple of (success, message)
+        """
+        if self.data is None:
+            return self.load_dataframe(rows)
+        
+        if self.out_of_core:
+            return False, "Appending is not available for out-of-core datasets"
+        
+        if list(rows.columns) != list(self.data.columns):
+            return False, "Appended rows must have the same columns as the loaded data"
+        
+        try:
+            rows = rows.reset_index(drop=True)
+            # Work on a shallow copy so earlier versions keep their columns
+            data = self.data.copy(deep=False)
+            added = {}
+            retyped = []
+            widened = False
+            for col in data.columns:
+                dtype = data[col].dtype
+                if isinstance(dtype, pd.CategoricalDtype):
+                    new_values = pd.Index(rows[col].dropna().unique()).difference(dtype.categories)
+                    if len(new_values) > 0:
+                        data[col] = add_categories(data[col], new_values, self.string_pool)
+                        retyped.append(col)
+                    added[col] = pd.Categorical(rows[col], categories=data[col].cat.categories)
+                    continue
+                
+                # Row hashes depend on the dtype, so the new rows take the
+                # loaded one unless their values need a wider type
+                target = dtype
+                if pd.api.types.is_numeric_dtype(dtype) and pd.api.types.is_numeric_dtype(rows[col]):
+                    target = np.result_type(dtype, downcast_numeric(rows[col]).dtype)
+                if target != dtype:
+                    data[col] = data[col].astype(target)
+                    retyped.append(col)
+                    widened = True
+                added[col] = rows[col].astype(target)
+            
+            # Continue the index after the highest label; cleaning may leave gaps
+            start = len(data)
+            if len(data) > 0 and pd.api.types.is_integer_dtype(data.index):
+                start = max(start, int(data.index.max()) + 1)
+            added = pd.DataFrame(added)
+            added.index = pd.RangeIndex(start, start + len(added))
+            
+            self.data = pd.concat([data, added])
+            self.versions.commit(self.data, 'append', changed_columns=retyped, appended=added)
+            if widened:
+                # Widening changed the stored values' hashes and numeric dtypes
+                self._generate_data_info()
+            else:
+                # Updated on a copy so the previous version keeps its profile for undo
+                self.profile = self.profile.copy()
+                self.profile.append_rows(added)
+                self._refresh_data_info()
+            self.versions.remember_profile(self.profile)
+            
+            return True, f"Appended {len(rows)} rows. New shape: {self.data.shape[0]} rows × {self.data.shape[1]} columns"
+            
+        except Exception as e:
+            logger.error(f"Error appending data: {str(e)}")
+            self._generate_data_info()
+            return False, f"Error appending data: {str(e)}"
+    
+    def undo(self) -> Tuple[bool, str]:
+        """
+        Restore the data as it was before the last change.
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        if not self.versions.can_undo:
+            return False, "Nothing to undo"
+        label = self.versions.version(self.versions.current).label
+        return self._restore_version(self.versions.undo(), f"Undid '{label}'")
+    
+    def redo(self) -> Tuple[bool, str]:
+        """
+        Reapply the last undone change.
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        if not self.versions.can_redo:
+            return False, "Nothing to redo"
+        data = self.versions.redo()
+        label = self.versions.version(self.versions.current).label
+        return self._restore_version(data, f"Redid '{label}'")
+    
+    def _restore_version(self, data: pd.DataFrame, action: str) -> Tuple[bool, str]:
+        """Make a version from the history the current data."""
+        try:
+            self.data = data
+            profile = self.versions.cached_profile(self.versions.current)
+            if profile is not None:
+                # Profiled when the version was last current
+                self.profile = profile
+                self._refresh_data_info()
+            else:
+                self._generate_data_info()
+                self.versions.remember_profile(self.profile)
+            return True, (f"{action}. Now at version {self.versions.current}: "
+                          f"{self.data.shape[0]} rows × {self.data.shape[1]} columns")
+        
+        except Exception as e:
+            logger.error(f"Error restoring version: {str(e)}")
+            return False, f"Error restoring version: {str(e)}"
+    
+    def get_version_history(self) -> List[Dict[str, Any]]:
+        """Describe every recorded version of the data, oldest first."""
+        return self.versions.history()
+    
+    def compare_versions(self, before: Optional[int] = None, after: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Compare two versions of the data.
+        
+        Args:
+            before: Earlier version id. Defaults to the version before the current one.
+            after: Later version id. Defaults to the current version.
+            
+        Returns:
+            Dictionary with row counts and statistics of the changed columns
+        """
+        if self.versions.current is None:
+            return {}
+        
+        if after is None:
+            after = self.versions.current
+        if before is None:
+            before = max(after - 1, 0)
+        
+        changed = self.versions.changed_between(before, after)
+        comparison = compare_frames(self.versions.materialize(before), self.versions.materialize(after), changed)
+        comparison.update({'before_version': before, 'after_version': after, 'changed_columns': changed})
+        return comparison
+    
+    def get_duplicate_groups(self, max_groups: int = 5) -> List[pd.DataFrame]:
+        """
+        Get the largest groups of identical rows.
+        
+        Args:
+            max_groups: Maximum number of groups to return
+            
+        Returns:
+            One DataFrame per group with all of its rows, largest group first
+        """
+        if self.data is None or self.profile is None or self.profile.row_index is None:
+            return []
+        
+        return [self.data.iloc[positions]
+                for positions in self.profile.row_index.duplicate_groups(max_groups)]
+    
+    def get_profile(self) -> Optional[DataProfile]:
+        """
+        Get the profile of the loaded data.
+        
+        Returns:
+            DataProfile with per-column statistics, or None if no data is loaded
+        """
+        return self.profile
+    
+    def get_sample(self, n: int = 10) -> pd.DataFrame:
+        """
+        Get a representative sample of the loaded data.
+        
+        The sample mixes uniform rows, rows from every category of a
+        low-cardinality column and the rows holding numeric extremes. It is
+        computed once per data generation.
+        
+        Args:
+            n: Target number of rows
+            
+        Returns:
+            Sampled rows, or an empty DataFrame if no data is loaded
+        """
+        if self.data is None:
+            return pd.DataFrame()
+        return self._memoized(('sample', n), lambda: build_sample(self.data, self.profile, n))
+    
+    def get_sample_text(self, n: int = 10) -> str:
+        """
+        Get a representative sample serialized for LLM prompts.
+        
+        Args:
+            n: Target number of rows
+            
+        Returns:
+            Compact columnar text of the sample
+        """
+        if self.data is None:
+            return "No data loaded"
+        total_rows = self.profile.rows if self.profile is not None else len(self.data)
+        return self._memoized(('sample_text', n),
+                              lambda: format_columnar(self.get_sample(n), total_rows))
+    
+    def get_data_for_analysis(self, copy: bool = False) -> pd.DataFrame:
         """
         Get the processed data for analysis.
         
+        By default this is a copy-on-write handle that shares the loaded
+        buffers: reading it is free, and mutating it copies only the touched
+        columns without affecting the processor's data.
+        
+        Args:
+            copy: Return an eager deep copy instead
+            
         Returns:
             Processed DataFrame
         """
-        return self.data.copy() if self.data is not None else pd.DataFrame()
+        if self.data is None:
+            return pd.DataFrame()
+        return self.data.copy(deep=copy)
+    
+    @property
+    def sql_engine(self) -> SqlEngine:
+        """SQL engine with the current data registered as table 'df'."""
+        if self._sql_engine is None:
+            self._sql_engine = SqlEngine()
+        if self.data is not None:
+            # Re-registered only when the data has changed
+            self._sql_engine.register('df', self.data, version=(id(self.data), self.generation))
+        return self._sql_engine
+    
+    def query_sql(self, sql: str, max_rows: int = 1000) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
+        """
+        Run a read-only SQL query against the loaded data (table 'df').
+        
+        Args:
+            sql: A single SELECT statement
+            max_rows: Maximum number of result rows
+            
+        Returns:
+            Tuple of (success, result DataFrame, error message)
+        """
+        if self.data is None:
+            return False, None, "No data loaded"
+        return self.sql_engine.query(sql, max_rows)
+    
+    def get_time_index(self, column: Optional[str] = None) -> Optional[TimeIndex]:
+        """
+        Get the rows sorted by a date column, with daily/weekly/monthly rollups.
+        
+        The index is built on first use and kept until the data changes.
+        
+        Args:
+            column: Date column. Defaults to the first one.
+            
+        Returns:
+            TimeIndex, or None without date columns or for out-of-core data
+        """
+        if self.data is None or self.out_of_core:
+            return None
+        
+        date_columns = self.data_info.get('date_columns', [])
+        if column is None:
+            if not date_columns:
+                return None
+            column = date_columns[0]
+        elif column not in date_columns:
+            return None
+        
+        self._touch(column)
+        return self._memoized(('time_index', column), lambda: TimeIndex(self.data, column))
+    
+    def get_time_rollup(self, freq: Optional[str] = None, column: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Get per-period row counts and numeric statistics.
+        
+        Args:
+            freq: 'D', 'W' or 'M'. Defaults to the finest one with at most 60 periods.
+            column: Date column. Defaults to the first one.
+            
+        Returns:
+            Rollup DataFrame indexed by period start, or None without a time index
+        """
+        index = self.get_time_index(column)
+        if index is None:
+            return None
+        return index.rollup(freq or index.suggest_freq())
     
     def get_column_info(self, column_name: str) -> Dict[str, Any]:
         """
@@ -228,24 +912,39 @@ class DataProcessor:
         if self.data is None or column_name not in self.data.columns:
             return {}
         
-        col_data = self.data[column_name]
+        self._touch(column_name)
+        column_info = self._column_info
+        if column_name not in column_info:
+            column_info[column_name] = self._build_column_info(column_name)
+        return column_info[column_name]
+    
+    def _build_column_info(self, column_name: str) -> Dict[str, Any]:
+        """Build the column information from the column's profile without scanning the data."""
+        col = self.profile.column(column_name)
         info = {
             'name': column_name,
-            'dtype': str(col_data.dtype),
-            'count': len(col_data),
-            'missing': col_data.isnull().sum(),
-            'unique': col_data.nunique()
+            'dtype': col.dtype,
+            'count': self.profile.rows,
+            'missing': col.missing,
+            'unique': col.unique
         }
         
-        if col_data.dtype in ['int64', 'float64']:
+        if col.kind == 'numeric':
             info.update({
-                'mean': col_data.mean(),
-                'std': col_data.std(),
-                'min': col_data.min(),
-                'max': col_data.max(),
-                'median': col_data.median()
+                'mean': col.mean,
+                'std': col.std,
+                'min': col.min,
+                'max': col.max,
+                'median': col.median,
+                'q25': col.q25,
+                'q75': col.q75,
+                'outliers': col.outliers
             })
         else:
-            info['top_values'] = col_data.value_counts().head(5).to_dict()
+            info['top_values'] = dict(col.top_values)
+            if col.kind == 'datetime':
+                info.update({'min': col.min, 'max': col.max})
         
+        if self.profile.approximate:
+            info['approximate'] = True
         return info
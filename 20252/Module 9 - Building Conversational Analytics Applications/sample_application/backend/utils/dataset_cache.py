@@ -0,0 +1,382 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Columnar on-disk cache for uploaded datasets.
+Datasets are keyed by a hash of their bytes and the cache format version,
+stored once as Arrow IPC files with their inferred schema and memory-mapped
+on later loads.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from typing import Dict, Any, Optional
+import logging
+
+from backend.utils.response_cache import default_cache_dir
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pyarrow is optional, the cache is disabled without it
+    pa = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Schema metadata key used to store the ingestion statistics
+METADATA_KEY = b'conversational_analytics'
+
+# Size of the blocks read when hashing files
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Part of every key. Bump it when parsing, dtype inference or the stored
+# layout change, so files cached by older code are not loaded again
+CACHE_FORMAT_VERSION = 1
+
+
+def _new_digest() -> 'hashlib.blake2b':
+    """Start a content digest keyed by the cache format version."""
+    return hashlib.blake2b(f"format-{CACHE_FORMAT_VERSION}\x00".encode('utf-8'), digest_size=16)
+
+
+def _create_private_dir(directory: str, tighten: bool):
+    """
+    Create the cache directory (0700) so other users cannot read cached
+    datasets or plant files under keys they can compute.
+
+    Args:
+        directory: Directory to create
+        tighten: Whether to also restrict an existing directory
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if tighten and os.name != 'nt':
+        # makedirs leaves the mode of an existing directory alone
+        os.chmod(directory, 0o700)
+
+
+class DatasetCache:
+    """Size-bounded LRU cache of datasets stored as memory-mapped Arrow files."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        """
+        Initialize the dataset cache.
+
+        Args:
+            cache_dir: Directory for cached files. Defaults to a datasets
+                subdirectory of the per-user cache directory.
+            max_bytes: Maximum total size of cached files before eviction
+        """
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), 'datasets')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._path_keys = {}  # (path, size, mtime) -> key
+
+        if self.available:
+            _create_private_dir(self.cache_dir, tighten=cache_dir is None)
+            self._scan()
+            logger.info(f"Dataset cache initialized at {self.cache_dir}")
+        else:
+            logger.info("pyarrow not installed - dataset cache disabled")
+
+    @property
+    def available(self) -> bool:
+        """Whether the columnar cache can be used."""
+        return pa is not None
+
+    def _scan(self):
+        """Index the files already on disk, oldest access first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.arrow'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, name[:-len('.arrow')], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+
+    def _path(self, key: str) -> str:
+        """Get the file path for a cache key."""
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+
+    def key_for_bytes(self, data: bytes) -> str:
+        """
+        Compute the cache key for raw file contents.
+
+        Args:
+            data: Uploaded file bytes
+
+        Returns:
+            Hex digest identifying the contents
+        """
+        digest = _new_digest()
+        digest.update(data)
+        return digest.hexdigest()
+
+    def key_for_file(self, file_path: str) -> str:
+        """
+        Compute the cache key for a file on disk.
+
+        The digest is remembered per (path, size, mtime) so an unchanged file
+        is only hashed once per process.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Hex digest identifying the contents
+        """
+        stat = os.stat(file_path)
+        path_id = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if path_id in self._path_keys:
+            return self._path_keys[path_id]
+
+        digest = _new_digest()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+
+        key = digest.hexdigest()
+        self._path_keys[path_id] = key
+        return key
+
+    def derive_key(self, key: str, *parts: str) -> str:
+        """
+        Derive the key of a dataset read from part of a file, such as one sheet.
+
+        Args:
+            key: Key of the whole file
+            parts: Strings identifying the part
+
+        Returns:
+            Hex digest identifying the part of the contents
+        """
+        return hashlib.blake2b('\x00'.join((key,) + parts).encode('utf-8'), digest_size=16).hexdigest()
+
+    def register_file(self, file_path: str, key: str):
+        """
+        Associate a file on disk with a key computed from its bytes.
+
+        Args:
+            file_path: Path the bytes were written to
+            key: Key returned by key_for_bytes
+        """
+        stat = os.stat(file_path)
+        self._path_keys[(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)] = key
+
+    def contains(self, key: str) -> bool:
+        """Check whether a key is cached without counting a hit or miss."""
+        with self._lock:
+            return key in self._entries
+
+    def _open_table(self, key: str):
+        """Memory-map a cached Arrow file and return the table, or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            # Mark as most recently used, in memory and on disk
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            os.utime(path)
+            source = pa.memory_map(path, 'r')
+            return pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            self._remove(key)
+            return None
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Load a cached dataset.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached DataFrame, or None on a miss
+        """
+        if not self.available:
+            return None
+
+        table = self._open_table(key)
+        with self._lock:
+            if table is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return table.to_pandas(split_blocks=True)
+
+    def head(self, key: str, n: int = 5) -> Optional[pd.DataFrame]:
+        """
+        Load only the first rows of a cached dataset.
+
+        Args:
+            key: Cache key
+            n: Number of rows
+
+        Returns:
+            DataFrame with the first n rows, or None if not cached
+        """
+        if not self.available:
+            return None
+
+        table = self._open_table(key)
+        return table.slice(0, n).to_pandas() if table is not None else None
+
+    def get_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the shape and stored statistics of a cached dataset.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Dictionary with 'shape' and 'load_stats', or None if not cached
+        """
+        if not self.available:
+            return None
+
+        table = self._open_table(key)
+        if table is None:
+            return None
+
+        stored = (table.schema.metadata or {}).get(METADATA_KEY)
+        return {
+            'shape': (table.num_rows, table.num_columns),
+            'load_stats': json.loads(stored) if stored else {}
+        }
+
+    def put(self, key: str, data: pd.DataFrame, load_stats: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Convert a dataset to Arrow and store it.
+
+        Args:
+            key: Cache key
+            data: DataFrame to store
+            load_stats: Ingestion statistics stored alongside the data
+
+        Returns:
+            True if the dataset was cached
+        """
+        if not self.available:
+            return False
+
+        try:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[METADATA_KEY] = json.dumps(load_stats or {}, default=str).encode('utf-8')
+            table = table.replace_schema_metadata(metadata)
+
+            # Write to a temp file first so readers never see a partial file
+            path = self._path(key)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with pa.OSFile(temp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+            size = os.path.getsize(temp_path)
+            if size > self.max_bytes:
+                os.remove(temp_path)
+                logger.info(f"Dataset {key} ({size} bytes) exceeds cache size limit, not cached")
+                return False
+
+            os.replace(temp_path, path)
+            with self._lock:
+                self._entries[key] = size
+                self._entries.move_to_end(key)
+            self._evict()
+
+            logger.info(f"Cached dataset {key} ({size / 1024 / 1024:.2f} MB)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error caching dataset: {str(e)}")
+            return False
+
+    def _evict(self):
+        """Evict least recently used entries until under the size limit."""
+        while True:
+            with self._lock:
+                if sum(self._entries.values()) <= self.max_bytes or len(self._entries) <= 1:
+                    return
+                key = next(iter(self._entries))
+                self.evictions += 1
+            logger.info(f"Evicting cached dataset {key}")
+            self._remove(key)
+
+    def remove(self, key: str):
+        """
+        Remove a cached dataset.
+
+        Args:
+            key: Cache key
+        """
+        self._remove(key)
+
+    def _remove(self, key: str):
+        """Remove an entry from the index and disk."""
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached dataset."""
+        for key in list(self._entries):
+            self._remove(key)
+        logger.info("Dataset cache cleared")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and size information
+        """
+        with self._lock:
+            return {
+                'available': self.available,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': sum(self._entries.values()),
+                'max_bytes': self.max_bytes
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> DatasetCache:
+    """
+    Get the process-wide dataset cache shared by processors and the frontend.
+
+    The location and size limit can be set with the DATASET_CACHE_DIR and
+    DATASET_CACHE_MAX_MB environment variables.
+
+    Returns:
+        Shared DatasetCache instance
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_mb = int(os.getenv('DATASET_CACHE_MAX_MB', '2048'))
+            _default_cache = DatasetCache(os.getenv('DATASET_CACHE_DIR'), max_mb * 1024 * 1024)
+        return _default_cache
@@ -0,0 +1,312 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Streaming spreadsheet ingestion for the conversational analytics application.
+Reads one worksheet row by row in read-only mode, takes shapes from workbook
+metadata and builds the same compactly typed DataFrame as the CSV path.
+"""
+
+import os
+import time
+import datetime
+from contextlib import contextmanager
+from itertools import islice
+import pandas as pd
+from typing import Dict, Any, Tuple, List, Optional, Iterator
+import logging
+
+from backend.utils.csv_ingest import combine_column_chunks, downcast_numeric, peak_rss_mb
+
+try:
+    import openpyxl
+except ImportError:  # Needed for .xlsx workbooks only
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:  # Needed for legacy .xls workbooks only
+    xlrd = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+
+
+def is_excel_file(file_path: str) -> bool:
+    """Check whether a path names a spreadsheet by its extension."""
+    return os.path.splitext(file_path)[1].lower() in EXCEL_EXTENSIONS
+
+
+def _header_names(header: tuple) -> List[str]:
+    """Name blank header cells and de-duplicate names the way pandas does."""
+    names, seen = [], {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _without_trailing_blanks(rows: Iterator[tuple]) -> Iterator[tuple]:
+    """Yield rows, holding back blank ones until a non-blank row follows."""
+    blanks = []
+    for row in rows:
+        if all(value is None for value in row):
+            blanks.append(row)
+            continue
+        yield from blanks
+        blanks = []
+        yield row
+
+
+class ExcelIngestor:
+    """Streams worksheets into compactly typed DataFrames."""
+
+    def __init__(self, sample_rows: int = 10000, chunk_rows: int = 100000,
+                 category_ratio: float = 0.5, max_categories: int = 10000):
+        """
+        Initialize the spreadsheet ingestor.
+
+        Args:
+            sample_rows: Number of rows used for dtype inference
+            chunk_rows: Number of rows converted per chunk
+            category_ratio: Maximum unique/non-null ratio for category columns
+            max_categories: Maximum number of distinct values for category columns
+        """
+        self.sample_rows = sample_rows
+        self.chunk_rows = chunk_rows
+        self.category_ratio = category_ratio
+        self.max_categories = max_categories
+
+    @contextmanager
+    def _open(self, file_path: str):
+        """Open a workbook in streaming mode, yielding (format, workbook)."""
+        if file_path.lower().endswith('.xls'):
+            if xlrd is None:
+                raise ImportError("Reading .xls files requires xlrd")
+            book = xlrd.open_workbook(file_path, on_demand=True)
+            try:
+                yield 'xls', book
+            finally:
+                book.release_resources()
+        else:
+            if openpyxl is None:
+                raise ImportError("Reading .xlsx files requires openpyxl")
+            book = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                yield 'xlsx', book
+            finally:
+                book.close()
+
+    def sheet_names(self, file_path: str) -> List[str]:
+        """
+        List the worksheets of a workbook without reading any cells.
+
+        Args:
+            file_path: Path to the workbook
+
+        Returns:
+            Sheet names in workbook order
+        """
+        with self._open(file_path) as (fmt, book):
+            return list(book.sheet_names() if fmt == 'xls' else book.sheetnames)
+
+    def sheet_shape(self, file_path: str, sheet_name: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Get the data shape of a worksheet from the workbook metadata.
+
+        The first row is the header. Sheets written without a dimension record
+        are counted by streaming their rows once.
+
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Worksheet name. Defaults to the first sheet.
+
+        Returns:
+            Tuple of (rows, columns)
+        """
+        with self._open(file_path) as (fmt, book):
+            if fmt == 'xls':
+                sheet = book.sheet_by_name(sheet_name) if sheet_name else book.sheet_by_index(0)
+                return max(sheet.nrows - 1, 0), sheet.ncols
+
+            sheet = book[sheet_name] if sheet_name else book.worksheets[0]
+            if sheet.max_row is None or sheet.max_column is None:
+                logger.info("Worksheet has no dimension record, counting rows")
+                sheet.calculate_dimension(force=True)
+            return max((sheet.max_row or 0) - 1, 0), sheet.max_column or 0
+
+    def iter_rows(self, file_path: str, sheet_name: Optional[str] = None) -> Iterator[tuple]:
+        """
+        Stream the cell values of a worksheet row by row.
+
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Worksheet name. Defaults to the first sheet.
+
+        Yields:
+            One tuple of Python values per row, header row first
+        """
+        with self._open(file_path) as (fmt, book):
+            if fmt == 'xlsx':
+                sheet = book[sheet_name] if sheet_name else book.worksheets[0]
+                yield from sheet.iter_rows(values_only=True)
+                return
+
+            sheet = book.sheet_by_name(sheet_name) if sheet_name else book.sheet_by_index(0)
+            for i in range(sheet.nrows):
+                yield tuple(self._xls_value(cell, book.datemode) for cell in sheet.row(i))
+
+    @staticmethod
+    def _xls_value(cell, datemode: int) -> Any:
+        """Convert an xlrd cell to the Python value openpyxl would return."""
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return None
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            return xlrd.xldate.xldate_as_datetime(cell.value, datemode)
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        return cell.value
+
+    def preview(self, file_path: str, sheet_name: Optional[str] = None, n: int = 5) -> pd.DataFrame:
+        """
+        Read only the first rows of a worksheet.
+
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Worksheet name. Defaults to the first sheet.
+            n: Number of data rows
+
+        Returns:
+            DataFrame with at most n rows
+        """
+        rows = self.iter_rows(file_path, sheet_name)
+        try:
+            header = next(rows, ())
+            data = list(islice(rows, n))
+        finally:
+            rows.close()
+        names = _header_names(header)
+        return pd.DataFrame([row[:len(names)] for row in data], columns=names)
+
+    def infer_schema(self, sample: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        Infer a compact schema from sampled rows.
+
+        Args:
+            sample: Object DataFrame of the first rows
+
+        Returns:
+            Dictionary mapping column names to {'kind': ..., 'format': None}
+        """
+        schema = {}
+        for col in sample.columns:
+            values = sample[col].dropna()
+            types = set(map(type, values))
+            kind = 'object'
+
+            if not types:
+                kind = 'object'
+            elif types <= {bool}:
+                kind = 'bool'
+            elif all(issubclass(t, (int, float)) and t is not bool for t in types):
+                kind = 'numeric'
+            elif all(issubclass(t, (datetime.date, datetime.datetime)) for t in types):
+                kind = 'datetime'
+            elif types <= {str}:
+                unique_count = values.nunique()
+                if (unique_count <= self.max_categories and
+                        unique_count <= self.category_ratio * len(values)):
+                    kind = 'category'
+
+            schema[col] = {'kind': kind, 'format': None}
+
+        return schema
+
+    def _convert_chunk_column(self, series: pd.Series, spec: Dict[str, Any]) -> pd.Series:
+        """Apply the inferred compact dtype to one column of one chunk."""
+        kind = spec['kind']
+        missing = series.isna().sum()
+
+        if kind == 'numeric':
+            converted = pd.to_numeric(series, errors='coerce')
+            # Keep the raw values if this chunk mixes in text
+            if converted.isna().sum() == missing:
+                return downcast_numeric(converted)
+        elif kind == 'datetime':
+            converted = pd.to_datetime(series, errors='coerce')
+            if converted.isna().sum() == missing:
+                return converted
+        elif kind == 'bool' and missing == 0 and series.map(type).eq(bool).all():
+            return series.astype(bool)
+        elif kind == 'category':
+            return series.astype('category')
+
+        # Mixed cells are kept as text, as a CSV export would hold them, so
+        # the column has one type and fits the columnar cache; the column's
+        # other chunks are rendered as text when they are combined
+        values = series.dropna()
+        if not values.map(type).eq(str).all():
+            return series.where(series.isna(), series.astype(str))
+        return series
+
+    def read(self, file_path: str, sheet_name: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Stream a worksheet into a single compactly typed DataFrame.
+
+        Args:
+            file_path: Path to the workbook
+            sheet_name: Worksheet name. Defaults to the first sheet.
+
+        Returns:
+            Tuple of (DataFrame, load statistics)
+        """
+        start = time.perf_counter()
+        if sheet_name is None:
+            sheet_name = self.sheet_names(file_path)[0]
+
+        rows = self.iter_rows(file_path, sheet_name)
+        try:
+            names = _header_names(next(rows, ()))
+            width = len(names)
+            schema = None
+            parts: Dict[str, List[pd.Series]] = {col: [] for col in names}
+            chunk_count = 0
+
+            data_rows = _without_trailing_blanks(rows)
+            while True:
+                batch = [row[:width] for row in islice(data_rows, self.chunk_rows)]
+                if not batch and chunk_count > 0:
+                    break
+
+                chunk = pd.DataFrame(batch, columns=names, dtype=object)
+                if schema is None:
+                    schema = self.infer_schema(chunk.head(self.sample_rows))
+                for col in names:
+                    parts[col].append(self._convert_chunk_column(chunk[col], schema[col]).rename(col))
+                chunk_count += 1
+                if len(batch) < self.chunk_rows:
+                    break
+        finally:
+            rows.close()
+
+        data = pd.DataFrame(combine_column_chunks(parts, schema), columns=names)
+
+        load_stats = {
+            'format': 'excel',
+            'sheet': sheet_name,
+            'chunks': chunk_count,
+            'schema': {col: spec['kind'] for col, spec in schema.items()},
+            'load_time_seconds': time.perf_counter() - start,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        logger.info(f"Ingested {len(data)} rows from sheet '{sheet_name}' "
+                    f"in {load_stats['load_time_seconds']:.2f}s")
+        return data, load_stats
@@ -3,64 +3,678 @@
 
 """
 Gemini API client for conversational analytics application.
-Handles all interactions with Google's Gemini API.
+Handles all interactions with Google's Gemini API, or with another language
+model provider such as the local stand-in used for offline benchmarks.
 """
 
 import os
-import google.generativeai as genai
-from typing import Optional, Dict, Any
+import queue
+import asyncio
+import functools
+import threading
+import concurrent.futures
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, Tuple, Callable
 import logging
 
+from backend.utils.response_cache import ResponseCache, get_default_response_cache
+from backend.utils.request_scheduler import (RequestScheduler, CircuitOpenError, DeadlineExceededError,
+                                             estimate_tokens)
+from backend.utils.llm_providers import LLMProvider, LLMResponse, create_provider
+from backend.utils.token_budget import PromptSection, TokenLedger, fit_prompt
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Requests in flight at once per client; further calls wait for a slot
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Seconds before an unanswered request is cancelled
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+# Seconds a call may spend waiting, retrying and running before it is abandoned
+DEFAULT_DEADLINE_SECONDS = 300.0
+
+# Largest prompt sent in one call; context sections are shortened to fit
+DEFAULT_MAX_PROMPT_TOKENS = 8000
+
+# Tokens in and out allowed for all the calls answering one question
+DEFAULT_QUESTION_TOKEN_BUDGET = 60000
+
+# Tokens of a question's budget kept back for the response when fitting a prompt
+RESPONSE_TOKEN_RESERVE = 1000
+
+# Below this many prompt tokens a call is not worth making
+MIN_PROMPT_TOKENS = 256
+
+# Marks the end of a stream handed from the request loop to a blocking reader
+_END_OF_STREAM = object()
+
+UNAVAILABLE_MESSAGE = ("I apologize, but the Gemini service is failing repeatedly right now. "
+                       "Please try again in a minute.")
+
+BUDGET_EXHAUSTED_MESSAGE = ("I apologize, but this question has used up its token budget. "
+                            "Please ask a narrower question.")
+
+TIMEOUT_MESSAGE = "I apologize, but the request timed out. Please try again."
+
+
+class ModelUnavailableError(Exception):
+    """
+    No answer could be had from the model: the scheduler gave up, the call
+    failed or the question's token budget is used up.
+
+    The message is an apology meant for the user; it must not be used as an answer.
+    """
+
+
+class _EventLoopThread:
+    """
+    One background event loop that performs every Gemini request.
+
+    The SDK's async gRPC channel belongs to the loop that first uses it, so
+    routing all calls through this loop keeps a single shared connection and
+    lets synchronous callers use the async API.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='gemini-event-loop', daemon=True)
+        self._thread.start()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; cancelling the future cancels it."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Blocking Gemini calls cannot be made from the client's event loop; "
+                               "await the async API instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+
+def _get_loop_thread() -> _EventLoopThread:
+    """Get the process-wide request loop, starting it on first use."""
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            _loop_thread = _EventLoopThread()
+        return _loop_thread
+
 
 class GeminiClient:
     """Client for interacting with Google Gemini API."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, temperature: Optional[float] = None,
+                 cache: Optional[ResponseCache] = None, use_cache: bool = True,
+                 deadline: Optional[float] = None, scheduler: Optional[RequestScheduler] = None,
+                 provider: Optional[LLMProvider] = None, max_prompt_tokens: Optional[int] = None,
+                 question_token_budget: Optional[int] = None):
         """
         Initialize the Gemini client.
         
         Args:
             api_key: Google Gemini API key. If None, will try to get from environment.
+            max_concurrency: Maximum requests in flight. Defaults to the
+                GEMINI_MAX_CONCURRENCY environment variable or 8.
+            timeout: Seconds before a single attempt is cancelled. Defaults to the
+                GEMINI_TIMEOUT_SECONDS environment variable or 120.
+            temperature: Sampling temperature. If None, the model default is used.
+            cache: Response cache to use. If None, the shared default cache is used.
+            use_cache: Whether to answer repeated prompts from the cache
+            deadline: Seconds a call may take including rate limit waits and
+                retries. Defaults to the GEMINI_DEADLINE_SECONDS environment variable or 300.
+            scheduler: Request scheduler to use. If None, one is configured from
+                the environment (see RequestScheduler.from_env).
+            provider: Language model backend. If None, the one named by the
+                LLM_PROVIDER environment variable is created (Gemini by default).
+            max_prompt_tokens: Largest prompt sent in one call. Defaults to the
+                GEMINI_MAX_PROMPT_TOKENS environment variable or 8000.
+            question_token_budget: Tokens in and out per question, see begin_question.
+                Defaults to the GEMINI_QUESTION_TOKEN_BUDGET environment variable
+                or 60000; 0 means no limit.
         """
-        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        # Initialize the model
+        self.provider = provider or create_provider(api_key=api_key)
+        self.api_key = self.provider.api_key
+        self.model_name = self.provider.model_name
+        self.temperature = temperature
+        self.cache = (cache or get_default_response_cache()) if use_cache else None
         
-        # Configure the API
-        genai.configure(api_key=self.api_key)
+        self.max_concurrency = max_concurrency or int(os.getenv('GEMINI_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+        self.timeout = timeout or float(os.getenv('GEMINI_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS))
+        self.deadline = deadline or float(os.getenv('GEMINI_DEADLINE_SECONDS', DEFAULT_DEADLINE_SECONDS))
+        self._loop_thread = _get_loop_thread()
+        # Rate limits, retries and the concurrency limit; only ever awaited on the request loop
+        self.scheduler = scheduler or RequestScheduler.from_env(self.max_concurrency)
         
-        # Initialize the model
-        self.model = genai.GenerativeModel('gemini-pro')
-        logger.info("Gemini client initialized successfully")
+        # Token accounting: session totals, and the question being answered if any
+        self.max_prompt_tokens = max_prompt_tokens or int(os.getenv('GEMINI_MAX_PROMPT_TOKENS',
+                                                                    DEFAULT_MAX_PROMPT_TOKENS))
+        if question_token_budget is None:
+            question_token_budget = int(os.getenv('GEMINI_QUESTION_TOKEN_BUDGET', DEFAULT_QUESTION_TOKEN_BUDGET))
+        self.question_token_budget = question_token_budget or None
+        self.usage = self._new_ledger(None, keep_calls=False)
+        self._question: Optional[TokenLedger] = None
+        
+        # Blocking calls in progress, so they can be cancelled from another thread
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        logger.info(f"Gemini client initialized successfully with the {self.provider.name} provider")
+    
+    @staticmethod
+    def _build_prompt(prompt: str, context: Optional[str] = None) -> str:
+        """Combine prompt with context if provided."""
+        if context:
+            return f"Context: {context}\n\nQuestion: {prompt}"
+        return prompt
+    
+    def _new_ledger(self, budget: Optional[int], keep_calls: bool = True) -> TokenLedger:
+        return TokenLedger(budget, self.provider.input_cost_per_million, self.provider.output_cost_per_million,
+                           keep_calls=keep_calls)
+    
+    def _prepare(self, prompt: str, context: Optional[str] = None,
+                 sections: Optional[List[PromptSection]] = None
+                 ) -> Tuple[Optional[str], List[str], Callable[[], None]]:
+        """
+        Build the full prompt and shorten it to fit the per-call limit and the question's remaining budget.
+        
+        The prompt and a response allowance are reserved from the question's
+        budget under its lock, so calls made concurrently cannot all see the
+        same remaining tokens.
+        
+        Returns:
+            Tuple of (prompt, or None if the question's budget is used up; names of
+            shortened sections; function returning the reservation once the call is recorded)
+        """
+        full_prompt = self._build_prompt(prompt, context)
+        limit = self.max_prompt_tokens
+        question = self._question
+        granted = 0
+        if question is not None and question.budget is not None:
+            granted = question.reserve(limit + RESPONSE_TOKEN_RESERVE,
+                                       minimum=MIN_PROMPT_TOKENS + RESPONSE_TOKEN_RESERVE)
+            if not granted:
+                logger.warning(f"Token budget of {question.budget} for this question is used up; call skipped")
+                return None, [], lambda: None
+            limit = granted - RESPONSE_TOKEN_RESERVE
+        
+        sections = list(sections or [])
+        if context:
+            # The caller's context goes first, the question itself is never cut
+            sections.append(PromptSection('context', context, priority=0))
+        fitted, truncated = fit_prompt(full_prompt, sections, limit)
+        if truncated:
+            logger.warning(f"Prompt of {estimate_tokens(full_prompt)} tokens shortened to "
+                           f"{estimate_tokens(fitted)} to fit {limit}: {', '.join(truncated)}")
+        
+        if not granted:
+            return fitted, truncated, lambda: None
+        # Keep only what the fitted prompt and its response need
+        needed = min(granted, estimate_tokens(fitted) + RESPONSE_TOKEN_RESERVE)
+        question.release(granted - needed)
+        return fitted, truncated, functools.partial(question.release, needed)
+    
+    def _account(self, full_prompt: str, text: str, response: Optional[LLMResponse] = None,
+                 truncated: Optional[List[str]] = None, cached: bool = False):
+        """Record a call's tokens, as reported by the provider or else counted, and charge the token limit."""
+        estimate = estimate_tokens(full_prompt)
+        prompt_tokens = estimate if response is None or response.prompt_tokens is None else response.prompt_tokens
+        completion_tokens = (estimate_tokens(text) if response is None or response.completion_tokens is None
+                             else response.completion_tokens)
+        if not cached:
+            # The call was admitted with the prompt estimate only
+            self.scheduler.record_tokens(prompt_tokens + completion_tokens - estimate)
+        for ledger in (self.usage, self._question):
+            if ledger is not None:
+                ledger.record(prompt_tokens, completion_tokens, cached=cached, truncated=truncated)
+    
+    def _cached(self, full_prompt: str, truncated: Optional[List[str]] = None) -> Optional[str]:
+        """Get the cached response to a prompt, if any."""
+        if self.cache is None:
+            return None
+        text = self.cache.get(self.model_name, full_prompt, self.temperature)
+        if text is not None:
+            self._account(full_prompt, text, truncated=truncated, cached=True)
+        return text
+    
+    def chat_model(self, temperature: float = 0.1) -> Any:
+        """Get the provider's LangChain chat model for the CrewAI agents, or None if it has none."""
+        return self.provider.chat_model(temperature)
     
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> str:
+    async def _generate(self, full_prompt: str, timeout: Optional[float], deadline: Optional[float],
+                        truncated: Optional[List[str]] = None) -> str:
+        """Send one request on the request loop through the scheduler."""
+        estimate = estimate_tokens(full_prompt)
+        
+        def attempt():
+            return self.provider.generate(full_prompt, self.temperature)
+        
+        response = await self.scheduler.run(attempt, tokens=estimate, deadline_seconds=deadline or self.deadline,
+                                            attempt_timeout=timeout or self.timeout)
+        self._account(full_prompt, response.text, response, truncated)
+        return response.text
+    
+    async def _stream_chunks(self, full_prompt: str, timeout: Optional[float],
+                             truncated: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """Stream one request's text chunks on the request loop."""
+        timeout = timeout or self.timeout
+        estimate = estimate_tokens(full_prompt)
+        
+        async def open_stream():
+            chunks = self.provider.stream(full_prompt, self.temperature).__aiter__()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = None
+            return chunks, first
+        
+        # Only the opening of the stream is retried: once text has been shown it cannot be taken back.
+        # The concurrency slot is likewise held until the first chunk arrives.
+        chunks, chunk = await self.scheduler.run(open_stream, tokens=estimate, deadline_seconds=self.deadline,
+                                                 attempt_timeout=timeout)
+        parts = []
+        usage = None
+        while chunk is not None:
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+            if chunk.total_tokens is not None:
+                usage = chunk
+            try:
+                # The timeout bounds the wait for each chunk, not the whole answer
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+        self._account(full_prompt, ''.join(parts), usage, truncated)
+    
+    async def _astream(self, full_prompt: str, timeout: Optional[float],
+                       truncated: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """Stream a response on the request loop, caching it once complete."""
+        parts = []
+        try:
+            async for text in self._stream_chunks(full_prompt, timeout, truncated):
+                parts.append(text)
+                yield text
+        
+        except CircuitOpenError as e:
+            logger.error("Gemini stream refused: the service is failing repeatedly")
+            raise ModelUnavailableError(UNAVAILABLE_MESSAGE) from e
+        
+        except (asyncio.TimeoutError, DeadlineExceededError) as e:
+            logger.error(f"Gemini stream timed out after {timeout or self.timeout:g}s")
+            raise ModelUnavailableError(TIMEOUT_MESSAGE) from e
+        
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            raise ModelUnavailableError(f"I apologize, but I encountered an error: {str(e)}") from e
+        
+        if self.cache is not None and parts:
+            self.cache.put(self.model_name, full_prompt, ''.join(parts), self.temperature)
+    
+    async def _agenerate(self, full_prompt: str, timeout: Optional[float],
+                         deadline: Optional[float] = None, truncated: Optional[List[str]] = None) -> str:
+        """Request a response, caching it on success and raising ModelUnavailableError on failure."""
+        try:
+            text = await self._on_request_loop(self._generate(full_prompt, timeout, deadline, truncated))
+        
+        except CircuitOpenError as e:
+            logger.error("Gemini request refused: the service is failing repeatedly")
+            raise ModelUnavailableError(UNAVAILABLE_MESSAGE) from e
+        
+        except DeadlineExceededError as e:
+            logger.error(f"Gemini request missed its deadline of {deadline or self.deadline:g}s: {str(e)}")
+            raise ModelUnavailableError(TIMEOUT_MESSAGE) from e
+        
+        except asyncio.TimeoutError as e:
+            logger.error(f"Gemini request timed out after {timeout or self.timeout:g}s")
+            raise ModelUnavailableError(TIMEOUT_MESSAGE) from e
+            
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            raise ModelUnavailableError(f"I apologize, but I encountered an error: {str(e)}") from e
+        
+        # Only real answers are cached; errors are retried next time
+        if self.cache is not None:
+            self.cache.put(self.model_name, full_prompt, text, self.temperature)
+        return text
+    
+    async def _on_request_loop(self, coro):
+        """Await a coroutine on the request loop, whichever loop the caller runs on."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop_thread.loop:
+            return await coro
+        # Cancelling the caller's task cancels the request as well
+        return await asyncio.wrap_future(self._loop_thread.submit(coro))
+    
+    async def agenerate_response(self, prompt: str, context: Optional[str] = None,
+                                 timeout: Optional[float] = None, deadline: Optional[float] = None,
+                                 sections: Optional[List[PromptSection]] = None) -> str:
+        """
+        Generate a response using Gemini API without blocking the event loop.
+        
+        Can be awaited from any event loop. Cancelling the awaiting task
+        cancels the request. Repeated prompts are answered from the cache.
+        
+        Args:
+            prompt: The user's question or prompt
+            context: Additional context (e.g., data summary)
+            timeout: Seconds before an attempt is cancelled. Defaults to the client timeout.
+            deadline: Seconds for the whole call including retries. Defaults to the client deadline.
+            sections: Context embedded in the prompt that may be shortened, least
+                important first, when the prompt is over its token budget
+            
+        Returns:
+            Generated response from Gemini
+        
+        Raises:
+            ModelUnavailableError: No answer could be had; its message is for the user
+        """
+        full_prompt, truncated, release = self._prepare(prompt, context, sections)
+        if full_prompt is None:
+            raise ModelUnavailableError(BUDGET_EXHAUSTED_MESSAGE)
+        try:
+            cached = self._cached(full_prompt, truncated)
+            if cached is not None:
+                return cached
+            return await self._agenerate(full_prompt, timeout, deadline, truncated)
+        finally:
+            release()
+    
+    async def agenerate_batch(self, prompts: List[str], context: Optional[str] = None,
+                              timeout: Optional[float] = None) -> List[str]:
+        """
+        Generate responses to several prompts concurrently.
+        
+        At most max_concurrency requests are in flight; cancelling the batch
+        cancels every request in it.
+        
+        Args:
+            prompts: Prompts to answer
+            context: Additional context shared by all prompts
+            timeout: Seconds before each request is cancelled
+            
+        Returns:
+            Responses in the order of the prompts
+        """
+        return list(await asyncio.gather(*(self.agenerate_response(prompt, context, timeout)
+                                           for prompt in prompts)))
+    
+    async def astream_response(self, prompt: str, context: Optional[str] = None,
+                               timeout: Optional[float] = None,
+                               sections: Optional[List[PromptSection]] = None) -> AsyncIterator[str]:
+        """
+        Stream a response chunk by chunk as the model produces it.
+        
+        Cached responses arrive as a single chunk. Failures raise
+        ModelUnavailableError, like generate_response, possibly after some
+        chunks were yielded.
+        
+        Args:
+            prompt: The user's question or prompt
+            context: Additional context (e.g., data summary)
+            timeout: Seconds to wait for the first and each following chunk
+            sections: Context embedded in the prompt that may be shortened, least
+                important first, when the prompt is over its token budget
+            
+        Yields:
+            Text chunks of the response
+        
+        Raises:
+            ModelUnavailableError: No answer could be had; its message is for the user
+        """
+        full_prompt, truncated, release = self._prepare(prompt, context, sections)
+        if full_prompt is None:
+            raise ModelUnavailableError(BUDGET_EXHAUSTED_MESSAGE)
+        try:
+            cached = self._cached(full_prompt, truncated)
+            if cached is not None:
+                yield cached
+                return
+            
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._loop_thread.loop:
+                async for text in self._astream(full_prompt, timeout, truncated):
+                    yield text
+                return
+            
+            # Relay chunks produced on the request loop to the caller's loop
+            chunks: asyncio.Queue = asyncio.Queue()
+            
+            async def relay():
+                try:
+                    async for text in self._astream(full_prompt, timeout, truncated):
+                        running.call_soon_threadsafe(chunks.put_nowait, text)
+                except ModelUnavailableError as e:
+                    # Raised again on the caller's side of the queue
+                    running.call_soon_threadsafe(chunks.put_nowait, e)
+                finally:
+                    running.call_soon_threadsafe(chunks.put_nowait, _END_OF_STREAM)
+            
+            future = self._loop_thread.submit(relay())
+            try:
+                while True:
+                    text = await chunks.get()
+                    if text is _END_OF_STREAM:
+                        break
+                    if isinstance(text, ModelUnavailableError):
+                        raise text
+                    yield text
+            finally:
+                # Stops the request if the caller stopped reading or was cancelled
+                future.cancel()
+        finally:
+            release()
+    
+    def stream_response(self, prompt: str, context: Optional[str] = None,
+                        timeout: Optional[float] = None,
+                        sections: Optional[List[PromptSection]] = None) -> Iterator[str]:
+        """
+        Stream a response chunk by chunk, blocking between chunks.
+        
+        Closing the iterator early cancels the request.
+        
+        Args:
+            prompt: The user's question or prompt
+            context: Additional context (e.g., data summary)
+            timeout: Seconds to wait for the first and each following chunk
+            sections: Context embedded in the prompt that may be shortened, least
+                important first, when the prompt is over its token budget
+            
+        Yields:
+            Text chunks of the response
+        
+        Raises:
+            ModelUnavailableError: No answer could be had; its message is for the user
+        """
+        full_prompt, truncated, release = self._prepare(prompt, context, sections)
+        if full_prompt is None:
+            raise ModelUnavailableError(BUDGET_EXHAUSTED_MESSAGE)
+        try:
+            cached = self._cached(full_prompt, truncated)
+            if cached is not None:
+                yield cached
+                return
+            
+            chunks: queue.Queue = queue.Queue()
+            
+            async def relay():
+                try:
+                    async for text in self._astream(full_prompt, timeout, truncated):
+                        chunks.put(text)
+                except ModelUnavailableError as e:
+                    # Raised again on the caller's side of the queue
+                    chunks.put(e)
+                finally:
+                    chunks.put(_END_OF_STREAM)
+            
+            future = self._loop_thread.submit(relay())
+            with self._pending_lock:
+                self._pending.add(future)
+            try:
+                while True:
+                    text = chunks.get()
+                    if text is _END_OF_STREAM:
+                        break
+                    if isinstance(text, ModelUnavailableError):
+                        raise text
+                    yield text
+                if future.cancelled():
+                    yield "The request was cancelled."
+            finally:
+                future.cancel()
+                with self._pending_lock:
+                    self._pending.discard(future)
+        finally:
+            release()
+    
+    def _run(self, coro):
+        """Run a coroutine on the request loop and wait for its result."""
+        future = self._loop_thread.submit(coro)
+        with self._pending_lock:
+            self._pending.add(future)
+        try:
+            return future.result()
+        finally:
+            with self._pending_lock:
+                self._pending.discard(future)
+    
+    def generate_response(self, prompt: str, context: Optional[str] = None,
+                          timeout: Optional[float] = None, deadline: Optional[float] = None,
+                          sections: Optional[List[PromptSection]] = None) -> str:
         """
         Generate a response using Gemini API.
         
+        Blocking wrapper around agenerate_response, so requests from several
+        threads share the connection, the concurrency limit and the rate
+        limits. Transient failures such as rate limiting are retried with
+        backoff until the deadline. Cache hits return without leaving the
+        calling thread.
+        
         Args:
             prompt: The user's question or prompt
             context: Additional context (e.g., data summary)
+            timeout: Seconds before an attempt is cancelled. Defaults to the client timeout.
+            deadline: Seconds for the whole call including retries. Defaults to the client deadline.
+            sections: Context embedded in the prompt that may be shortened, least
+                important first, when the prompt is over its token budget
             
         Returns:
             Generated response from Gemini
+        
+        Raises:
+            ModelUnavailableError: No answer could be had; its message is for the user
         """
+        full_prompt, truncated, release = self._prepare(prompt, context, sections)
+        if full_prompt is None:
+            raise ModelUnavailableError(BUDGET_EXHAUSTED_MESSAGE)
         try:
-            # Combine prompt with context if provided
-            full_prompt = prompt
-            if context:
-                full_prompt = f"Context: {context}\n\nQuestion: {prompt}"
+            cached = self._cached(full_prompt, truncated)
+            if cached is not None:
+                return cached
+            return self._run(self._agenerate(full_prompt, timeout, deadline, truncated))
+        except concurrent.futures.CancelledError:
+            logger.info("Gemini request cancelled")
+            return "The request was cancelled."
+        finally:
+            release()
+    
+    def generate_batch(self, prompts: List[str], context: Optional[str] = None,
+                       timeout: Optional[float] = None) -> List[str]:
+        """
+        Generate responses to several prompts concurrently, blocking until all finish.
+        
+        Args:
+            prompts: Prompts to answer
+            context: Additional context shared by all prompts
+            timeout: Seconds before each request is cancelled
             
-            # Generate response
-            response = self.model.generate_content(full_prompt)
-            return response.text
+        Returns:
+            Responses in the order of the prompts
+        """
+        try:
+            return self._run(self.agenerate_batch(prompts, context, timeout))
+        except concurrent.futures.CancelledError:
+            logger.info("Gemini batch cancelled")
+            return ["The request was cancelled."] * len(prompts)
+    
+    def cancel_pending(self) -> int:
+        """
+        Cancel every blocking request in progress, e.g. when the user stops a question.
+        
+        Returns:
+            Number of requests cancelled
+        """
+        with self._pending_lock:
+            pending = list(self._pending)
+        cancelled = sum(1 for future in pending if future.cancel())
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} Gemini requests")
+        return cancelled
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get response cache statistics.
+        
+        Returns:
+            Dictionary of cache counters, or {'enabled': False} without a cache
+        """
+        if self.cache is None:
+            return {'enabled': False}
+        return dict(self.cache.stats(), enabled=True)
+    
+    def begin_question(self, budget: Optional[int] = None) -> TokenLedger:
+        """
+        Start accounting the calls made to answer one question against its token budget.
+        
+        Prompts are shortened to what is left of the budget, and calls are
+        skipped once it is used up.
+        
+        Args:
+            budget: Tokens in and out allowed. Defaults to the client's question_token_budget.
             
-        except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
-            return f"I apologize, but I encountered an error: {str(e)}"
+        Returns:
+            The question's ledger
+        """
+        self._question = self._new_ledger(budget or self.question_token_budget)
+        return self._question
+    
+    def end_question(self) -> Dict[str, Any]:
+        """
+        Stop accounting the current question.
+        
+        Returns:
+            The question's token usage and cost, per call and in total
+        """
+        question, self._question = self._question, None
+        return question.summary() if question is not None else {}
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """
+        Get the tokens and cost of every call made by this client.
+        
+        Returns:
+            Dictionary of token totals and cost
+        """
+        return self.usage.summary()
+    
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """
+        Get request scheduling metrics: queue wait, retries, throttling and the circuit state.
+        
+        Returns:
+            Dictionary of scheduler counters
+        """
+        return self.scheduler.stats()
     
     def analyze_data(self, data_summary: str, question: str) -> str:
         """
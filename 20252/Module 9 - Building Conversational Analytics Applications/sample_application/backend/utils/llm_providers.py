@@ -0,0 +1,312 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Language model backends for the conversational analytics application.
+GeminiClient talks to a provider rather than to the Gemini SDK directly, so
+the model can be swapped by configuration. Besides Gemini there is a local
+stand-in that answers from templates with configurable latency and token
+counts, so the whole pipeline can be benchmarked and load-tested without
+network access.
+"""
+
+import os
+import re
+import random
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, AsyncIterator, List, Tuple
+import logging
+
+from backend.utils.request_scheduler import estimate_tokens
+
+try:
+    import google.generativeai as genai
+except ImportError:  # Only needed for the Gemini provider
+    genai = None
+
+try:
+    from langchain_core.language_models.chat_models import SimpleChatModel
+except ImportError:  # Only needed to give the CrewAI agents the local stand-in
+    SimpleChatModel = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMResponse:
+    """Text generated by a provider, or one chunk of it, with token usage when known."""
+
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+    @property
+    def total_tokens(self) -> Optional[int]:
+        """Prompt and completion tokens, or None if the provider did not report them."""
+        if self.prompt_tokens is None or self.completion_tokens is None:
+            return None
+        return self.prompt_tokens + self.completion_tokens
+
+
+class LLMProvider:
+    """Interface of a language model backend."""
+
+    name = 'base'
+    model_name = 'base'
+    api_key: Optional[str] = None
+    # Prices of a million tokens, for cost reporting
+    input_cost_per_million = 0.0
+    output_cost_per_million = 0.0
+
+    async def generate(self, prompt: str, temperature: Optional[float] = None) -> LLMResponse:
+        """
+        Generate a complete response.
+
+        Args:
+            prompt: Full prompt text
+            temperature: Sampling temperature, or None for the model default
+
+        Returns:
+            LLMResponse with the text and token usage
+        """
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, temperature: Optional[float] = None) -> AsyncIterator[LLMResponse]:
+        """
+        Generate a response chunk by chunk.
+
+        The request is sent when the first chunk is awaited. Token usage, if
+        known, is carried by the last chunk.
+
+        Args:
+            prompt: Full prompt text
+            temperature: Sampling temperature, or None for the model default
+
+        Yields:
+            LLMResponse chunks
+        """
+        raise NotImplementedError
+        yield
+
+    def chat_model(self, temperature: float = 0.1) -> Any:
+        """
+        Get a LangChain chat model for the CrewAI agents, if the provider has one.
+
+        Args:
+            temperature: Sampling temperature
+
+        Returns:
+            Chat model, or None
+        """
+        return None
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through the google-generativeai SDK."""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = 'gemini-pro'):
+        """
+        Initialize the Gemini provider.
+
+        Args:
+            api_key: Google Gemini API key. If None, will try to get from environment.
+            model_name: Gemini model to use
+        """
+        if genai is None:
+            raise ImportError("google-generativeai is required for the Gemini provider")
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+
+        # Configure the API
+        genai.configure(api_key=self.api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        # USD list prices of gemini-pro; set both variables for other models
+        self.input_cost_per_million = float(os.getenv('GEMINI_INPUT_COST_PER_MILLION', '0.5'))
+        self.output_cost_per_million = float(os.getenv('GEMINI_OUTPUT_COST_PER_MILLION', '1.5'))
+
+    @staticmethod
+    def _generation_config(temperature: Optional[float]) -> Optional[Dict[str, Any]]:
+        if temperature is None:
+            return None
+        return {'temperature': temperature}
+
+    @staticmethod
+    def _usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+        """Get (prompt, completion) token counts from a response's usage metadata."""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None)
+        completion_tokens = getattr(usage, 'candidates_token_count', None)
+        if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+            return None, None
+        return prompt_tokens, completion_tokens
+
+    async def generate(self, prompt: str, temperature: Optional[float] = None) -> LLMResponse:
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._generation_config(temperature))
+        return LLMResponse(response.text, *self._usage(response))
+
+    async def stream(self, prompt: str, temperature: Optional[float] = None) -> AsyncIterator[LLMResponse]:
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._generation_config(temperature), stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield LLMResponse(chunk.text)
+        # Usage is reported on the stream once it has finished
+        prompt_tokens, completion_tokens = self._usage(response)
+        if prompt_tokens is not None:
+            yield LLMResponse('', prompt_tokens, completion_tokens)
+
+    def chat_model(self, temperature: float = 0.1) -> Any:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=self.model_name, google_api_key=self.api_key,
+                                      temperature=temperature)
+
+
+# Templates of the local stand-in, matched against the prompt in order. Each
+# produces a reply in the shape the agents parse: a JSON cleaning plan, a
+# SQL query, Python code or prose.
+LOCAL_TEMPLATES: List[Tuple[str, str]] = [
+    (r'cleaning plan', '```json\n{"dedupe": {"keys": null, "keep": "first"}, "coerce": {}, '
+                       '"outliers": {}, "impute": {}}\n```\n\nRemove exact duplicate rows; '
+                       'the column types and values look usable as loaded.\n\n{filler}'),
+    (r'SQL query', '```sql\nSELECT COUNT(*) AS "rows" FROM df\n```'),
+    (r'Python code|Python script|visualization code',
+     '```python\nresult = df.describe(include="all")\nprint(result)\n```'),
+    (r'', 'Local stand-in response {digest}. {filler}'),
+]
+
+_FILLER_WORDS = ('the', 'data', 'shows', 'a', 'steady', 'trend', 'in', 'sales', 'with', 'higher',
+                 'values', 'for', 'recent', 'periods', 'and', 'few', 'outliers', 'across', 'regions')
+
+
+if SimpleChatModel is not None:
+    class LocalChatModel(SimpleChatModel):
+        """LangChain chat model that answers from the local stand-in's templates."""
+
+        provider: Any = None
+
+        @property
+        def _llm_type(self) -> str:
+            return 'local-stand-in'
+
+        def _call(self, messages: List[Any], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> str:
+            prompt = '\n'.join(str(message.content) for message in messages)
+            return self.provider.reply(prompt)
+else:
+    LocalChatModel = None
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline stand-in for benchmarking.
+
+    Replies are chosen from templates by the prompt's content and padded with
+    filler text seeded by the prompt, so the same prompt always gets the same
+    reply. Latency is simulated as a time to first token plus a generation
+    rate.
+    """
+
+    name = 'local'
+    model_name = 'local-stand-in'
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 200.0, response_tokens: int = 200,
+                 templates: Optional[List[Tuple[str, str]]] = None):
+        """
+        Initialize the stand-in.
+
+        Args:
+            latency: Seconds before the first token
+            tokens_per_second: Generation rate after the first token; 0 makes replies instant
+            response_tokens: Length of the filler text in words
+            templates: (regex, reply) pairs tried in order; replies may use {digest} and {filler}
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.templates = [(re.compile(pattern, re.IGNORECASE), reply)
+                          for pattern, reply in (templates or LOCAL_TEMPLATES)]
+
+    @classmethod
+    def from_env(cls) -> 'LocalProvider':
+        """
+        Build a stand-in configured by LOCAL_LLM_LATENCY_MS,
+        LOCAL_LLM_TOKENS_PER_SECOND and LOCAL_LLM_RESPONSE_TOKENS.
+        """
+        return cls(latency=float(os.getenv('LOCAL_LLM_LATENCY_MS', '200')) / 1000,
+                   tokens_per_second=float(os.getenv('LOCAL_LLM_TOKENS_PER_SECOND', '200')),
+                   response_tokens=int(os.getenv('LOCAL_LLM_RESPONSE_TOKENS', '200')))
+
+    def reply(self, prompt: str) -> str:
+        """
+        Get the stand-in's reply to a prompt.
+
+        Args:
+            prompt: Full prompt text
+
+        Returns:
+            Reply text
+        """
+        digest = hashlib.blake2b(prompt.encode('utf-8'), digest_size=8).hexdigest()
+        rng = random.Random(digest)
+        filler = ' '.join(rng.choice(_FILLER_WORDS) for _ in range(self.response_tokens)).capitalize() + '.'
+        for pattern, template in self.templates:
+            if pattern.search(prompt):
+                return template.replace('{digest}', digest).replace('{filler}', filler)
+        return filler
+
+    def _generation_seconds(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    async def generate(self, prompt: str, temperature: Optional[float] = None) -> LLMResponse:
+        text = self.reply(prompt)
+        completion_tokens = estimate_tokens(text)
+        await asyncio.sleep(self.latency + self._generation_seconds(completion_tokens))
+        return LLMResponse(text, estimate_tokens(prompt), completion_tokens)
+
+    def chat_model(self, temperature: float = 0.1) -> Any:
+        # Without a model CrewAI would fall back to its default OpenAI one
+        if LocalChatModel is None:
+            raise ImportError("langchain-core is required to run the agents on the local stand-in")
+        return LocalChatModel(provider=self)
+
+    async def stream(self, prompt: str, temperature: Optional[float] = None) -> AsyncIterator[LLMResponse]:
+        text = self.reply(prompt)
+        await asyncio.sleep(self.latency)
+        # Chunks of about 20 tokens, like the Gemini stream
+        words = re.findall(r'\S+\s*', text)
+        for start in range(0, len(words), 16):
+            chunk = ''.join(words[start:start + 16])
+            if start:
+                await asyncio.sleep(self._generation_seconds(estimate_tokens(chunk)))
+            yield LLMResponse(chunk)
+        yield LLMResponse('', estimate_tokens(prompt), estimate_tokens(text))
+
+
+def create_provider(name: Optional[str] = None, api_key: Optional[str] = None) -> LLMProvider:
+    """
+    Create a language model provider.
+
+    Args:
+        name: 'gemini' or 'local'. Defaults to the LLM_PROVIDER environment
+            variable or 'gemini'.
+        api_key: API key for providers that need one
+
+    Returns:
+        LLMProvider
+    """
+    name = (name or os.getenv('LLM_PROVIDER', 'gemini')).lower()
+    if name == 'gemini':
+        return GeminiProvider(api_key, os.getenv('GEMINI_MODEL', 'gemini-pro'))
+    if name == 'local':
+        logger.info("Using the local stand-in language model")
+        return LocalProvider.from_env()
+    raise ValueError(f"Unknown LLM provider '{name}', expected 'gemini' or 'local'")
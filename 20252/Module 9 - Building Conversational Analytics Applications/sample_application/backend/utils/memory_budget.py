@@ -0,0 +1,322 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Process-wide memory budget for the conversational analytics application.
+Components register what they hold (dataset buffers, profiles, rebuildable
+caches and intermediates) with a callback reporting their size from bookkeeping
+they already keep, so usage is known without deep scans. When the total goes
+over the cap, caches are evicted first, then intermediates, then cold tables
+and columns are spilled to disk and memory-mapped back.
+"""
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+import threading
+import weakref
+from dataclasses import dataclass
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, List, Optional, Callable
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Eviction order: cheapest to rebuild first
+CATEGORIES = ('cache', 'intermediate', 'dataset')
+
+# Values sampled to estimate the size of Python objects in a column
+OBJECT_SAMPLE = 1000
+
+
+def _default_budget() -> Optional[int]:
+    """The process may use up to three quarters of physical memory."""
+    budget_mb = os.getenv('MEMORY_BUDGET_MB')
+    if budget_mb:
+        return int(budget_mb) * 1024 * 1024
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') * 3 // 4
+    except (AttributeError, ValueError, OSError):  # Not available on Windows
+        return None
+
+
+def estimate_series_bytes(series: pd.Series, sample: int = OBJECT_SAMPLE) -> int:
+    """
+    Estimate the memory of a column without visiting every value.
+
+    Buffers of NumPy, Arrow and categorical columns are sized exactly; for
+    object columns the Python objects are sized on an evenly spaced sample.
+
+    Args:
+        series: Column to size
+        sample: Number of objects to size for object columns
+
+    Returns:
+        Estimated bytes, excluding the index
+    """
+    base = int(series.array.nbytes)
+    n = len(series)
+    if not pd.api.types.is_object_dtype(series) or n == 0:
+        return base
+
+    # The array holds pointers; add the objects they point to
+    step = max(1, n // sample)
+    sizes = [sys.getsizeof(value) for value in series.array[::step]]
+    return base + int(np.mean(sizes) * n)
+
+
+def estimate_frame_bytes(data: pd.DataFrame, sample: int = OBJECT_SAMPLE) -> int:
+    """
+    Estimate the memory of a DataFrame's columns without a deep scan.
+
+    Args:
+        data: DataFrame to size
+        sample: Number of objects to size per object column
+
+    Returns:
+        Estimated bytes, excluding the index
+    """
+    return sum(estimate_series_bytes(data[col], sample) for col in data.columns)
+
+
+def estimate_object_bytes(obj: Any) -> int:
+    """Estimate the memory of a tracked object."""
+    if isinstance(obj, pd.DataFrame):
+        return estimate_frame_bytes(obj) + int(obj.index.nbytes)
+    if isinstance(obj, pd.Series):
+        return estimate_series_bytes(obj) + int(obj.index.nbytes)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if hasattr(obj, 'nbytes'):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_object_bytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_object_bytes(value) for value in obj)
+    return sys.getsizeof(obj)
+
+
+def can_memory_map(series: pd.Series) -> bool:
+    """Whether a column is a plain NumPy buffer that can live in a mapped file."""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM'
+
+
+def is_memory_mapped(series: pd.Series) -> bool:
+    """Whether a column's buffer lives in a memory-mapped file."""
+    if not isinstance(series.dtype, np.dtype):
+        return False
+    values = series.to_numpy()
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = getattr(values, 'base', None)
+    return False
+
+
+def memory_map_column(series: pd.Series, directory: str) -> Tuple[pd.Series, str]:
+    """
+    Move a column's buffer to a file and map it back copy-on-write.
+
+    The values stay readable and writable (writes stay private to the
+    process); clean pages can be dropped by the OS under memory pressure.
+
+    Args:
+        series: Column backed by a NumPy array
+        directory: Directory for the mapped file
+
+    Returns:
+        Tuple of (mapped column, file path)
+    """
+    fd, path = tempfile.mkstemp(suffix='.npy', dir=directory)
+    os.close(fd)
+    np.save(path, series.to_numpy())
+    mapped = np.load(path, mmap_mode='c')
+    try:
+        # The mapping keeps the file alive; unlinking now means no cleanup later
+        os.remove(path)
+    except OSError:  # Windows cannot remove mapped files; the directory is removed at exit
+        pass
+    # A plain ndarray view keeps the memmap subclass out of results computed from the column
+    values = mapped.view(np.ndarray)
+    return pd.Series(values, index=series.index, name=series.name, copy=False), path
+
+
+def _ref(callback: Callable) -> Callable[[], Optional[Callable]]:
+    """Hold bound methods weakly so registration does not keep owners alive."""
+    if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+        return weakref.WeakMethod(callback)
+    return lambda: callback
+
+
+@dataclass
+class _Consumer:
+    """Something that holds memory and can report and release it."""
+
+    name: str
+    category: str
+    usage: Callable[[], Optional[Callable]]
+    release: Optional[Callable[[], Optional[Callable]]]
+    priority: int = 0  # lower is released first within a category
+
+
+class MemoryManager:
+    """Tracks memory held by registered components and enforces a cap."""
+
+    def __init__(self, budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        """
+        Initialize the memory manager.
+
+        Args:
+            budget: Maximum bytes for all registered components. Defaults to the
+                MEMORY_BUDGET_MB environment variable or 3/4 of physical memory.
+            spill_dir: Directory for memory-mapped column files
+        """
+        self.budget = budget or _default_budget()
+        self._spill_dir = spill_dir
+        self._consumers: Dict[str, _Consumer] = {}
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.freed_bytes = 0
+        self.over_budget = 0
+
+    @property
+    def spill_dir(self) -> str:
+        """Directory for memory-mapped files, created on first use."""
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='memory_spill_')
+            atexit.register(shutil.rmtree, self._spill_dir, True)
+        return self._spill_dir
+
+    def register(self, name: str, category: str, usage: Callable[[], int],
+                 release: Optional[Callable[[int], int]] = None, priority: int = 0):
+        """
+        Register a memory consumer.
+
+        Bound methods are held weakly; a consumer whose owner was garbage
+        collected is dropped automatically.
+
+        Args:
+            name: Unique consumer name
+            category: 'cache', 'intermediate' or 'dataset'
+            usage: Returns the bytes currently held; must be cheap
+            release: Called with the bytes still to free; returns bytes freed
+            priority: Order of release within the category, lowest first
+        """
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown memory category '{category}', expected one of {CATEGORIES}")
+        with self._lock:
+            self._consumers[name] = _Consumer(name, category, _ref(usage),
+                                              _ref(release) if release else None, priority)
+
+    def unregister(self, name: str):
+        """Stop tracking a consumer."""
+        with self._lock:
+            self._consumers.pop(name, None)
+
+    def _live_consumers(self) -> List[Tuple[_Consumer, int]]:
+        """Get (consumer, bytes) for every consumer whose owner still exists."""
+        live = []
+        with self._lock:
+            for name, consumer in list(self._consumers.items()):
+                usage = consumer.usage()
+                used = usage() if usage is not None else None
+                if used is None:
+                    del self._consumers[name]
+                    continue
+                live.append((consumer, int(used)))
+        return live
+
+    def usage(self) -> Dict[str, int]:
+        """
+        Get the bytes held per category and in total.
+
+        Returns:
+            Dictionary with one entry per category plus 'total'
+        """
+        totals = {category: 0 for category in CATEGORIES}
+        for consumer, used in self._live_consumers():
+            totals[consumer.category] += used
+        totals['total'] = sum(totals[category] for category in CATEGORIES)
+        return totals
+
+    def enforce(self, reserve: int = 0) -> int:
+        """
+        Release memory until usage plus a reservation fits the budget.
+
+        Args:
+            reserve: Bytes about to be allocated, such as a working copy
+
+        Returns:
+            Bytes freed
+        """
+        if self.budget is None:
+            return 0
+
+        with self._lock:
+            live = self._live_consumers()
+            excess = sum(used for _, used in live) + reserve - self.budget
+            if excess <= 0:
+                return 0
+
+            freed = 0
+            for category in CATEGORIES:
+                # Within a category: by priority, then the biggest holders first
+                candidates = sorted((item for item in live if item[0].category == category and item[0].release),
+                                    key=lambda item: (item[0].priority, -item[1]))
+                for consumer, used in candidates:
+                    if freed >= excess:
+                        break
+                    release = consumer.release()
+                    if release is None:
+                        continue
+                    released = int(release(excess - freed))
+                    if released > 0:
+                        freed += released
+                        self.evictions += 1
+                        logger.info(f"Released {released / 1024 / 1024:.1f} MB from {consumer.name}")
+
+            self.freed_bytes += freed
+            if freed < excess:
+                self.over_budget += 1
+                logger.warning(f"Memory use is {(excess - freed) / 1024 / 1024:.1f} MB over the budget "
+                               f"after releasing everything that can be released")
+            return freed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the budget, current usage and eviction counters.
+
+        Returns:
+            Dictionary of statistics
+        """
+        live = self._live_consumers()
+        usage = {category: 0 for category in CATEGORIES}
+        for consumer, used in live:
+            usage[consumer.category] += used
+        return {
+            'budget_bytes': self.budget,
+            'usage_bytes': usage,
+            'total_bytes': sum(usage.values()),
+            'consumers': {consumer.name: used for consumer, used in live},
+            'evictions': self.evictions,
+            'freed_bytes': self.freed_bytes,
+            'over_budget': self.over_budget
+        }
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_memory_manager() -> MemoryManager:
+    """Get the process-wide memory manager."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = MemoryManager()
+        return _default_manager
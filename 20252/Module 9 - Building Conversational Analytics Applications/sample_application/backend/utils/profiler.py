@@ -0,0 +1,864 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Vectorized data profiling kernel for the conversational analytics application.
+Computes null counts, summary statistics, quantiles, IQR outliers, cardinality
+and numeric coercibility for every column in one pass over NumPy blocks, and
+keeps enough state to update the profile incrementally after cleaning.
+Wide frames can be profiled on a process pool over shared-memory blocks.
+"""
+
+import sys
+import copy
+import atexit
+import threading
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from dataclasses import dataclass, field, replace
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Optional
+import logging
+
+from backend.utils.memory_budget import estimate_frame_bytes
+from backend.utils.row_index import RowHashIndex
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Target size of the float64 blocks numeric columns are profiled in
+BLOCK_BYTES = 64 * 1024 * 1024
+
+# Number of most frequent values kept for text columns
+TOP_VALUES = 5
+
+# Frames with fewer numeric cells than this are always profiled serially
+PARALLEL_MIN_CELLS = 4_000_000
+
+# Text columns with at least this many distinct values are checked for
+# numeric coercibility on the pool
+PARALLEL_MIN_DISTINCT = 50_000
+
+# Numeric columns with more values than this keep a t-digest instead of their
+# sorted values, which bounds the profile's memory and the cost of updates
+ORDER_STATE_MAX_VALUES = 250_000
+
+# Compression of those digests, about 0.5% rank error
+DIGEST_COMPRESSION = 200
+
+
+@dataclass
+class ColumnProfile:
+    """Profile of a single column."""
+
+    name: str
+    dtype: str
+    kind: str  # 'numeric', 'text', 'datetime', 'bool' or 'other'
+    count: int
+    missing: int
+    unique: Optional[int] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Any = None
+    q25: Optional[float] = None
+    median: Optional[float] = None
+    q75: Optional[float] = None
+    max: Any = None
+    outliers: int = 0
+    numeric_coercible: bool = False
+    top_values: Dict[Any, int] = field(default_factory=dict)
+
+    # Incremental state: sorted non-null values of numeric columns (or a
+    # t-digest of large ones), the sum of squared deviations behind std, and
+    # value counts of all other columns
+    sorted_values: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    digest: Any = field(default=None, repr=False, compare=False)
+    m2: float = field(default=0.0, repr=False, compare=False)
+    value_counts: Optional[pd.Series] = field(default=None, repr=False, compare=False)
+
+    # Set when values were removed from a digest, which cannot forget them
+    order_stale: bool = field(default=False, repr=False, compare=False)
+
+    # Row positions holding the minimum and maximum of numeric columns, None when unknown
+    min_row: Optional[int] = field(default=None, repr=False, compare=False)
+    max_row: Optional[int] = field(default=None, repr=False, compare=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the incremental state."""
+        total = 0
+        if self.sorted_values is not None:
+            total += self.sorted_values.nbytes
+        if self.digest is not None:
+            total += self.digest.means.nbytes + self.digest.weights.nbytes
+        if self.value_counts is not None:
+            total += int(self.value_counts.memory_usage(index=True))
+        return total
+
+    def release_order_state(self) -> int:
+        """
+        Replace the sorted values by a t-digest of them.
+
+        Quartiles and outlier counts become approximate from then on.
+
+        Returns:
+            Bytes freed
+        """
+        if self.sorted_values is None:
+            return 0
+        before = self.nbytes
+        self.digest = _new_digest(self.sorted_values)
+        self.sorted_values = None
+        return before - self.nbytes
+
+    def copy(self) -> 'ColumnProfile':
+        """Copy the profile so incremental updates to the copy leave this one as it is."""
+        # Sorted values and value counts are replaced on update, never written in place
+        return replace(self, top_values=dict(self.top_values), digest=copy.copy(self.digest))
+
+    def describe(self) -> Dict[str, float]:
+        """Get the statistics in the same layout as DataFrame.describe()."""
+        stats = {
+            'count': float(self.count),
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            '25%': self.q25,
+            '50%': self.median,
+            '75%': self.q75,
+            'max': self.max
+        }
+        # describe() reports undefined statistics as NaN
+        return {key: np.nan if value is None else value for key, value in stats.items()}
+
+    def remove_values(self, values: pd.Series):
+        """
+        Update the profile for values that were removed from the column.
+
+        Args:
+            values: The removed values, including missing ones
+        """
+        removed_missing = int(values.isna().sum())
+        self.missing -= removed_missing
+
+        if self.kind == 'numeric':
+            removed = values.dropna().to_numpy(dtype=np.float64)
+            self._remove_moments(removed)
+            if self.sorted_values is not None and len(removed) > 0:
+                self.sorted_values = _delete_sorted(self.sorted_values, removed)
+                self._refresh_order_stats()
+            elif self.digest is not None and len(removed) > 0:
+                # Rebuilt from the data by DataProfile.refresh_rows
+                self.order_stale = True
+        else:
+            self.count -= len(values) - removed_missing
+            if self.value_counts is not None:
+                removed_counts = values.value_counts(dropna=True)
+                self.value_counts = self.value_counts.sub(removed_counts, fill_value=0)
+                self.value_counts = self.value_counts[self.value_counts > 0]
+                self._refresh_counts()
+
+    def add_values(self, values: pd.Series):
+        """
+        Update the profile for values appended to the column.
+
+        Args:
+            values: The appended values, including missing ones
+        """
+        offset = self.count + self.missing
+        added_missing = int(values.isna().sum())
+        self.missing += added_missing
+
+        if self.kind == 'numeric':
+            appended = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            added = np.sort(appended[~np.isnan(appended)])
+            if len(added) == 0:
+                return
+            # Compared with the extremes before the batch is merged
+            low, high = int(np.nanargmin(appended)), int(np.nanargmax(appended))
+            if self.min is None or appended[low] < self.min:
+                self.min_row = offset + low
+            if self.max is None or appended[high] > self.max:
+                self.max_row = offset + high
+            # Merge the added batch's moments (Chan et al.)
+            total = self.count + len(added)
+            added_mean = float(added.mean())
+            added_m2 = float(((added - added_mean) ** 2).sum())
+            if self.count == 0:
+                self.mean, self.m2 = added_mean, added_m2
+            else:
+                delta = added_mean - self.mean
+                self.mean += delta * len(added) / total
+                self.m2 += added_m2 + delta * delta * self.count * len(added) / total
+            self.count = total
+            self._refresh_std()
+            self._add_order_values(added)
+        else:
+            self.count += len(values) - added_missing
+            if self.value_counts is not None:
+                added_counts = values.value_counts(dropna=True)
+                self.value_counts = self.value_counts.add(added_counts, fill_value=0)
+                self._refresh_counts()
+
+    def fill_missing(self, value: Any, count: int, dtype: str):
+        """
+        Update the profile after missing cells were filled with one value.
+
+        Args:
+            value: The fill value
+            count: Number of cells filled
+            dtype: Column dtype after filling
+        """
+        if count == 0:
+            return
+
+        self.missing -= count
+        self.dtype = dtype
+
+        if self.kind == 'numeric':
+            # The filled rows are not known here; DataProfile.refresh_rows finds them
+            if self.min is None or value < self.min:
+                self.min_row = None
+            if self.max is None or value > self.max:
+                self.max_row = None
+            self._add_moments(float(value), count)
+            self._add_order_values(np.full(count, value, dtype=np.float64))
+        else:
+            self.count += count
+            if self.value_counts is not None:
+                # Build the addition as a Series so categorical indexes align
+                self.value_counts = self.value_counts.add(pd.Series({value: count}), fill_value=0)
+                self._refresh_counts()
+
+    def locate_extremes(self, values: pd.Series):
+        """
+        Find the rows holding the minimum and maximum in one pass over the column.
+
+        Args:
+            values: The whole column, with at least one non-missing value
+        """
+        column = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        self.min_row, self.max_row = int(np.nanargmin(column)), int(np.nanargmax(column))
+
+    def _add_order_values(self, added: np.ndarray):
+        """Merge sorted added values into the sorted values or the digest."""
+        if self.sorted_values is not None:
+            if len(self.sorted_values) + len(added) > ORDER_STATE_MAX_VALUES:
+                self.release_order_state()
+            else:
+                positions = np.searchsorted(self.sorted_values, added)
+                self.sorted_values = np.insert(self.sorted_values, positions, added)
+                self._refresh_order_stats()
+                return
+        if self.digest is not None:
+            self.digest.update(added)
+            self.min = float(added[0]) if self.min is None else min(self.min, float(added[0]))
+            self.max = float(added[-1]) if self.max is None else max(self.max, float(added[-1]))
+            self._refresh_digest_stats()
+
+    def _refresh_digest_stats(self):
+        """Estimate quartiles and outliers from the digest; min/max stay exact."""
+        self.q25 = self.digest.quantile(0.25, self.min, self.max)
+        self.median = self.digest.quantile(0.5, self.min, self.max)
+        self.q75 = self.digest.quantile(0.75, self.min, self.max)
+        if self.q25 is not None:
+            iqr = self.q75 - self.q25
+            outside = self.digest.cdf(self.q25 - 1.5 * iqr) + 1 - self.digest.cdf(self.q75 + 1.5 * iqr)
+            self.outliers = int(round(outside * self.count))
+
+    def _add_moments(self, value: float, count: int):
+        """Merge `count` copies of `value` into the running mean and variance."""
+        total = self.count + count
+        if self.count == 0:
+            self.mean, self.m2 = value, 0.0
+        else:
+            delta = value - self.mean
+            self.mean += delta * count / total
+            self.m2 += delta * delta * self.count * count / total
+        self.count = total
+        self._refresh_std()
+
+    def _remove_moments(self, removed: np.ndarray):
+        """Take removed values out of the running mean and variance."""
+        k = len(removed)
+        if k == 0:
+            return
+
+        remaining = self.count - k
+        if remaining <= 0:
+            self.count, self.mean, self.m2 = 0, None, 0.0
+        else:
+            removed_mean = float(removed.mean())
+            removed_m2 = float(((removed - removed_mean) ** 2).sum())
+            new_mean = (self.count * self.mean - k * removed_mean) / remaining
+            delta = removed_mean - new_mean
+            self.m2 = max(0.0, self.m2 - removed_m2 - delta * delta * remaining * k / self.count)
+            self.mean, self.count = new_mean, remaining
+        self._refresh_std()
+
+    def _refresh_std(self):
+        """Derive the sample standard deviation from the running state."""
+        self.std = float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None
+
+    def _refresh_order_stats(self):
+        """Recompute min/max, quartiles and outliers from the sorted values."""
+        stats = _order_stats(self.sorted_values)
+        self.min, self.q25, self.median = stats['min'], stats['q25'], stats['median']
+        self.q75, self.max, self.outliers = stats['q75'], stats['max'], stats['outliers']
+        self.unique = stats['unique']
+
+    def _refresh_counts(self, check_coercible: bool = True):
+        """Recompute cardinality-derived fields from the value counts."""
+        counts = self.value_counts[self.value_counts > 0].sort_values(ascending=False, kind='stable')
+        self.unique = len(counts)
+
+        if self.kind == 'text':
+            self.top_values = {k: int(v) for k, v in counts.head(TOP_VALUES).items()}
+            if check_coercible:
+                self.numeric_coercible = _is_numeric_coercible(counts.index)
+        elif self.kind == 'bool':
+            self.top_values = {k: int(v) for k, v in counts.items()}
+        elif self.kind == 'datetime' and len(counts) > 0:
+            self.min, self.max = counts.index.min(), counts.index.max()
+            self.top_values = {k: int(v) for k, v in counts.head(TOP_VALUES).items()}
+
+
+@dataclass
+class DataProfile:
+    """Profile of a whole dataset."""
+
+    rows: int
+    columns: Dict[str, ColumnProfile]
+    duplicate_rows: int
+    memory_usage: int  # estimated memory of the columns, excluding the index
+
+    # Row hash index, kept so duplicates can be found without rehashing
+    row_index: Optional[RowHashIndex] = field(default=None, repr=False, compare=False)
+
+    # True when the statistics come from streaming sketches rather than exact passes
+    approximate: bool = False
+
+    def column(self, name: str) -> Optional[ColumnProfile]:
+        """Get the profile of one column."""
+        return self.columns.get(name)
+
+    def columns_of_kind(self, kind: str) -> List[str]:
+        """Get the names of all columns of a given kind."""
+        return [name for name, col in self.columns.items() if col.kind == kind]
+
+    def missing_values(self) -> Dict[str, int]:
+        """Get the number of missing values per column."""
+        return {name: col.missing for name, col in self.columns.items()}
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the incremental state and the row hash index."""
+        total = sum(col.nbytes for col in self.columns.values())
+        if self.row_index is not None:
+            total += self.row_index.nbytes
+        return total
+
+    def copy(self) -> 'DataProfile':
+        """
+        Copy the profile and its incremental state, without profiling again.
+
+        Returns:
+            DataProfile that can be updated independently of this one
+        """
+        return replace(self, columns={name: col.copy() for name, col in self.columns.items()},
+                       row_index=self.row_index.copy() if self.row_index is not None else None)
+
+    def release_order_state(self) -> int:
+        """
+        Replace every column's sorted values by a t-digest.
+
+        Returns:
+            Bytes freed
+        """
+        return sum(col.release_order_state() for col in self.columns.values())
+
+    def numeric_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get describe()-style statistics for numeric columns."""
+        return {name: col.describe() for name, col in self.columns.items() if col.kind == 'numeric'}
+
+    def duplicated_mask(self, keep: str = 'first') -> np.ndarray:
+        """
+        Get a boolean mask of rows that repeat another row.
+
+        Args:
+            keep: 'first' or 'last' occurrence of each group to leave unmarked
+
+        Returns:
+            Boolean array aligned with the profiled rows
+        """
+        return self.row_index.duplicated_mask(keep=keep)
+
+    def append_rows(self, added: pd.DataFrame):
+        """
+        Update the profile after rows were appended.
+
+        Only the new rows are scanned and hashed.
+
+        Args:
+            added: The appended rows, already cast to the data's dtypes
+        """
+        for name, col in self.columns.items():
+            col.add_values(added[name])
+            col.dtype = str(added[name].dtype)
+
+        self.rows += len(added)
+        self.memory_usage += estimate_frame_bytes(added)
+        if self.row_index is not None:
+            self.row_index.append(added)
+            self.duplicate_rows = self.row_index.duplicate_count
+
+        logger.info(f"Profile updated for {len(added)} appended rows")
+
+    def remove_rows(self, removed: pd.DataFrame, keep_mask: np.ndarray):
+        """
+        Update the profile after rows were dropped.
+
+        Only the removed rows are scanned; the remaining rows are untouched.
+
+        Args:
+            removed: The rows that were dropped
+            keep_mask: Boolean mask over the previous rows, True for kept rows
+        """
+        for name, col in self.columns.items():
+            col.remove_values(removed[name])
+            # Kept rows move up by the number of removed rows before them;
+            # removed extremes are found again by refresh_rows
+            col.min_row = _kept_position(col.min_row, keep_mask)
+            col.max_row = _kept_position(col.max_row, keep_mask)
+
+        self.rows -= len(removed)
+        self.memory_usage -= estimate_frame_bytes(removed)
+        if self.row_index is not None:
+            self.row_index.remove(keep_mask)
+            self.duplicate_rows = self.row_index.duplicate_count
+
+        logger.info(f"Profile updated for {len(removed)} removed rows")
+
+    def fill_missing(self, column: str, value: Any, count: int, dtype: str):
+        """
+        Update the profile after missing cells in a column were filled.
+
+        Args:
+            column: Column name
+            value: The fill value
+            count: Number of cells filled
+            dtype: Column dtype after filling
+        """
+        col = self.columns[column]
+        if dtype == 'object':
+            # Each filled cell now holds a reference to the fill object
+            self.memory_usage += count * (sys.getsizeof(value) - sys.getsizeof(np.nan))
+        col.fill_missing(value, count, dtype)
+
+    def refresh_rows(self, data: pd.DataFrame, row_mask: np.ndarray):
+        """
+        Rehash rows whose values changed and recount duplicates.
+
+        Columns whose digest lost values are profiled again from the data, and
+        numeric columns that lost track of their extremes are searched for them.
+
+        Args:
+            data: The current DataFrame
+            row_mask: Boolean mask of the rows that changed
+        """
+        stale = [name for name, col in self.columns.items() if col.order_stale]
+        if stale:
+            self.columns.update(_profile_numeric_columns(data, stale))
+        for name, col in self.columns.items():
+            if col.kind == 'numeric' and col.count > 0 and (col.min_row is None or col.max_row is None):
+                col.locate_extremes(data[name])
+
+        if self.row_index is None or not row_mask.any():
+            return
+
+        positions = np.flatnonzero(row_mask)
+        self.row_index.update(positions, data.iloc[positions])
+        self.duplicate_rows = self.row_index.duplicate_count
+        logger.info(f"Profile rehashed {len(positions)} changed rows")
+
+
+def _kept_position(position: Optional[int], keep_mask: np.ndarray) -> Optional[int]:
+    """Map a row position to its position after removal, None if the row was removed."""
+    if position is None or not keep_mask[position]:
+        return None
+    return int(np.count_nonzero(keep_mask[:position]))
+
+
+def _column_kind(series: pd.Series) -> str:
+    """Classify a column the same way the processor groups columns."""
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series) or
+            isinstance(series.dtype, pd.CategoricalDtype)):
+        return 'text'
+    return 'other'
+
+
+def _quantiles(ordered: np.ndarray, counts: np.ndarray, qs: List[float]) -> List[np.ndarray]:
+    """
+    Linear-interpolated quantiles of sorted columns, matching pandas' default.
+
+    Args:
+        ordered: 2-D array sorted along axis 0 with NaNs at the end
+        counts: Number of non-NaN values per column
+        qs: Quantiles to compute
+
+    Returns:
+        One array of per-column values for each requested quantile
+    """
+    last = np.maximum(counts - 1, 0)
+    results = []
+    for q in qs:
+        pos = q * last
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.ceil(pos).astype(np.intp)
+        lo_vals = np.take_along_axis(ordered, lo[None, :], axis=0)[0]
+        hi_vals = np.take_along_axis(ordered, hi[None, :], axis=0)[0]
+        result = lo_vals + (hi_vals - lo_vals) * (pos - lo)
+        results.append(np.where(counts > 0, result, np.nan))
+    return results
+
+
+def _order_stats(sorted_values: np.ndarray) -> Dict[str, Any]:
+    """Compute min/max, quartiles and IQR outliers from one sorted column."""
+    n = len(sorted_values)
+    if n == 0:
+        return {'min': None, 'q25': None, 'median': None, 'q75': None, 'max': None, 'outliers': 0, 'unique': 0}
+
+    mn, q25, median, q75, mx = (
+        float(v[0]) for v in _quantiles(sorted_values[:, None], np.array([n]), [0.0, 0.25, 0.5, 0.75, 1.0])
+    )
+    iqr = q75 - q25
+    # Values are sorted, so outliers are a prefix and a suffix
+    below = np.searchsorted(sorted_values, q25 - 1.5 * iqr, side='left')
+    above = n - np.searchsorted(sorted_values, q75 + 1.5 * iqr, side='right')
+    unique = 1 + int(np.count_nonzero(sorted_values[1:] != sorted_values[:-1]))
+    return {'min': mn, 'q25': q25, 'median': median, 'q75': q75, 'max': mx,
+            'outliers': int(below + above), 'unique': unique}
+
+
+def _new_digest(values: np.ndarray):
+    """Build a t-digest of a column's non-null values."""
+    # Imported here because streaming_stats builds on this module
+    from backend.utils.streaming_stats import TDigest
+    digest = TDigest(DIGEST_COMPRESSION)
+    digest.update(values)
+    return digest
+
+
+def _delete_sorted(sorted_values: np.ndarray, removed: np.ndarray) -> np.ndarray:
+    """Delete one occurrence of each removed value from a sorted array."""
+    removed = np.sort(removed)
+    positions = np.searchsorted(sorted_values, removed, side='left')
+    # Repeated values map to consecutive slots of the same run
+    positions += np.arange(len(removed)) - np.searchsorted(removed, removed, side='left')
+    return np.delete(sorted_values, positions)
+
+
+def _profile_numeric_block(block: np.ndarray, in_place: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Compute statistics for a 2-D float block, one column per series.
+
+    A single sort along the row axis gives min, max and all quantiles; NaNs
+    sort to the end so each column's valid values are a prefix. With in_place
+    the block itself is sorted and returned as 'ordered'. The rows holding
+    each column's extremes are found before sorting.
+    """
+    valid = ~np.isnan(block)
+    counts = valid.sum(axis=0)
+
+    # Missing values can never be an extreme; all-missing columns get row 0
+    filled = np.where(valid, block, np.inf)
+    min_row = filled.argmin(axis=0)
+    filled[~valid] = -np.inf
+    max_row = filled.argmax(axis=0)
+    del filled
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0, ddof=1)
+
+    if in_place:
+        block.sort(axis=0)
+        ordered = block
+    else:
+        ordered = np.sort(block, axis=0)
+    mn, q25, median, q75, mx = _quantiles(ordered, counts, [0.0, 0.25, 0.5, 0.75, 1.0])
+    iqr = q75 - q25
+    # Counting is order independent, so the sorted block works as well
+    with np.errstate(invalid='ignore'):
+        outliers = ((ordered < q25 - 1.5 * iqr) | (ordered > q75 + 1.5 * iqr)).sum(axis=0)
+    # Distinct values start a new run in the sorted valid prefix
+    in_prefix = np.arange(1, len(ordered))[:, None] < counts
+    unique = (counts > 0) + ((ordered[1:] != ordered[:-1]) & in_prefix).sum(axis=0)
+
+    return {
+        'count': counts,
+        'mean': mean,
+        'std': np.where(counts > 1, std, np.nan),
+        'min': mn,
+        'q25': q25,
+        'median': median,
+        'q75': q75,
+        'max': mx,
+        'outliers': outliers,
+        'unique': unique,
+        'min_row': min_row,
+        'max_row': max_row,
+        'ordered': ordered
+    }
+
+
+def _as_float(value: float) -> Optional[float]:
+    """Convert a NumPy scalar to a float, mapping NaN to None."""
+    return None if np.isnan(value) else float(value)
+
+
+def _is_numeric_coercible(values) -> bool:
+    """Check whether every distinct value parses as a number."""
+    if len(values) == 0:
+        return False
+    distinct = pd.Series(values, dtype=object)
+    return bool(pd.to_numeric(distinct, errors='coerce').notna().all())
+
+
+def _numeric_column_profile(data: pd.DataFrame, name: str, stats: Dict[str, np.ndarray],
+                            i: int, ordered: np.ndarray) -> ColumnProfile:
+    """Build a numeric ColumnProfile from column i of block statistics."""
+    count = int(stats['count'][i])
+    std = _as_float(stats['std'][i])
+    # Statistics are exact either way; large columns keep only a digest for updates
+    keep_sorted = count <= ORDER_STATE_MAX_VALUES
+    return ColumnProfile(
+        name=name,
+        dtype=str(data[name].dtype),
+        kind='numeric',
+        count=count,
+        missing=len(data) - count,
+        mean=_as_float(stats['mean'][i]),
+        std=std,
+        min=_as_float(stats['min'][i]),
+        q25=_as_float(stats['q25'][i]),
+        median=_as_float(stats['median'][i]),
+        q75=_as_float(stats['q75'][i]),
+        max=_as_float(stats['max'][i]),
+        outliers=int(stats['outliers'][i]),
+        unique=int(stats['unique'][i]),
+        sorted_values=ordered[:count, i].copy() if keep_sorted else None,
+        digest=None if keep_sorted else _new_digest(ordered[:count, i]),
+        m2=std * std * (count - 1) if std is not None else 0.0,
+        min_row=int(stats['min_row'][i]) if count else None,
+        max_row=int(stats['max_row'][i]) if count else None
+    )
+
+
+def _profile_numeric_columns(data: pd.DataFrame, names: List[str]) -> Dict[str, ColumnProfile]:
+    """Profile numeric columns in column blocks of bounded size."""
+    profiles = {}
+    if not names:
+        return profiles
+
+    width = max(1, BLOCK_BYTES // max(1, len(data) * 8))
+    for start in range(0, len(names), width):
+        block_names = names[start:start + width]
+        block = data[block_names].to_numpy(dtype=np.float64, na_value=np.nan)
+        stats = _profile_numeric_block(block)
+
+        for i, name in enumerate(block_names):
+            profiles[name] = _numeric_column_profile(data, name, stats, i, stats['ordered'])
+
+    return profiles
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared profiling pool, recreating it if the worker count changed."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Forking a process that runs threads (Streamlit, DuckDB) is unsafe
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the profiling worker processes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def _profile_shared_columns(shm_name: str, shape: tuple, start: int, stop: int) -> tuple:
+    """
+    Pool task: profile columns [start, stop) of a shared Fortran-ordered block.
+
+    The columns are sorted in place so the parent can read the sorted values
+    back without anything but the summary statistics being pickled.
+    """
+    # The parent owns the segment and unlinks it once every slice is done
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+        stats = _profile_numeric_block(block[:, start:stop], in_place=True)
+        stats.pop('ordered')
+        del block
+        return start, stats
+    finally:
+        shm.close()
+
+
+def _profile_numeric_columns_parallel(data: pd.DataFrame, names: List[str],
+                                      workers: int) -> Dict[str, ColumnProfile]:
+    """Profile numeric columns with column slices spread across the pool."""
+    profiles = {}
+    pool = _get_pool(workers)
+
+    # Each segment gives every worker one block of bounded size
+    width = max(1, BLOCK_BYTES // max(1, len(data) * 8))
+    for seg_start in range(0, len(names), width * workers):
+        seg_names = names[seg_start:seg_start + width * workers]
+        shape = (len(data), len(seg_names))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 8))
+        try:
+            block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+            for j, name in enumerate(seg_names):
+                block[:, j] = data[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+            step = -(-len(seg_names) // workers)
+            futures = [pool.submit(_profile_shared_columns, shm.name, shape, start, min(start + step, len(seg_names)))
+                       for start in range(0, len(seg_names), step)]
+            for future in futures:
+                start, stats = future.result()
+                for i in range(len(stats['count'])):
+                    name = seg_names[start + i]
+                    profiles[name] = _numeric_column_profile(data, name, stats, i, block[:, start:])
+            del block
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return profiles
+
+
+def _profile_text_column(series: pd.Series, check_coercible: bool = True) -> ColumnProfile:
+    """Profile a text or categorical column from one value_counts pass."""
+    counts = series.value_counts(dropna=True)
+    missing = int(series.isna().sum())
+
+    profile = ColumnProfile(
+        name=series.name,
+        dtype=str(series.dtype),
+        kind='text',
+        count=len(series) - missing,
+        missing=missing,
+        value_counts=counts
+    )
+    # Coercibility is decided on the distinct values only
+    profile._refresh_counts(check_coercible)
+    return profile
+
+
+def _profile_other_column(series: pd.Series, kind: str) -> ColumnProfile:
+    """Profile a datetime, boolean or other column."""
+    missing = int(series.isna().sum())
+    profile = ColumnProfile(
+        name=series.name,
+        dtype=str(series.dtype),
+        kind=kind,
+        count=len(series) - missing,
+        missing=missing,
+        value_counts=series.value_counts(dropna=True)
+    )
+    profile._refresh_counts()
+    return profile
+
+
+def build_profile(data: pd.DataFrame, workers: int = 1) -> DataProfile:
+    """
+    Profile every column of a DataFrame.
+
+    Args:
+        data: DataFrame to profile
+        workers: Worker processes for wide frames. Frames below
+            PARALLEL_MIN_CELLS numeric cells are always profiled serially.
+
+    Returns:
+        DataProfile with per-column statistics
+    """
+    kinds = {col: _column_kind(data[col]) for col in data.columns}
+    numeric_names = [col for col, kind in kinds.items() if kind == 'numeric']
+    parallel = (workers > 1 and len(numeric_names) > 1 and
+                len(data) * len(numeric_names) >= PARALLEL_MIN_CELLS)
+
+    columns = None
+    if parallel:
+        try:
+            columns = _profile_numeric_columns_parallel(data, numeric_names, workers)
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Parallel profiling failed, profiling serially: {str(e)}")
+            shutdown_pool()
+            parallel = False
+    if columns is None:
+        columns = _profile_numeric_columns(data, numeric_names)
+
+    coercion_checks = {}
+    for col, kind in kinds.items():
+        if kind == 'text':
+            columns[col] = _profile_text_column(data[col], check_coercible=not parallel)
+            if parallel:
+                counts = columns[col].value_counts
+                distinct = counts.index[counts.to_numpy() > 0]
+                if len(distinct) >= PARALLEL_MIN_DISTINCT:
+                    # Only the distinct values are sent to the worker
+                    coercion_checks[col] = _get_pool(workers).submit(
+                        _is_numeric_coercible, np.asarray(distinct, dtype=object))
+                else:
+                    columns[col].numeric_coercible = _is_numeric_coercible(distinct)
+        elif kind != 'numeric':
+            columns[col] = _profile_other_column(data[col], kind)
+
+    for col, future in coercion_checks.items():
+        columns[col].numeric_coercible = future.result()
+
+    row_index = RowHashIndex.from_frame(data)
+    profile = DataProfile(
+        rows=len(data),
+        # Keep the original column order
+        columns={col: columns[col] for col in data.columns},
+        duplicate_rows=row_index.duplicate_count,
+        memory_usage=estimate_frame_bytes(data),
+        row_index=row_index
+    )
+
+    logger.info(f"Profiled {len(data.columns)} columns over {len(data)} rows"
+                f"{f' on {workers} workers' if parallel else ''}")
+    return profile
@@ -0,0 +1,415 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Request scheduling for model API calls in the conversational analytics application.
+Every call waits for a concurrency slot and for room in token buckets that
+cap requests and tokens per minute, is retried with jittered exponential
+backoff on transient failures (rate limits, server errors, timeouts) within
+a per-call deadline, and is refused outright while a circuit breaker is open
+after repeated failures. The scheduler only sees coroutine factories, so it
+works the same against the real API and a local fake server.
+"""
+
+import os
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Awaitable, TypeVar
+import logging
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:  # Installed with google-generativeai; classification falls back to status codes
+    google_exceptions = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# HTTP statuses worth retrying: rate limited, or a server-side failure
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+if google_exceptions is not None:
+    RETRYABLE_EXCEPTIONS = (asyncio.TimeoutError, ConnectionError, google_exceptions.TooManyRequests,
+                            google_exceptions.ResourceExhausted, google_exceptions.ServerError,
+                            google_exceptions.DeadlineExceeded)
+else:
+    RETRYABLE_EXCEPTIONS = (asyncio.TimeoutError, ConnectionError)
+
+
+class SchedulerError(Exception):
+    """A request was not completed by the scheduler."""
+
+
+class CircuitOpenError(SchedulerError):
+    """Requests are refused after repeated failures."""
+
+
+class DeadlineExceededError(SchedulerError):
+    """The call's deadline passed while waiting, retrying or running."""
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Get the HTTP status of an API error, if it carries one."""
+    for attribute in ('code', 'status_code', 'status'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed request may succeed if sent again.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        True for rate limiting, server errors, timeouts and connection errors
+    """
+    if isinstance(error, RETRYABLE_EXCEPTIONS):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether the server refused a request because a quota or rate limit was hit."""
+    if google_exceptions is not None and isinstance(error, (google_exceptions.TooManyRequests,
+                                                            google_exceptions.ResourceExhausted)):
+        return True
+    return _status_code(error) == 429
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said."""
+    value = getattr(error, 'retry_after', None)
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt: about four characters per token."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Refills continuously at a per-minute rate up to a burst capacity."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Units added per minute
+            capacity: Maximum units held. Defaults to one minute's worth.
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until the bucket holds amount (requests larger than the capacity wait for a full bucket)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        """Remove units; the level may go negative to account for usage found out afterwards."""
+        self._refill()
+        self.level -= amount
+
+
+class CircuitBreaker:
+    """Stops sending requests after consecutive failures, probing again after a pause."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_threshold: Consecutive failed calls that open the circuit
+            reset_seconds: Seconds the circuit stays open before one trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open'."""
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half-open state only one trial at a time."""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_neutral(self):
+        """Forget a call whose outcome says nothing about the service, such as a bad request."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            # A failed trial re-opens the circuit for another pause
+            if self.opened_at is None:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+
+@dataclass
+class SchedulerMetrics:
+    """Counters describing how calls were scheduled."""
+
+    calls: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    attempts: int = 0
+    retries: int = 0
+    throttled: int = 0  # waits for a rate limit bucket
+    throttle_seconds: float = 0.0
+    rate_limited: int = 0  # 429 responses from the server
+    queue_wait_seconds: float = 0.0
+    max_queue_wait_seconds: float = 0.0
+    circuit_rejections: int = 0
+    deadlines_exceeded: int = 0
+
+
+class RequestScheduler:
+    """Rate-limited, retrying, deadline-bounded executor of API calls."""
+
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_retries: int = 4,
+                 base_delay: float = 1.0, max_delay: float = 30.0,
+                 failure_threshold: int = 5, reset_seconds: float = 30.0):
+        """
+        Initialize the scheduler. Must be used from a single event loop.
+
+        Args:
+            max_concurrency: Maximum calls in flight
+            requests_per_minute: Request rate limit, or None for no limit
+            tokens_per_minute: Token rate limit, or None for no limit
+            max_retries: Retries of a call after transient failures
+            base_delay: Backoff before the first retry, doubled for each further one
+            max_delay: Upper bound of a single backoff
+            failure_threshold: Consecutive calls that fail after all their retries,
+                other than by rate limiting, before the circuit opens
+            reset_seconds: Seconds the circuit stays open
+        """
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.metrics = SchedulerMetrics()
+
+        # Created on the loop that runs the calls: before Python 3.10 they bind
+        # to the current loop when constructed, which may be another thread's
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Serializes bucket waits so calls are admitted in arrival order
+        self._admission: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_env(cls, max_concurrency: int = 8) -> 'RequestScheduler':
+        """
+        Build a scheduler configured by environment variables.
+
+        GEMINI_REQUESTS_PER_MINUTE and GEMINI_TOKENS_PER_MINUTE set the rate
+        limits (unset means unlimited) and GEMINI_MAX_RETRIES the retries.
+
+        Args:
+            max_concurrency: Maximum calls in flight
+
+        Returns:
+            RequestScheduler
+        """
+        requests_per_minute = os.getenv('GEMINI_REQUESTS_PER_MINUTE')
+        tokens_per_minute = os.getenv('GEMINI_TOKENS_PER_MINUTE')
+        return cls(max_concurrency=max_concurrency,
+                   requests_per_minute=float(requests_per_minute) if requests_per_minute else None,
+                   tokens_per_minute=float(tokens_per_minute) if tokens_per_minute else None,
+                   max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '4')))
+
+    def _backoff(self, retry: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, at least what the server asked for."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        requested = _retry_after(error)
+        return max(delay, requested) if requested is not None else delay
+
+    def _bind_to_loop(self):
+        """Create the semaphore and lock on the running loop the first time a call is made."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._admission = asyncio.Lock()
+
+    async def _admit(self, tokens: int, deadline: Optional[float]):
+        """Wait until both buckets have room, then take from them."""
+        async with self._admission:
+            while True:
+                wait = 0.0
+                for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, tokens)):
+                    if bucket is not None:
+                        wait = max(wait, bucket.wait_time(amount))
+                if wait <= 0:
+                    break
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    raise DeadlineExceededError(f"Rate limit wait of {wait:.1f}s would pass the deadline")
+                self.metrics.throttled += 1
+                self.metrics.throttle_seconds += wait
+                await asyncio.sleep(wait)
+
+            if self.request_bucket is not None:
+                self.request_bucket.take(1)
+            if self.token_bucket is not None:
+                self.token_bucket.take(tokens)
+
+    def record_tokens(self, extra_tokens: int):
+        """
+        Charge tokens learned after a call, such as the response's length.
+
+        Args:
+            extra_tokens: Tokens used beyond the estimate the call was admitted with
+        """
+        if self.token_bucket is not None and extra_tokens:
+            self.token_bucket.take(extra_tokens)
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int = 1,
+                  deadline_seconds: Optional[float] = None, attempt_timeout: Optional[float] = None) -> T:
+        """
+        Run a call under the rate limits, retrying transient failures.
+
+        Args:
+            call: Creates a fresh awaitable for each attempt
+            tokens: Estimated tokens the call uses, charged to the token bucket
+            deadline_seconds: Total seconds for waiting, all attempts and backoff
+            attempt_timeout: Seconds allowed for a single attempt
+
+        Returns:
+            The call's result
+
+        Raises:
+            CircuitOpenError: The circuit is open
+            DeadlineExceededError: The deadline passed
+            Exception: The last error, when it is not retryable or retries ran out
+        """
+        self._bind_to_loop()
+        self.metrics.calls += 1
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+
+        retry = 0
+        while True:
+            # The breaker admits a call once; its own retries are not trials, but
+            # stop if other calls opened the circuit meanwhile
+            if not (self.breaker.allow() if retry == 0 else self.breaker.state != 'open'):
+                self.metrics.circuit_rejections += 1
+                self.metrics.failed += 1
+                raise CircuitOpenError("The service failed repeatedly; requests are paused")
+
+            queued = time.monotonic()
+            try:
+                async with self._slots:
+                    await self._admit(tokens, deadline)
+                    waited = time.monotonic() - queued
+                    self.metrics.queue_wait_seconds += waited
+                    self.metrics.max_queue_wait_seconds = max(self.metrics.max_queue_wait_seconds, waited)
+
+                    timeout = attempt_timeout
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise DeadlineExceededError("The deadline passed before the request was sent")
+                        timeout = min(timeout, remaining) if timeout else remaining
+
+                    self.metrics.attempts += 1
+                    result = await asyncio.wait_for(call(), timeout) if timeout else await call()
+
+            except asyncio.CancelledError:
+                self.breaker.record_neutral()
+                raise
+
+            except DeadlineExceededError:
+                self.breaker.record_neutral()
+                self.metrics.deadlines_exceeded += 1
+                self.metrics.failed += 1
+                raise
+
+            except Exception as e:
+                rate_limited = is_rate_limited(e)
+                if rate_limited:
+                    self.metrics.rate_limited += 1
+                if not is_retryable(e):
+                    # The request itself was bad; the service is fine
+                    self.breaker.record_neutral()
+                    self.metrics.failed += 1
+                    raise
+
+                delay = self._backoff(retry, e)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if retry >= self.max_retries or out_of_time:
+                    # A call counts against the breaker once, when it gives up. Being
+                    # throttled says the quota is used up, not that the service is down.
+                    if rate_limited:
+                        self.breaker.record_neutral()
+                    else:
+                        self.breaker.record_failure()
+                    self.metrics.failed += 1
+                    if retry >= self.max_retries:
+                        raise
+                    self.metrics.deadlines_exceeded += 1
+                    raise DeadlineExceededError(f"No time left to retry after: {str(e) or type(e).__name__}") from e
+
+                retry += 1
+                self.metrics.retries += 1
+                logger.info(f"Retrying request in {delay:.2f}s (retry {retry} of {self.max_retries}) "
+                            f"after {type(e).__name__}: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            self.metrics.succeeded += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get scheduling metrics.
+
+        Returns:
+            Dictionary of counters, mean queue wait and the circuit state
+        """
+        metrics = self.metrics
+        stats = dict(vars(metrics))
+        stats['mean_queue_wait_seconds'] = metrics.queue_wait_seconds / metrics.attempts if metrics.attempts else 0.0
+        stats['circuit_state'] = self.breaker.state
+        return stats
@@ -0,0 +1,305 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Persistent prompt-to-response cache for the Gemini client.
+Responses are stored in a SQLite database keyed by a hash of the model, the
+generation settings and the normalized prompt, so the same question about the
+same dataset is answered from disk instead of the API. Entries expire after a
+time-to-live and the least recently used ones are evicted past a size limit.
+"""
+
+import os
+import re
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, Any, Optional
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Eviction trims the cache to this fraction of its limit, so it does not run on every put
+EVICT_TO_FRACTION = 0.9
+
+_WHITESPACE_RUN = re.compile(r'[ \t\f\v]+')
+
+
+def default_cache_dir() -> str:
+    """
+    Get the per-user cache directory: $XDG_CACHE_HOME or ~/.cache on Unix,
+    %LOCALAPPDATA% on Windows, in a conversational_analytics subdirectory.
+    """
+    base = os.getenv('XDG_CACHE_HOME') or (os.getenv('LOCALAPPDATA') if os.name == 'nt' else None)
+    return os.path.join(base or os.path.join(os.path.expanduser('~'), '.cache'), 'conversational_analytics')
+
+
+def _create_private_file(path: str):
+    """Create the directory (0700) and the file (0600) so other users cannot read cached prompts."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    os.close(fd)
+    if os.name != 'nt':
+        # makedirs and os.open leave the modes of existing paths alone
+        os.chmod(path, 0o600)
+        if os.path.realpath(directory) == os.path.realpath(default_cache_dir()):
+            os.chmod(directory, 0o700)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Reduce a prompt to the text that affects the answer.
+
+    Prompts are built from indented f-strings, so indentation, trailing
+    spaces, runs of spaces and repeated blank lines vary with the code that
+    built them rather than with the question. Case and punctuation are kept.
+
+    Args:
+        prompt: Prompt as sent to the model
+
+    Returns:
+        Normalized prompt
+    """
+    text = unicodedata.normalize('NFC', prompt).replace('\r\n', '\n').replace('\r', '\n')
+    lines = [_WHITESPACE_RUN.sub(' ', line).strip() for line in text.split('\n')]
+
+    normalized = []
+    for line in lines:
+        if line or (normalized and normalized[-1]):
+            normalized.append(line)
+    return '\n'.join(normalized).strip()
+
+
+def cache_key(model: str, prompt: str, temperature: Optional[float] = None) -> str:
+    """
+    Compute the cache key of a request.
+
+    Args:
+        model: Model name
+        prompt: Full prompt text
+        temperature: Sampling temperature, or None for the model default
+
+    Returns:
+        Hex digest identifying the request
+    """
+    settings = 'default' if temperature is None else repr(float(temperature))
+    material = '\x00'.join((model, settings, normalize_prompt(prompt)))
+    return hashlib.blake2b(material.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with a time-to-live and LRU size eviction."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 24 * 3600):
+        """
+        Initialize the response cache.
+
+        Args:
+            path: SQLite database file. Defaults to a file in the per-user cache
+                directory; the file is readable by its owner only.
+            max_bytes: Maximum total size of cached responses before eviction
+            ttl_seconds: Age after which a response is regenerated; None keeps them forever
+        """
+        self.path = path or os.path.join(default_cache_dir(), 'responses.sqlite')
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._lock = threading.Lock()
+        # Access times of hits are written in batches rather than on every read
+        self._touched: Dict[str, float] = {}
+
+        # SQLite gives its -wal and -shm files the database file's permissions
+        _create_private_file(self.path)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, '
+            'created REAL, accessed REAL)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        atexit.register(self.close)
+        logger.info(f"Response cache initialized at {self.path}")
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get(self, model: str, prompt: str, temperature: Optional[float] = None) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            model: Model name
+            prompt: Full prompt text
+            temperature: Sampling temperature, or None for the model default
+
+        Returns:
+            The cached response, or None on a miss or when it has expired
+        """
+        key = cache_key(model, prompt, temperature)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT response, created, size FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created, size = row
+            if self._expired(created, now):
+                self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._size -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._touched[key] = now
+            self.hits += 1
+            return response
+
+    def put(self, model: str, prompt: str, response: str, temperature: Optional[float] = None):
+        """
+        Store a response, evicting the least recently used ones past the size limit.
+
+        Args:
+            model: Model name
+            prompt: Full prompt text
+            response: Generated response
+            temperature: Sampling temperature, or None for the model default
+        """
+        key = cache_key(model, prompt, temperature)
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                self._flush_touched()
+                previous = self._connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO responses (key, model, response, size, created, accessed) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', (key, model, response, size, now, now))
+                self._size += size - (previous[0] if previous else 0)
+                if self._size > self.max_bytes:
+                    self._evict(now)
+        except sqlite3.Error as e:
+            logger.error(f"Error caching response: {str(e)}")
+
+    def _flush_touched(self):
+        """Write the access times of recent hits. Must hold the lock."""
+        if self._touched:
+            self._connection.executemany('UPDATE responses SET accessed = ? WHERE key = ?',
+                                         [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, now: float):
+        """Drop expired responses, then the least recently used ones. Must hold the lock."""
+        self._connection.execute('BEGIN')
+        try:
+            if self.ttl_seconds is not None:
+                expired = self._connection.execute(
+                    'DELETE FROM responses WHERE created < ?', (now - self.ttl_seconds,)).rowcount
+                self.expirations += max(expired, 0)
+            self._size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+            target = self.max_bytes * EVICT_TO_FRACTION
+            if self._size > target:
+                victims = []
+                for key, size in self._connection.execute('SELECT key, size FROM responses ORDER BY accessed'):
+                    if self._size <= target:
+                        break
+                    victims.append((key,))
+                    self._size -= size
+                self._connection.executemany('DELETE FROM responses WHERE key = ?', victims)
+                self.evictions += len(victims)
+                logger.info(f"Evicted {len(victims)} cached responses")
+            self._connection.execute('COMMIT')
+        except sqlite3.Error:
+            self._connection.execute('ROLLBACK')
+            raise
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._connection.execute('DELETE FROM responses')
+            self._touched.clear()
+            self._size = 0
+        logger.info("Response cache cleared")
+
+    def close(self):
+        """Write pending access times and close the database."""
+        with self._lock:
+            if self._connection is None:
+                return
+            try:
+                self._flush_touched()
+            except sqlite3.Error:
+                pass
+            self._connection.close()
+            self._connection = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and size information
+        """
+        with self._lock:
+            entries = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': entries,
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache.
+
+    The location, size limit and time-to-live can be set with the
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_MB and RESPONSE_CACHE_TTL_HOURS
+    environment variables; RESPONSE_CACHE_TTL_HOURS=0 keeps responses until
+    evicted and RESPONSE_CACHE_MAX_MB=0 disables the cache.
+
+    Returns:
+        Shared ResponseCache instance, or None if disabled or unavailable
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_mb = int(os.getenv('RESPONSE_CACHE_MAX_MB', '64'))
+            if max_mb <= 0:
+                return None
+            ttl_hours = float(os.getenv('RESPONSE_CACHE_TTL_HOURS', '24'))
+            try:
+                _default_cache = ResponseCache(os.getenv('RESPONSE_CACHE_PATH'), max_mb * 1024 * 1024,
+                                               ttl_hours * 3600 if ttl_hours > 0 else None)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache unavailable: {str(e)}")
+                return None
+        return _default_cache
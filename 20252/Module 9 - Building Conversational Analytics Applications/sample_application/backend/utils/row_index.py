@@ -0,0 +1,210 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Row hash index for duplicate detection.
+Hashes every row once into 64 bits and keeps a count per distinct hash, so
+duplicate counts, duplicate groups and deduplication never rehash the data
+and appends, removals and edits only touch the rows involved.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import List, Optional
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def hash_rows(data: pd.DataFrame) -> np.ndarray:
+    """
+    Compute one 64-bit hash per row over all columns.
+
+    Args:
+        data: DataFrame to hash
+
+    Returns:
+        uint64 array with one hash per row
+    """
+    if data.empty:
+        return np.zeros(len(data), dtype=np.uint64)
+
+    # -0.0 equals 0.0 but hashes differently; adding 0.0 turns it into 0.0
+    signed_zero = {}
+    for col in data.columns:
+        if pd.api.types.is_float_dtype(data[col]):
+            values = data[col].to_numpy()
+            if (np.signbit(values) & (values == 0)).any():
+                signed_zero[col] = data[col] + 0.0
+    if signed_zero:
+        data = data.assign(**signed_zero)
+    # Copy so the hashes can be updated in place when rows change
+    return pd.util.hash_pandas_object(data, index=False).to_numpy().copy()
+
+
+class RowHashIndex:
+    """
+    Per-row hashes plus a count of rows per distinct hash.
+
+    Rows with equal hashes are treated as equal; with 64-bit hashes a false
+    match among a million rows has a probability of about 3e-8.
+    """
+
+    def __init__(self, hashes: np.ndarray):
+        """
+        Build the index from precomputed row hashes.
+
+        Args:
+            hashes: uint64 hash per row, in row order
+        """
+        self.hashes = hashes
+        # Sorted distinct hashes and the number of rows holding each
+        self._keys, self._counts = np.unique(hashes, return_counts=True)
+        self._distinct = len(self._keys)
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'RowHashIndex':
+        """
+        Hash a DataFrame and index it.
+
+        Args:
+            data: DataFrame to index
+
+        Returns:
+            RowHashIndex over its rows
+        """
+        return cls(hash_rows(data))
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def copy(self) -> 'RowHashIndex':
+        """
+        Copy the index without rehashing, so updates to the copy leave this one as it is.
+
+        Returns:
+            RowHashIndex with the same hashes and counts
+        """
+        clone = RowHashIndex.__new__(RowHashIndex)
+        # The distinct keys are only ever replaced, never written in place
+        clone.hashes, clone._keys, clone._counts = self.hashes.copy(), self._keys, self._counts.copy()
+        clone._distinct = self._distinct
+        return clone
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the hashes and the distinct-hash counts."""
+        return self.hashes.nbytes + self._keys.nbytes + self._counts.nbytes
+
+    @property
+    def duplicate_count(self) -> int:
+        """Number of rows that repeat an earlier row."""
+        return len(self.hashes) - self._distinct
+
+    def duplicated_mask(self, keep: str = 'first') -> np.ndarray:
+        """
+        Get a boolean mask of duplicate rows.
+
+        Args:
+            keep: 'first' or 'last' to leave one row of each group unmarked,
+                or 'all' to mark every row of a duplicate group
+
+        Returns:
+            Boolean array aligned with the indexed rows
+        """
+        if self.duplicate_count == 0:
+            return np.zeros(len(self.hashes), dtype=bool)
+        if keep == 'all':
+            return np.isin(self.hashes, self._keys[self._counts > 1])
+        return pd.Series(self.hashes).duplicated(keep=keep).to_numpy()
+
+    def duplicate_groups(self, max_groups: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Get the row positions of each group of identical rows.
+
+        Args:
+            max_groups: Return only the largest groups
+
+        Returns:
+            List of position arrays, largest group first
+        """
+        repeated = self._counts > 1
+        if not repeated.any():
+            return []
+
+        keys, counts = self._keys[repeated], self._counts[repeated]
+        order = np.argsort(-counts, kind='stable')
+        if max_groups is not None:
+            order = order[:max_groups]
+        keys = keys[order]
+
+        positions = np.flatnonzero(np.isin(self.hashes, keys))
+        # Map each row to its group's output slot, then split rows by group
+        sorter = np.argsort(keys)
+        group = sorter[np.searchsorted(keys, self.hashes[positions], sorter=sorter)]
+        by_group = np.argsort(group, kind='stable')
+        splits = np.cumsum(np.bincount(group, minlength=len(keys)))[:-1]
+        return np.split(positions[by_group], splits)
+
+    def _add_hashes(self, added: np.ndarray):
+        """Count new hashes into the distinct-hash table."""
+        keys, counts = np.unique(added, return_counts=True)
+        slots = np.searchsorted(self._keys, keys)
+        found = slots < len(self._keys)
+        found[found] = self._keys[slots[found]] == keys[found]
+
+        # Revive keys whose count had dropped to zero
+        self._distinct += int(np.count_nonzero(self._counts[slots[found]] == 0))
+        self._counts[slots[found]] += counts[found]
+
+        new = ~found
+        if new.any():
+            self._keys = np.insert(self._keys, slots[new], keys[new])
+            self._counts = np.insert(self._counts, slots[new], counts[new])
+            self._distinct += int(new.sum())
+
+    def _remove_hashes(self, removed: np.ndarray):
+        """Take hashes out of the distinct-hash table."""
+        keys, counts = np.unique(removed, return_counts=True)
+        slots = np.searchsorted(self._keys, keys)
+        self._counts[slots] -= counts
+        self._distinct -= int(np.count_nonzero(self._counts[slots] == 0))
+
+    def append(self, rows: pd.DataFrame):
+        """
+        Index rows appended after the current ones. Only the new rows are hashed.
+
+        Args:
+            rows: The appended rows, with the same columns as the indexed data
+        """
+        added = hash_rows(rows)
+        self._add_hashes(added)
+        self.hashes = np.concatenate([self.hashes, added])
+
+    def remove(self, keep_mask: np.ndarray):
+        """
+        Drop rows from the index without rehashing anything.
+
+        Args:
+            keep_mask: Boolean mask over the current rows, True for kept rows
+        """
+        self._remove_hashes(self.hashes[~keep_mask])
+        self.hashes = self.hashes[keep_mask]
+
+    def update(self, positions: np.ndarray, rows: pd.DataFrame):
+        """
+        Rehash rows whose values changed.
+
+        Args:
+            positions: Row positions that changed
+            rows: The new values of those rows
+        """
+        if len(positions) == 0:
+            return
+
+        new_hashes = hash_rows(rows)
+        self._remove_hashes(self.hashes[positions])
+        self._add_hashes(new_hashes)
+        self.hashes[positions] = new_hashes
@@ -0,0 +1,222 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Row sampling for LLM prompt context.
+Builds small, representative samples (uniform, stratified by a category and
+outlier-inclusive) of at most the requested size. Strata and extremes are
+chosen from the data profile, so only the probed and chosen rows are read,
+and samples are serialized in a compact columnar text form.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+from backend.utils.profiler import DataProfile
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Longest rendering of a single value in the columnar text
+MAX_VALUE_CHARS = 32
+
+# Stratify only on columns with a manageable number of categories
+MAX_STRATA = 20
+
+# Random probes per requested stratified row before giving up on rare strata
+PROBES_PER_ROW = 50
+
+# Share of the sample spent on rows holding numeric extremes
+EXTREME_SHARE = 0.25
+
+
+def uniform_positions(n_rows: int, k: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Pick k distinct row positions uniformly at random.
+
+    Args:
+        n_rows: Number of rows to sample from
+        k: Number of rows wanted
+        rng: Random generator
+
+    Returns:
+        Sorted array of row positions
+    """
+    k = min(k, n_rows)
+    return np.sort(rng.choice(n_rows, size=k, replace=False)) if k > 0 else np.empty(0, dtype=np.int64)
+
+
+def stratified_positions(column: pd.Series, strata: List, per_stratum: int,
+                         rng: np.random.Generator) -> np.ndarray:
+    """
+    Pick up to per_stratum rows for each stratum by random probing.
+
+    Probing random rows instead of grouping the whole column keeps the cost
+    bounded; very rare strata may come back short.
+
+    Args:
+        column: Column to stratify on
+        strata: Values to collect rows for
+        per_stratum: Rows wanted per value
+        rng: Random generator
+
+    Returns:
+        Array of row positions
+    """
+    wanted = {value: per_stratum for value in strata}
+    chosen = []
+    budget = PROBES_PER_ROW * per_stratum * len(strata)
+    batch = max(64, 4 * per_stratum * len(strata))
+
+    while wanted and budget > 0:
+        probes = rng.integers(0, len(column), size=min(batch, budget))
+        budget -= len(probes)
+        # Only the probed rows are read
+        for position, value in zip(probes, column.iloc[probes].tolist()):
+            if wanted.get(value, 0) > 0 and position not in chosen:
+                chosen.append(position)
+                wanted[value] -= 1
+                if wanted[value] == 0:
+                    del wanted[value]
+
+    return np.array(chosen, dtype=np.int64)
+
+
+def outlier_positions(data: pd.DataFrame, profile: Optional[DataProfile], k: int) -> np.ndarray:
+    """
+    Get the rows holding the minimum and maximum of the k widest numeric columns.
+
+    Columns are ranked by their range in standard deviations, and the rows
+    holding their extremes are read from the profile, so no column is scanned.
+
+    Args:
+        data: DataFrame
+        profile: Profile of the data; without one no extremes are picked
+        k: Number of columns whose extremes are wanted
+
+    Returns:
+        Array of at most 2 * k row positions
+    """
+    if profile is None or data.empty or k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    spreads = {}
+    for name in profile.columns_of_kind('numeric'):
+        col = profile.column(name)
+        if name not in data.columns or col.min is None or col.max is None or col.max <= col.min:
+            continue
+        # Approximate profiles do not know where their extremes are
+        if col.min_row is None and col.max_row is None:
+            continue
+        spreads[name] = (col.max - col.min) / col.std if col.std else 0.0
+    widest = sorted(spreads, key=spreads.get, reverse=True)[:k]
+
+    positions = []
+    for name in widest:
+        col = profile.column(name)
+        positions.extend(row for row in (col.min_row, col.max_row) if row is not None and row < len(data))
+    return np.unique(np.array(positions, dtype=np.int64))
+
+
+def build_sample(data: pd.DataFrame, profile: Optional[DataProfile], n: int = 10,
+                 seed: int = 0) -> pd.DataFrame:
+    """
+    Build a representative sample of at most n rows.
+
+    Up to half the rows cover the categories of the best stratification
+    column, up to a quarter hold the extremes of the widest numeric columns,
+    and the rest are uniform.
+
+    Args:
+        data: DataFrame to sample
+        profile: Profile of the data, used to pick the stratification column
+        n: Target number of rows
+        seed: Random seed
+
+    Returns:
+        Sampled rows in their original order, with a 'sample_reason' attribute
+    """
+    if data.empty or n <= 0:
+        return data.head(0)
+
+    rng = np.random.default_rng(seed)
+    reasons: Dict[int, str] = {}
+
+    # Stratify on the text column with the fewest (but at least two) categories
+    strata_column = None
+    if profile is not None:
+        candidates = [col for col in profile.columns_of_kind('text')
+                      if col in data.columns and 2 <= (profile.column(col).unique or 0) <= MAX_STRATA]
+        if candidates:
+            strata_column = min(candidates, key=lambda col: profile.column(col).unique)
+
+    if strata_column is not None:
+        column_profile = profile.column(strata_column)
+        counts = column_profile.value_counts
+        strata = list(counts.sort_values(ascending=False, kind='stable').index) if counts is not None \
+            else list(column_profile.top_values)
+        # With more strata than half the sample, cover the most frequent ones
+        strata = strata[:max(1, n // 2)]
+        per_stratum = max(1, (n // 2) // len(strata))
+        for position in stratified_positions(data[strata_column], strata, per_stratum, rng):
+            reasons.setdefault(int(position), f'stratum:{strata_column}')
+
+    extreme_columns = int(n * EXTREME_SHARE) // 2
+    for position in outlier_positions(data, profile, extreme_columns):
+        reasons.setdefault(int(position), 'extreme')
+
+    # Drawn n at a time so rows already chosen above do not leave the sample short
+    for position in rng.permutation(uniform_positions(len(data), n, rng)):
+        if len(reasons) >= min(n, len(data)):
+            break
+        reasons.setdefault(int(position), 'random')
+
+    positions = sorted(reasons)
+    sample = data.iloc[positions]
+    sample.attrs['sample_reason'] = [reasons[p] for p in positions]
+    return sample
+
+
+def _format_value(value) -> str:
+    """Render one value compactly."""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return '∅'
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.6g}"
+    if isinstance(value, pd.Timestamp):
+        text = value.isoformat(sep=' ')
+        return text[:-len(' 00:00:00')] if text.endswith(' 00:00:00') else text
+    text = str(value).replace('\n', ' ').replace('|', '/')
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS - 1] + '…'
+
+
+def format_columnar(sample: pd.DataFrame, total_rows: Optional[int] = None) -> str:
+    """
+    Serialize a sample one column per line.
+
+    Column names and dtypes appear once instead of once per row, which keeps
+    the prompt much smaller than a list of record dicts.
+
+    Args:
+        sample: Sampled rows
+        total_rows: Number of rows in the full dataset
+
+    Returns:
+        Columnar text, values separated by ' | ' and missing values shown as ∅
+    """
+    header = f"{len(sample)} sampled rows"
+    if total_rows is not None:
+        header += f" of {total_rows}"
+    reasons = sample.attrs.get('sample_reason')
+    if reasons:
+        counts = pd.Series(reasons).value_counts()
+        header += " (" + ", ".join(f"{count} {reason}" for reason, count in counts.items()) + ")"
+
+    lines = [header]
+    for col in sample.columns:
+        values = " | ".join(_format_value(v) for v in sample[col].tolist())
+        lines.append(f"{col} [{sample[col].dtype}]: {values}")
+    return "\n".join(lines)
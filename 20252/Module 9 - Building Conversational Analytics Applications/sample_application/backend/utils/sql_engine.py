@@ -0,0 +1,161 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Embedded SQL execution backend for the conversational analytics application.
+Registers loaded DataFrames as tables of an in-process DuckDB database so
+aggregations and group-bys run vectorized on all cores without copying data.
+"""
+
+import os
+import re
+import threading
+import pandas as pd
+from typing import Dict, Any, Tuple, Optional
+import logging
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional, SQL execution is disabled without it
+    duckdb = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Only single read-only queries are accepted
+_READ_ONLY_PATTERN = re.compile(r'^\s*(select|with)\b', re.IGNORECASE)
+
+# Rows returned to callers by default
+DEFAULT_MAX_ROWS = 1000
+
+# Frames at least this long are queried on this engine rather than in pandas
+SQL_MIN_ROWS = 1_000_000
+
+
+def extract_sql(text: str) -> str:
+    """
+    Pull a SQL statement out of an LLM response.
+
+    Args:
+        text: Response that may wrap the query in a markdown code fence
+
+    Returns:
+        SQL text without fences or a trailing semicolon
+    """
+    match = re.search(r'```(?:sql)?\s*(.*?)```', text, re.DOTALL | re.IGNORECASE)
+    sql = match.group(1) if match else text
+    return sql.strip().rstrip(';').strip()
+
+
+class SqlEngine:
+    """In-process columnar SQL engine over registered DataFrames."""
+
+    def __init__(self, threads: Optional[int] = None):
+        """
+        Initialize the SQL engine.
+
+        Args:
+            threads: Worker threads for query execution. Defaults to all cores.
+        """
+        self.threads = threads or os.cpu_count() or 1
+        self._connection = None
+        self._lock = threading.Lock()
+        self._registered: Dict[str, Any] = {}  # table name -> version token
+
+        if self.available:
+            self._connection = duckdb.connect(database=':memory:')
+            self._connection.execute(f"SET threads={int(self.threads)}")
+            # Queries come from an LLM: no reading or writing files
+            self._connection.execute("SET enable_external_access=false")
+            logger.info(f"SQL engine initialized with {self.threads} threads")
+        else:
+            logger.info("duckdb not installed - SQL execution backend disabled")
+
+    @property
+    def available(self) -> bool:
+        """Whether the SQL backend can be used."""
+        return duckdb is not None
+
+    def register(self, name: str, data: pd.DataFrame, version: Any = None):
+        """
+        Expose a DataFrame as a table. The data is scanned in place, not copied.
+
+        Args:
+            name: Table name used in queries
+            data: DataFrame to expose
+            version: Token identifying the data; registration is skipped if
+                the table is already registered with the same token
+        """
+        if not self.available:
+            return
+
+        with self._lock:
+            if version is not None and self._registered.get(name) == version:
+                return
+            self._connection.register(name, data)
+            self._registered[name] = version
+
+    def tables(self) -> list:
+        """Get the registered table names."""
+        return list(self._registered)
+
+    def query(self, sql: str, max_rows: int = DEFAULT_MAX_ROWS) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
+        """
+        Run a read-only query.
+
+        Args:
+            sql: A single SELECT (or WITH ... SELECT) statement
+            max_rows: Maximum number of result rows to fetch
+
+        Returns:
+            Tuple of (success, result DataFrame, error message)
+        """
+        if not self.available:
+            return False, None, "SQL backend not available (duckdb not installed)"
+
+        sql = sql.strip().rstrip(';').strip()
+        if not _READ_ONLY_PATTERN.match(sql) or ';' in sql:
+            return False, None, "Only a single SELECT statement can be executed"
+
+        try:
+            with self._lock:
+                result = self._connection.execute(sql)
+                rows = result.fetchmany(max_rows)
+                columns = [description[0] for description in result.description]
+            return True, pd.DataFrame.from_records(rows, columns=columns), None
+
+        except Exception as e:
+            logger.error(f"SQL execution failed: {str(e)}")
+            return False, None, f"SQL execution error: {str(e)}"
+
+    def describe_schema(self, name: str, data: pd.DataFrame) -> str:
+        """
+        Describe a table's columns with their SQL types for prompts.
+
+        Args:
+            name: Table name
+            data: DataFrame registered under that name
+
+        Returns:
+            One line per column with its SQL type
+        """
+        lines = [f"Table {name} ({len(data)} rows):"]
+        for col, dtype in data.dtypes.items():
+            lines.append(f"  \"{col}\" {_sql_type(dtype)}")
+        return "\n".join(lines)
+
+
+def _sql_type(dtype) -> str:
+    """Map a pandas dtype to the SQL type DuckDB exposes it as."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'BOOLEAN'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'BIGINT'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'DOUBLE'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'TIMESTAMP'
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'ENUM'
+    return 'VARCHAR'
@@ -0,0 +1,509 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Streaming statistics for datasets larger than memory.
+Mergeable sketches (Welford moments, t-digest quantiles, HyperLogLog distinct
+counts and count-min top-k values) computed chunk by chunk over a CSV stream.
+"""
+
+import math
+import time
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, Optional
+import logging
+
+from backend.utils.csv_ingest import CsvIngestor, ENCODINGS, peak_rss_mb
+from backend.utils.profiler import ColumnProfile, DataProfile
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _hash_values(values) -> np.ndarray:
+    """Hash an array of values to uint64."""
+    return pd.util.hash_array(np.asarray(values, dtype=object) if not isinstance(values, np.ndarray)
+                              else values)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Vectorized bit length of uint64 values."""
+    def bit_length_32(x):
+        with np.errstate(divide='ignore'):
+            return np.where(x > 0, np.floor(np.log2(np.maximum(x, 1).astype(np.float64))) + 1, 0)
+
+    high = values >> np.uint64(32)
+    low = values & np.uint64(0xFFFFFFFF)
+    return np.where(high > 0, 32 + bit_length_32(high), bit_length_32(low)).astype(np.int64)
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max merged chunk by chunk (Welford/Chan)."""
+
+    def __init__(self):
+        """Initialize empty moments."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, values: np.ndarray):
+        """
+        Merge a chunk of non-missing values.
+
+        Args:
+            values: 1-D float array without NaNs
+        """
+        n = len(values)
+        if n == 0:
+            return
+
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+
+
+class TDigest:
+    """Merging t-digest for approximate quantiles."""
+
+    def __init__(self, compression: float = 200):
+        """
+        Initialize the digest.
+
+        Args:
+            compression: Scale parameter; higher values give smaller rank
+                error at the cost of more centroids (about 1/compression)
+        """
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values: np.ndarray):
+        """
+        Add a chunk of non-missing values.
+
+        Args:
+            values: 1-D float array without NaNs
+        """
+        if len(values) == 0:
+            return
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, np.ones(len(values))])
+        self._compress(means, weights)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """Merge sorted centroids into buckets of the arcsine scale function."""
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        # Quantile at the left edge of each centroid, mapped through k1
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q_left - 1)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        bucket_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / bucket_weights
+        self.weights = bucket_weights
+
+    @property
+    def count(self) -> float:
+        """Total weight seen."""
+        return float(self.weights.sum())
+
+    def quantile(self, q: float, lower: Optional[float] = None, upper: Optional[float] = None) -> Optional[float]:
+        """
+        Estimate a quantile.
+
+        Args:
+            q: Quantile in [0, 1]
+            lower: Exact minimum, used to clamp the estimate
+            upper: Exact maximum, used to clamp the estimate
+
+        Returns:
+            Estimated value, or None if the digest is empty
+        """
+        if len(self.means) == 0:
+            return None
+
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        value = float(np.interp(q * total, centers, self.means))
+        if lower is not None:
+            value = max(value, lower)
+        if upper is not None:
+            value = min(value, upper)
+        return value
+
+    def cdf(self, x: float) -> float:
+        """
+        Estimate the fraction of values below x.
+
+        Args:
+            x: Value
+
+        Returns:
+            Estimated fraction in [0, 1]
+        """
+        if len(self.means) == 0:
+            return 0.0
+
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(x, self.means, centers, left=0.0, right=total) / total)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count estimator over 64-bit hashes."""
+
+    def __init__(self, relative_error: float = 0.01):
+        """
+        Initialize the estimator.
+
+        Args:
+            relative_error: Target standard error of the estimate
+        """
+        registers = (1.04 / relative_error) ** 2
+        self.precision = int(min(18, max(4, math.ceil(math.log2(registers)))))
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate for the chosen precision."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update_hashes(self, hashes: np.ndarray):
+        """
+        Add a chunk of uint64 hashes.
+
+        Args:
+            hashes: 1-D uint64 array
+        """
+        if len(hashes) == 0:
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - p)) - 1)
+        rank = (64 - p) - _bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def update(self, values):
+        """
+        Add a chunk of values.
+
+        Args:
+            values: Array-like of hashable values without missing entries
+        """
+        self.update_hashes(_hash_values(values))
+
+    def estimate(self) -> int:
+        """Estimate the number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class CountMinSketch:
+    """Count-min sketch with a bounded candidate set for top-k values."""
+
+    def __init__(self, epsilon: float = 1e-3, delta: float = 0.01, top_k: int = 5):
+        """
+        Initialize the sketch.
+
+        Args:
+            epsilon: Overcount bound as a fraction of the total count. The
+                table has e/epsilon columns, about 110 KB per sketch at 1e-3.
+            delta: Probability of exceeding the overcount bound
+            top_k: Number of most frequent values to track
+        """
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+        self.top_k = top_k
+        self.capacity = max(10 * top_k, 50)
+        self.candidates: Dict[Any, int] = {}
+
+    def _indexes(self, hashes: np.ndarray) -> np.ndarray:
+        """Derive one column index per sketch row (Kirsch-Mitzenmacher)."""
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, values: pd.Series):
+        """
+        Add a chunk of values.
+
+        Args:
+            values: Series of values without missing entries
+        """
+        counts = values.value_counts()
+        counts = counts[counts > 0]
+        if len(counts) == 0:
+            return
+
+        hashes = _hash_values(counts.index.to_numpy(dtype=object))
+        indexes = self._indexes(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], indexes[row], counts.to_numpy())
+        self.total += int(counts.sum())
+
+        # Heavy hitters of the chunk join the candidates, then the set is trimmed
+        for value in counts.index[:self.capacity]:
+            self.candidates[value] = 0
+        values_list = list(self.candidates)
+        estimates = self.estimate_many(values_list)
+        ranked = sorted(zip(values_list, estimates), key=lambda item: -item[1])[:self.capacity]
+        self.candidates = dict(ranked)
+
+    def estimate_many(self, values) -> np.ndarray:
+        """
+        Estimate the counts of several values.
+
+        Args:
+            values: List of values
+
+        Returns:
+            Array of estimated counts
+        """
+        if len(values) == 0:
+            return np.empty(0, dtype=np.int64)
+        indexes = self._indexes(_hash_values(np.asarray(values, dtype=object)))
+        return self.table[np.arange(self.depth)[:, None], indexes].min(axis=0)
+
+    def top_values(self) -> Dict[Any, int]:
+        """Get the estimated most frequent values and their counts."""
+        return {value: int(count) for value, count in list(self.candidates.items())[:self.top_k]}
+
+
+class StreamingProfiler:
+    """Builds an approximate DataProfile from a CSV stream in bounded memory."""
+
+    def __init__(self, relative_error: float = 0.01, quantile_error: float = 0.005,
+                 frequency_error: float = 1e-3, confidence: float = 0.99,
+                 sample_rows: int = 100000, seed: int = 0):
+        """
+        Initialize the streaming profiler.
+
+        Args:
+            relative_error: Target standard error of distinct counts
+            quantile_error: Target rank error of quantiles
+            frequency_error: Overcount bound of top-k counts, as a fraction of rows
+            confidence: Probability the frequency bound holds
+            sample_rows: Size of the uniform row sample kept for analysis
+            seed: Random seed for the row sample
+        """
+        self.relative_error = relative_error
+        self.quantile_error = quantile_error
+        self.frequency_error = frequency_error
+        self.confidence = confidence
+        self.sample_rows = sample_rows
+        self.rng = np.random.default_rng(seed)
+        self.ingestor = CsvIngestor()
+        self._reset()
+
+    def _reset(self):
+        """Clear all accumulated state."""
+        self.rows = 0
+        self.memory_usage = 0
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        self.row_distinct = HyperLogLog(self.relative_error)
+        self.sample = None
+        self.sample_keys = np.empty(0)
+
+    def _column_state(self, name: str, series: pd.Series) -> Dict[str, Any]:
+        """Create the sketches for a column on first sight."""
+        if pd.api.types.is_bool_dtype(series):
+            kind = 'bool'
+        elif pd.api.types.is_numeric_dtype(series):
+            kind = 'numeric'
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            kind = 'datetime'
+        else:
+            kind = 'text'
+
+        state = {'kind': kind, 'dtype': str(series.dtype), 'missing': 0,
+                 'distinct': HyperLogLog(self.relative_error)}
+        if kind in ('numeric', 'datetime'):
+            state['moments'] = RunningMoments()
+        if kind == 'numeric':
+            state['digest'] = TDigest(max(20, math.ceil(1 / self.quantile_error)))
+        if kind in ('text', 'bool'):
+            state['frequencies'] = CountMinSketch(self.frequency_error, 1 - self.confidence)
+            state['coercible'] = True
+        return state
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add one chunk of rows to every sketch.
+
+        Args:
+            chunk: Typed DataFrame chunk
+        """
+        for name in chunk.columns:
+            series = chunk[name]
+            if name not in self.columns:
+                self.columns[name] = self._column_state(name, series)
+            state = self.columns[name]
+
+            missing = series.isna().to_numpy()
+            state['missing'] += int(missing.sum())
+            present = series[~missing]
+            if len(present) == 0:
+                continue
+
+            state['distinct'].update_hashes(pd.util.hash_pandas_object(present, index=False).to_numpy())
+            if state['kind'] == 'numeric' and pd.api.types.is_numeric_dtype(present):
+                values = present.to_numpy(dtype=np.float64)
+                state['moments'].update(values)
+                state['digest'].update(values)
+            elif state['kind'] == 'datetime' and pd.api.types.is_datetime64_any_dtype(present):
+                state['moments'].update(present.astype('datetime64[ns]').astype(np.int64).to_numpy(dtype=np.float64))
+            elif 'frequencies' in state:
+                state['frequencies'].update(present)
+                if state['kind'] == 'text' and state['coercible']:
+                    state['coercible'] = bool(pd.to_numeric(present.astype(object), errors='coerce').notna().all())
+
+        self.row_distinct.update_hashes(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        self.memory_usage += int(chunk.memory_usage(deep=True, index=False).sum())
+        self._update_sample(chunk)
+        self.rows += len(chunk)
+
+    def _update_sample(self, chunk: pd.DataFrame):
+        """Keep the rows with the smallest random keys, a uniform sample."""
+        keys = self.rng.random(len(chunk))
+        if self.sample is None:
+            candidates, candidate_keys = chunk, keys
+        else:
+            candidates = pd.concat([self.sample, chunk], ignore_index=True)
+            candidate_keys = np.concatenate([self.sample_keys, keys])
+
+        if len(candidates) > self.sample_rows:
+            keep = np.sort(np.argpartition(candidate_keys, self.sample_rows)[:self.sample_rows])
+            candidates = candidates.iloc[keep].reset_index(drop=True)
+            candidate_keys = candidate_keys[keep]
+
+        self.sample, self.sample_keys = candidates, candidate_keys
+
+    def to_profile(self) -> DataProfile:
+        """
+        Summarize the sketches as an approximate DataProfile.
+
+        Returns:
+            DataProfile with approximate=True
+        """
+        columns = {}
+        for name, state in self.columns.items():
+            count = self.rows - state['missing']
+            col = ColumnProfile(name=name, dtype=state['dtype'], kind=state['kind'], count=count,
+                                missing=state['missing'], unique=state['distinct'].estimate())
+
+            if state['kind'] == 'numeric':
+                moments, digest = state['moments'], state['digest']
+                col.mean = moments.mean if moments.count else None
+                col.std = moments.std
+                col.min, col.max = moments.min, moments.max
+                col.q25 = digest.quantile(0.25, moments.min, moments.max)
+                col.median = digest.quantile(0.5, moments.min, moments.max)
+                col.q75 = digest.quantile(0.75, moments.min, moments.max)
+                if col.q25 is not None:
+                    iqr = col.q75 - col.q25
+                    outside = digest.cdf(col.q25 - 1.5 * iqr) + 1 - digest.cdf(col.q75 + 1.5 * iqr)
+                    col.outliers = int(round(outside * moments.count))
+            elif state['kind'] == 'datetime' and state['moments'].count:
+                col.min = pd.Timestamp(int(state['moments'].min))
+                col.max = pd.Timestamp(int(state['moments'].max))
+            elif 'frequencies' in state:
+                col.top_values = state['frequencies'].top_values()
+                col.numeric_coercible = state['kind'] == 'text' and state['coercible'] and count > 0
+
+            columns[name] = col
+
+        # Only report duplicates that stand out from the estimator's error
+        distinct_rows = self.row_distinct.estimate()
+        duplicates = max(0, self.rows - distinct_rows)
+        if duplicates < 3 * self.row_distinct.relative_error * self.rows:
+            duplicates = 0
+
+        return DataProfile(rows=self.rows, columns=columns, duplicate_rows=duplicates,
+                           memory_usage=self.memory_usage, approximate=True)
+
+    def error_bounds(self) -> Dict[str, float]:
+        """Get the configured error bounds of the approximate statistics."""
+        return {
+            'distinct_relative_error': self.row_distinct.relative_error,
+            'quantile_rank_error': self.quantile_error,
+            'frequency_error': self.frequency_error,
+            'confidence': self.confidence
+        }
+
+    def profile_csv(self, file_path: str) -> Tuple[DataProfile, pd.DataFrame, Dict[str, Any]]:
+        """
+        Stream a CSV file through the sketches.
+
+        Args:
+            file_path: Path to the CSV file
+
+        Returns:
+            Tuple of (approximate profile, uniform row sample, load statistics)
+        """
+        start = time.perf_counter()
+        encoding, delimiter = self.ingestor.sniff(file_path)
+
+        candidates = [encoding] + [e for e in ENCODINGS if e != encoding]
+        for candidate in candidates:
+            try:
+                self._reset()
+                schema = self.ingestor.infer_schema(file_path, candidate, delimiter)
+                chunk_count = 0
+                for chunk in self.ingestor.iter_chunks(file_path, candidate, delimiter, schema):
+                    self.update(chunk)
+                    chunk_count += 1
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                logger.info(f"Encoding {candidate} failed mid-stream, trying next encoding")
+                continue
+        else:
+            raise ValueError("Could not decode CSV file with any standard encoding")
+
+        load_stats = {
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'chunks': chunk_count,
+            'schema': {col: spec['kind'] for col, spec in schema.items()},
+            'out_of_core': True,
+            'sample_rows': len(self.sample) if self.sample is not None else 0,
+            'error_bounds': self.error_bounds(),
+            'load_time_seconds': time.perf_counter() - start,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        logger.info(f"Streamed {self.rows} rows in {chunk_count} chunks "
+                    f"in {load_stats['load_time_seconds']:.2f}s")
+
+        sample = self.sample if self.sample is not None else pd.DataFrame(columns=list(schema))
+        return self.to_profile(), sample, load_stats
@@ -0,0 +1,332 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Dictionary encoding of text columns for the conversational analytics application.
+Low and medium cardinality text columns are stored as categoricals: one small
+integer code per row and a dictionary of distinct strings. The dictionaries
+of every dataset draw their strings from one interned pool, so a value such
+as a country name is held once however many tables contain it, and counts,
+distinct values and fills work on the integer codes. The pool is a cache of
+the memory manager: strings no dictionary uses any more are dropped under
+memory pressure.
+"""
+
+import sys
+import threading
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, List, Optional, Iterable
+import logging
+
+from backend.utils.memory_budget import get_memory_manager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Same limits the CSV and Excel ingestors use for category columns
+CATEGORY_RATIO = 0.5
+MAX_CATEGORIES = 10000
+
+# Rows looked at before factorizing a whole column
+ENCODE_SAMPLE_ROWS = 10000
+
+# References to a pooled string from the pool's table (key and value), the
+# loop variable and sys.getrefcount; any more mean something else holds it
+_POOL_ONLY_REFS = 4
+
+
+def _is_string_values(values) -> bool:
+    """Whether every non-null value is a str."""
+    return pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty')
+
+
+class StringPool:
+    """Interned strings shared by the category dictionaries of all datasets."""
+
+    def __init__(self):
+        """Initialize an empty pool."""
+        self._strings: Dict[str, str] = {}
+        self._string_bytes = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.released = 0
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the pooled strings and the pool's table."""
+        return sys.getsizeof(self._strings) + self._string_bytes
+
+    def intern(self, values: Iterable) -> List[Any]:
+        """
+        Replace each string by the pool's copy of it, adding new strings.
+
+        Args:
+            values: Distinct values; non-strings are returned unchanged
+
+        Returns:
+            List of pooled values in the same order
+        """
+        pooled = []
+        with self._lock:
+            for value in values:
+                if isinstance(value, str):
+                    self.lookups += 1
+                    shared = self._strings.get(value)
+                    if shared is None:
+                        # Keep a plain str even when handed a subclass
+                        shared = str(value)
+                        self._strings[shared] = shared
+                        self._string_bytes += sys.getsizeof(shared)
+                    else:
+                        self.hits += 1
+                    value = shared
+                pooled.append(value)
+        return pooled
+
+    def release_unused(self, nbytes: int = 0) -> int:
+        """
+        Drop the strings that only the pool still refers to.
+
+        Strings of live category dictionaries stay pooled, so later datasets
+        keep sharing them; the others belong to datasets that are gone.
+
+        Args:
+            nbytes: Bytes wanted by the memory manager; all unused strings are dropped
+
+        Returns:
+            Bytes freed
+        """
+        with self._lock:
+            before = self.nbytes
+            # Rebuilt rather than deleted from, so the table shrinks as well
+            kept = {value: value for value in self._strings if sys.getrefcount(value) > _POOL_ONLY_REFS}
+            dropped = len(self._strings) - len(kept)
+            self._strings = kept
+            self._string_bytes = sum(sys.getsizeof(value) for value in kept)
+            self.released += dropped
+            freed = before - self.nbytes
+        if dropped:
+            logger.info(f"Dropped {dropped} unused strings from the string pool")
+        return freed
+
+    def categories(self, values: Iterable) -> pd.Index:
+        """Build a category dictionary whose entries are pooled strings."""
+        return pd.Index(self.intern(values), dtype=object)
+
+    def encode(self, series: pd.Series) -> pd.Series:
+        """
+        Dictionary-encode a text column with pooled categories.
+
+        Categorical columns keep their codes; only the dictionary is swapped.
+
+        Args:
+            series: Text or categorical column
+
+        Returns:
+            Categorical column with the same values
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            dtype = pd.CategoricalDtype(self.categories(series.cat.categories), ordered=series.cat.ordered)
+            return pd.Series(pd.Categorical.from_codes(series.cat.codes.to_numpy(), dtype=dtype),
+                             index=series.index, name=series.name)
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return self.from_codes(codes, uniques, series)
+
+    def from_codes(self, codes: np.ndarray, uniques, like: pd.Series) -> pd.Series:
+        """
+        Build a categorical column from factorized codes and distinct values.
+
+        Args:
+            codes: Code per row, -1 for missing
+            uniques: Distinct values the codes point into
+            like: Column providing the index and name
+
+        Returns:
+            Categorical column with pooled categories
+        """
+        dtype = pd.CategoricalDtype(self.categories(uniques))
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=like.index, name=like.name)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with the number of strings, their memory, the hit rate and
+            the number of strings dropped as unused
+        """
+        return {
+            'strings': len(self),
+            'memory_bytes': self.nbytes,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+            'released': self.released
+        }
+
+
+def _sample_is_compact(series: pd.Series, category_ratio: float, max_categories: int) -> bool:
+    """Check the leading rows so id-like columns are rejected without hashing every row."""
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return False
+    sample = series.iloc[:ENCODE_SAMPLE_ROWS].dropna()
+    if sample.empty:
+        return False
+    try:
+        distinct = sample.nunique()
+    except TypeError:  # unhashable objects such as lists
+        return False
+    return distinct <= max_categories and distinct <= category_ratio * len(sample)
+
+
+def encode_text_column(series: pd.Series, pool: 'StringPool', category_ratio: float = CATEGORY_RATIO,
+                       max_categories: int = MAX_CATEGORIES) -> Optional[pd.Series]:
+    """
+    Dictionary-encode a text column if it has few enough distinct values.
+
+    Args:
+        series: Column to encode
+        pool: String pool for the dictionary
+        category_ratio: Maximum distinct/non-null ratio
+        max_categories: Maximum number of distinct values
+
+    Returns:
+        Categorical column, or None if the column is not compact text
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) or not _sample_is_compact(series, category_ratio,
+                                                                                max_categories):
+        return None
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    non_null = int(np.count_nonzero(codes >= 0))
+    if len(uniques) > max_categories or len(uniques) > category_ratio * non_null:
+        return None
+    # Mixed objects such as numbers and dicts are left alone
+    if pd.api.types.is_object_dtype(series) and not _is_string_values(uniques):
+        return None
+    return pool.from_codes(codes, uniques, series)
+
+
+def encode_text_columns(data: pd.DataFrame, pool: 'StringPool', category_ratio: float = CATEGORY_RATIO,
+                        max_categories: int = MAX_CATEGORIES) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Dictionary-encode the compact text columns of a frame with a shared pool.
+
+    Columns that are already categorical with text categories are moved onto
+    the pool's strings without touching their codes.
+
+    Args:
+        data: DataFrame to encode
+        pool: String pool for the dictionaries
+        category_ratio: Maximum distinct/non-null ratio for encoded columns
+        max_categories: Maximum number of distinct values for encoded columns
+
+    Returns:
+        Tuple of (DataFrame with encoded columns, names of newly encoded columns)
+    """
+    replaced = {}
+    encoded = []
+    for col in data.columns:
+        series = data[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            if _is_string_values(series.cat.categories):
+                replaced[col] = pool.encode(series)
+        else:
+            values = encode_text_column(series, pool, category_ratio, max_categories)
+            if values is not None:
+                replaced[col] = values
+                encoded.append(col)
+
+    if not replaced:
+        return data, []
+
+    data = data.copy(deep=False)
+    for col, values in replaced.items():
+        data[col] = values
+    if encoded:
+        logger.info(f"Dictionary-encoded {len(encoded)} text columns: {', '.join(map(str, encoded))}")
+    return data, encoded
+
+
+def add_categories(series: pd.Series, values: Iterable, pool: 'StringPool') -> pd.Series:
+    """
+    Extend a categorical column's dictionary with pooled values.
+
+    Args:
+        series: Categorical column
+        values: Values not yet in its categories
+
+    Returns:
+        Column with the same codes and the longer dictionary
+    """
+    return series.cat.add_categories(pool.categories(values))
+
+
+def fill_codes(series: pd.Series, mask: np.ndarray, value: Any, pool: 'StringPool') -> pd.Series:
+    """
+    Set the masked rows of a categorical column to one value by writing its code.
+
+    Args:
+        series: Categorical column
+        mask: Rows to set
+        value: Value to store, added to the dictionary if new
+        pool: String pool for a new dictionary entry
+
+    Returns:
+        Categorical column with the rows set
+    """
+    categories = series.cat.categories
+    code = categories.get_indexer([value])[0]
+    if code < 0:
+        series = add_categories(series, [value], pool)
+        categories = series.cat.categories
+        code = len(categories) - 1
+
+    codes = series.cat.codes.to_numpy()
+    # The new code may not fit the old code width, so widen before writing
+    codes = np.where(mask, code, codes.astype(np.int64))
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=series.dtype), index=series.index, name=series.name)
+
+
+def align_categories(left: pd.Series, right: pd.Series, pool: 'StringPool') -> Tuple[pd.Series, pd.Series]:
+    """
+    Give two categorical columns one shared dictionary so they compare by code.
+
+    pandas joins categoricals on their codes only when both dictionaries are
+    equal; otherwise it falls back to comparing the strings.
+
+    Args:
+        left: Categorical column
+        right: Categorical column
+        pool: String pool for the shared dictionary
+
+    Returns:
+        Tuple of the recoded columns
+    """
+    if left.cat.categories.equals(right.cat.categories):
+        return left, right
+    union = left.cat.categories.append(right.cat.categories.difference(left.cat.categories, sort=False))
+    categories = pool.categories(union)
+    return left.cat.set_categories(categories), right.cat.set_categories(categories)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> StringPool:
+    """Get the process-wide string pool shared by all datasets."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            pool = StringPool()
+            # Unused strings are as cheap to give up as any memoized result
+            get_memory_manager().register('string_pool', 'cache', lambda: pool.nbytes, pool.release_unused)
+            _default_pool = pool
+        return _default_pool
@@ -0,0 +1,307 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Datetime detection and time indexing for the conversational analytics application.
+Finds text columns holding dates by inferring one format from a sample and
+parsing the whole column in a single vectorized call. A time index keeps the
+row order sorted by time and daily, weekly and monthly rollups of the numeric
+columns, so trend questions are answered from a few hundred periods instead
+of a scan over every row.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, List, Optional
+import logging
+
+from backend.utils.csv_ingest import infer_datetime_format
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows sampled per column when looking for dates
+DETECT_SAMPLE_ROWS = 1000
+
+ROLLUP_FREQUENCIES = {'D': 'daily', 'W': 'weekly', 'M': 'monthly'}
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Check whether a column holds text, including text categories."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        return pd.api.types.is_object_dtype(categories) or pd.api.types.is_string_dtype(categories)
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def detect_datetime_columns(data: pd.DataFrame, sample_rows: int = DETECT_SAMPLE_ROWS) -> Dict[str, str]:
+    """
+    Find text columns whose sampled values all parse with one datetime format.
+
+    Args:
+        data: DataFrame to inspect
+        sample_rows: Number of non-null values sampled per column
+
+    Returns:
+        Dictionary mapping column names to their datetime format
+    """
+    formats = {}
+    for col in data.columns:
+        series = data[col]
+        if not _is_text(series):
+            continue
+        sample = series.dropna().head(sample_rows)
+        # Non-string objects (numbers, dates already parsed) are left alone
+        if sample.empty or not sample.map(type).eq(str).all():
+            continue
+        fmt = infer_datetime_format(sample.astype(str))
+        if fmt is not None:
+            formats[col] = fmt
+    return formats
+
+
+def parse_datetime_columns(data: pd.DataFrame, formats: Dict[str, str]) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Parse detected date columns, keeping any column that does not parse fully.
+
+    Categorical columns are parsed through their categories only.
+
+    Args:
+        data: DataFrame holding the columns
+        formats: Column name to datetime format, from detect_datetime_columns
+
+    Returns:
+        Tuple of (DataFrame with the parsed columns, names of parsed columns)
+    """
+    parsed_columns = {}
+    for col, fmt in formats.items():
+        series = data[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = pd.to_datetime(series.cat.categories.astype(str), format=fmt, errors='coerce')
+            if categories.isna().any():
+                continue
+            codes = series.cat.codes.to_numpy()
+            values = categories.take(np.where(codes < 0, 0, codes))
+            parsed = pd.Series(values, index=series.index, name=col).where(codes >= 0)
+        else:
+            parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+            if parsed.isna().sum() != series.isna().sum():
+                continue
+        parsed_columns[col] = parsed
+
+    if not parsed_columns:
+        return data, []
+
+    data = data.copy(deep=False)
+    for col, values in parsed_columns.items():
+        data[col] = values
+    logger.info(f"Parsed {len(parsed_columns)} date columns: {', '.join(map(str, parsed_columns))}")
+    return data, list(parsed_columns)
+
+
+class TimeIndex:
+    """Rows of a dataset ordered by one datetime column, with period rollups."""
+
+    def __init__(self, data: pd.DataFrame, column: str, value_columns: Optional[List[str]] = None):
+        """
+        Sort the rows by time and build the daily rollup.
+
+        Args:
+            data: DataFrame holding the datetime column
+            column: Datetime column to index
+            value_columns: Numeric columns to roll up. Defaults to all numeric columns.
+        """
+        self.column = column
+        times = data[column]
+        if getattr(times.dt, 'tz', None) is not None:
+            # Index local wall-clock times
+            times = times.dt.tz_localize(None)
+        times = times.to_numpy(dtype='datetime64[ns]')
+
+        valid = np.flatnonzero(~np.isnat(times))
+        order = np.argsort(times[valid], kind='stable')
+        # Row positions in time order and the matching sorted timestamps
+        self.positions = valid[order]
+        self.sorted_times = times[self.positions]
+
+        if value_columns is None:
+            value_columns = [col for col in data.columns
+                             if col != column and pd.api.types.is_numeric_dtype(data[col]) and
+                             not pd.api.types.is_bool_dtype(data[col])]
+        self.value_columns = list(value_columns)
+
+        self._rollups: Dict[str, Dict[str, np.ndarray]] = {}
+        self._rollups['D'] = self._build_daily(data)
+        logger.info(f"Time index on '{column}': {len(self.positions)} rows, "
+                    f"{len(self._rollups['D']['periods'])} days")
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index and its rollups."""
+        return (self.positions.nbytes + self.sorted_times.nbytes +
+                sum(values.nbytes for rollup in self._rollups.values() for values in rollup.values()))
+
+    @property
+    def span(self) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """First and last timestamp."""
+        if len(self.sorted_times) == 0:
+            return None, None
+        return pd.Timestamp(self.sorted_times[0]), pd.Timestamp(self.sorted_times[-1])
+
+    def _build_daily(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Aggregate the time-sorted rows into days with segment reductions."""
+        days = self.sorted_times.astype('datetime64[D]')
+        periods, starts = np.unique(days, return_index=True)
+        rollup = {'periods': periods, 'rows': np.diff(np.append(starts, len(days)))}
+        if len(periods) == 0:
+            for col in self.value_columns:
+                for stat in ('count', 'sum', 'min', 'max'):
+                    rollup[f"{col}:{stat}"] = np.zeros(0)
+            return rollup
+
+        for col in self.value_columns:
+            values = data[col].to_numpy(dtype=np.float64, na_value=np.nan)[self.positions]
+            valid = ~np.isnan(values)
+            rollup[f"{col}:count"] = np.add.reduceat(valid.astype(np.int64), starts)
+            rollup[f"{col}:sum"] = np.add.reduceat(np.where(valid, values, 0.0), starts)
+            # fmin/fmax skip NaN unless a whole day is missing
+            rollup[f"{col}:min"] = np.fmin.reduceat(values, starts)
+            rollup[f"{col}:max"] = np.fmax.reduceat(values, starts)
+        return rollup
+
+    def _coarser(self, freq: str) -> Dict[str, np.ndarray]:
+        """Combine the daily rollup into weeks or months."""
+        daily = self._rollups['D']
+        days = daily['periods']
+        if freq == 'W':
+            # Weeks start on Monday; 1970-01-01 was a Thursday
+            day_numbers = days.astype(np.int64)
+            keys = days - ((day_numbers + 3) % 7).astype('timedelta64[D]')
+        else:
+            keys = days.astype('datetime64[M]').astype('datetime64[D]')
+
+        periods, starts = np.unique(keys, return_index=True)
+        if len(periods) == 0:
+            return dict(daily)
+
+        rollup = {'periods': periods}
+        for name, values in daily.items():
+            if name == 'periods':
+                continue
+            if name.endswith(':min'):
+                rollup[name] = np.fmin.reduceat(values, starts)
+            elif name.endswith(':max'):
+                rollup[name] = np.fmax.reduceat(values, starts)
+            else:
+                rollup[name] = np.add.reduceat(values, starts)
+        return rollup
+
+    def rollup(self, freq: str = 'D', columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Get per-period statistics.
+
+        Args:
+            freq: 'D' (daily), 'W' (weeks starting Monday) or 'M' (monthly)
+            columns: Numeric columns to include. Defaults to all indexed columns.
+
+        Returns:
+            DataFrame indexed by period start with a 'rows' column and
+            '<col>_mean', '<col>_sum', '<col>_min' and '<col>_max' per column
+        """
+        if freq not in ROLLUP_FREQUENCIES:
+            raise ValueError(f"Unknown rollup frequency '{freq}', expected one of {list(ROLLUP_FREQUENCIES)}")
+        if freq not in self._rollups:
+            self._rollups[freq] = self._coarser(freq)
+        rollup = self._rollups[freq]
+
+        result = {'rows': rollup['rows']}
+        for col in (self.value_columns if columns is None else columns):
+            counts = rollup[f"{col}:count"]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[f"{col}_mean"] = np.where(counts > 0, rollup[f"{col}:sum"] / counts, np.nan)
+            result[f"{col}_sum"] = rollup[f"{col}:sum"]
+            result[f"{col}_min"] = rollup[f"{col}:min"]
+            result[f"{col}_max"] = rollup[f"{col}:max"]
+        return pd.DataFrame(result, index=pd.DatetimeIndex(rollup['periods'], name=self.column))
+
+    def suggest_freq(self, max_periods: int = 60) -> str:
+        """
+        Pick the finest rollup with at most max_periods periods.
+
+        Args:
+            max_periods: Largest acceptable number of periods
+
+        Returns:
+            'D', 'W' or 'M'
+        """
+        start, end = self.span
+        if start is None:
+            return 'D'
+        days = (end - start).days + 1
+        if days <= max_periods:
+            return 'D'
+        if days / 7 <= max_periods:
+            return 'W'
+        return 'M'
+
+    def rows_between(self, start: Any = None, end: Any = None) -> np.ndarray:
+        """
+        Get the positions of rows with start <= time < end, in time order.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            Row positions into the indexed data
+        """
+        lo = 0 if start is None else np.searchsorted(self.sorted_times, np.datetime64(pd.Timestamp(start)), side='left')
+        hi = len(self.sorted_times) if end is None else np.searchsorted(
+            self.sorted_times, np.datetime64(pd.Timestamp(end)), side='left')
+        return self.positions[lo:hi]
+
+
+def describe_trend(index: TimeIndex, max_columns: int = 5, tail_periods: int = 12) -> List[str]:
+    """
+    Summarize a time index for a prompt: span, volume and per-column change.
+
+    Args:
+        index: TimeIndex to describe
+        max_columns: Maximum number of numeric columns to report
+        tail_periods: Number of most recent periods to tabulate
+
+    Returns:
+        Lines of text
+    """
+    start, end = index.span
+    if start is None:
+        return [f"  {index.column}: no valid dates"]
+
+    freq = index.suggest_freq()
+    columns = index.value_columns[:max_columns]
+    rollup = index.rollup(freq, columns)
+    label = ROLLUP_FREQUENCIES[freq]
+
+    lines = [f"  {index.column}: {start} to {end}, {len(rollup)} {label} periods"]
+    busiest = rollup['rows'].idxmax()
+    lines.append(f"    rows per period: first={rollup['rows'].iloc[0]}, last={rollup['rows'].iloc[-1]}, "
+                 f"peak={rollup['rows'].max()} ({busiest.date()})")
+
+    for col in columns:
+        means = rollup[f"{col}_mean"].dropna()
+        if len(means) < 2:
+            continue
+        first, last = means.iloc[0], means.iloc[-1]
+        change = f" ({(last - first) / abs(first) * 100:+.1f}%)" if first != 0 else ""
+        lines.append(f"    {col}: mean {first:.2f} -> {last:.2f}{change}, "
+                     f"highest {means.max():.2f} ({means.idxmax().date()}), "
+                     f"lowest {means.min():.2f} ({means.idxmin().date()})")
+
+    table = rollup[['rows'] + [f"{col}_mean" for col in columns]].tail(tail_periods)
+    lines.append(f"    last {len(table)} {label} periods:")
+    lines.extend("      " + line for line in table.round(2).to_string().splitlines())
+    return lines
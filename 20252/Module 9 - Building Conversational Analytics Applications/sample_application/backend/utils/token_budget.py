@@ -0,0 +1,249 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Token accounting and prompt-size budgets for language model calls.
+Prompts are counted before they are sent. When one is over its budget, the
+context sections it was built from are shortened, least important first,
+so statistics tables and sample rows from wide datasets cannot grow a
+prompt without bound. A ledger records tokens in and out and their cost
+for every call, per question and for the whole session.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import logging
+
+from backend.utils.request_scheduler import estimate_tokens
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OMITTED_MARKER = "[... {lines} lines omitted to fit the token budget ...]"
+CUT_MARKER = "[... cut to fit the token budget ...]"
+
+
+@dataclass
+class PromptSection:
+    """A piece of context embedded in a prompt that may be shortened to fit a budget."""
+
+    name: str
+    text: str
+    priority: int = 1  # lower priorities are shortened first
+    min_tokens: int = 64  # never shortened below this
+    tail_fraction: float = 0.0  # share of the kept text taken from the end
+
+
+def truncate_text(text: str, max_tokens: int, tail_fraction: float = 0.0) -> str:
+    """
+    Shorten text to about max_tokens by dropping whole lines.
+
+    Lines are kept from the start, and from the end when tail_fraction is
+    positive, with a marker saying how many lines were left out. A single
+    line longer than the budget is cut off.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Target size
+        tail_fraction: Share of the budget spent on lines from the end
+
+    Returns:
+        The text, shortened if it was over max_tokens
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(max_tokens, 1) * 4
+    lines = text.split('\n')
+    marker_chars = len(OMITTED_MARKER) + 8
+
+    def take(candidates: Sequence[str], budget: int) -> List[str]:
+        kept, used = [], 0
+        for line in candidates:
+            if used + len(line) + 1 > budget:
+                break
+            kept.append(line)
+            used += len(line) + 1
+        return kept
+
+    budget = max(max_chars - marker_chars, 0)
+    tail = take(reversed(lines), int(budget * tail_fraction))[::-1] if tail_fraction > 0 else []
+    head = take(lines[:len(lines) - len(tail)], budget - sum(len(line) + 1 for line in tail))
+    if not head and not tail:
+        return lines[0][:budget] + ' ' + CUT_MARKER
+
+    omitted = len(lines) - len(head) - len(tail)
+    return '\n'.join(head + [OMITTED_MARKER.format(lines=omitted)] + tail)
+
+
+def fit_prompt(prompt: str, sections: Sequence[PromptSection], max_tokens: int) -> Tuple[str, List[str]]:
+    """
+    Shorten a prompt's context sections, least important first, until it fits.
+
+    Sections are found in the prompt by their text. If shortening them is not
+    enough, lines are dropped from the middle of the whole prompt, keeping
+    its opening and the instructions at its end.
+
+    Args:
+        prompt: Full prompt text
+        sections: Context the prompt was built from
+        max_tokens: Largest prompt allowed
+
+    Returns:
+        Tuple of (prompt that fits, names of the shortened sections)
+    """
+    excess = estimate_tokens(prompt) - max_tokens
+    truncated = []
+    for section in sorted(sections, key=lambda s: s.priority):
+        if excess <= 0:
+            break
+        if not section.text or section.text not in prompt:
+            continue
+        size = estimate_tokens(section.text)
+        target = max(section.min_tokens, size - excess)
+        if target >= size:
+            continue
+        prompt = prompt.replace(section.text, truncate_text(section.text, target, section.tail_fraction), 1)
+        excess = estimate_tokens(prompt) - max_tokens
+        truncated.append(section.name)
+
+    if excess > 0:
+        prompt = truncate_text(prompt, max_tokens, tail_fraction=0.5)
+        truncated.append('prompt')
+    return prompt, truncated
+
+
+@dataclass
+class CallUsage:
+    """Tokens and cost of one model call."""
+
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float
+    cached: bool = False
+    truncated: List[str] = field(default_factory=list)
+
+
+class TokenLedger:
+    """Thread-safe record of token usage and cost against an optional budget."""
+
+    def __init__(self, budget: Optional[int] = None, input_cost_per_million: float = 0.0,
+                 output_cost_per_million: float = 0.0, keep_calls: bool = True):
+        """
+        Initialize an empty ledger.
+
+        Args:
+            budget: Tokens in and out allowed, or None for no limit
+            input_cost_per_million: Price of a million prompt tokens
+            output_cost_per_million: Price of a million generated tokens
+            keep_calls: Whether to keep every call's record or only the totals
+        """
+        self.budget = budget
+        self.input_cost_per_million = input_cost_per_million
+        self.output_cost_per_million = output_cost_per_million
+        self.keep_calls = keep_calls
+        self.calls: List[CallUsage] = []
+        self.call_count = 0
+        self.cached_calls = 0
+        self.truncated_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        # Tokens set aside for calls in flight, so concurrent calls cannot overshoot the budget
+        self.reserved = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> int:
+        """Tokens sent and generated, not counting cached responses."""
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """Tokens left in the budget and not reserved, or None without a budget."""
+        if self.budget is None:
+            return None
+        return max(self.budget - self.used - self.reserved, 0)
+
+    def reserve(self, tokens: int, minimum: int = 1) -> int:
+        """
+        Set aside tokens for a call about to be made.
+
+        Args:
+            tokens: Tokens wanted
+            minimum: Fewest tokens worth reserving
+
+        Returns:
+            Tokens reserved, at most `tokens`; 0 if fewer than `minimum` are
+            left. Without a budget, `tokens`.
+        """
+        with self._lock:
+            if self.budget is None:
+                return tokens
+            granted = min(tokens, max(self.budget - self.used - self.reserved, 0))
+            if granted < minimum:
+                return 0
+            self.reserved += granted
+            return granted
+
+    def release(self, tokens: int):
+        """Return reserved tokens, once the call has been recorded or did not happen."""
+        if self.budget is None or tokens <= 0:
+            return
+        with self._lock:
+            self.reserved = max(self.reserved - tokens, 0)
+
+    def record(self, prompt_tokens: int, completion_tokens: int, cached: bool = False,
+               truncated: Optional[List[str]] = None) -> CallUsage:
+        """
+        Record one call.
+
+        Args:
+            prompt_tokens: Tokens sent
+            completion_tokens: Tokens generated
+            cached: Whether the response came from the cache, costing nothing
+            truncated: Names of the prompt sections that were shortened
+
+        Returns:
+            The call's usage
+        """
+        cost = 0.0 if cached else (prompt_tokens * self.input_cost_per_million +
+                                   completion_tokens * self.output_cost_per_million) / 1_000_000
+        usage = CallUsage(prompt_tokens, completion_tokens, cost, cached, list(truncated or []))
+        with self._lock:
+            self.call_count += 1
+            if cached:
+                self.cached_calls += 1
+            else:
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += completion_tokens
+                self.cost += cost
+            if usage.truncated:
+                self.truncated_calls += 1
+            if self.keep_calls:
+                self.calls.append(usage)
+        return usage
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the totals, and each call's usage if kept.
+
+        Returns:
+            Dictionary of token counts, cost and budget
+        """
+        with self._lock:
+            summary = {
+                'calls': self.call_count,
+                'cached_calls': self.cached_calls,
+                'truncated_calls': self.truncated_calls,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'total_tokens': self.used,
+                'cost': self.cost,
+                'budget': self.budget,
+                'remaining': self.remaining
+            }
+            if self.keep_calls:
+                summary['per_call'] = [vars(call).copy() for call in self.calls]
+        return summary
@@ -0,0 +1,381 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Versioned dataset history for the conversational analytics application.
+Each change to a dataset is recorded as a delta against the previous version:
+the columns it replaced, the mask of rows it kept and the rows it appended.
+Untouched columns are shared with earlier versions, so the history costs
+memory in proportion to what changed, and undo/redo rebuild a version by
+replaying deltas or return it straight from a small cache of recent frames.
+The profiles of recent versions are cached too, so undo/redo need not
+profile the data again.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Optional
+import logging
+
+from backend.utils.memory_budget import estimate_frame_bytes, estimate_series_bytes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Materialized frames kept for instant undo/redo and comparisons
+MAX_MATERIALIZED = 2
+
+
+@dataclass
+class DatasetVersion:
+    """One version of a dataset, stored as a delta against the previous one."""
+
+    version_id: int
+    label: str
+    columns: List[str]
+    rows: int
+    changed: Dict[str, pd.Series]  # replaced columns, at this version's length
+    keep_mask: Optional[np.ndarray] = None  # over the previous version's rows
+    appended: Optional[pd.DataFrame] = None  # rows added after the kept ones
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+
+    @property
+    def rows_removed(self) -> int:
+        """Number of rows of the previous version dropped by this one."""
+        return 0 if self.keep_mask is None else int((~self.keep_mask).sum())
+
+    @property
+    def rows_appended(self) -> int:
+        """Number of rows added by this version."""
+        return 0 if self.appended is None else len(self.appended)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Memory held by the delta."""
+        total = sum(estimate_series_bytes(series) for series in self.changed.values())
+        if self.keep_mask is not None:
+            total += self.keep_mask.nbytes
+        if self.appended is not None:
+            total += estimate_frame_bytes(self.appended)
+        return total
+
+
+class VersionStore:
+    """Linear undo/redo history of one dataset."""
+
+    def __init__(self, max_materialized: int = MAX_MATERIALIZED):
+        """
+        Initialize an empty history.
+
+        Args:
+            max_materialized: Number of recently used full frames to keep
+        """
+        self.max_materialized = max(max_materialized, 1)
+        self._versions: List[DatasetVersion] = []
+        self._frames: 'OrderedDict[int, pd.DataFrame]' = OrderedDict()
+        # DataProfile of recently current versions, owned by the caller
+        self._profiles: 'OrderedDict[int, Any]' = OrderedDict()
+        self.current: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    @property
+    def can_undo(self) -> bool:
+        """Whether there is an earlier version."""
+        return self.current is not None and self.current > 0
+
+    @property
+    def can_redo(self) -> bool:
+        """Whether an undone version can be restored."""
+        return self.current is not None and self.current < len(self._versions) - 1
+
+    def clear(self):
+        """Drop the whole history."""
+        self._versions = []
+        self._frames.clear()
+        self._profiles.clear()
+        self.current = None
+
+    def reset(self, data: pd.DataFrame, label: str = 'loaded'):
+        """
+        Start a new history from freshly loaded data.
+
+        Args:
+            data: The loaded DataFrame, which becomes version 0
+            label: Description of the version
+        """
+        self.clear()
+        # Column references share the loaded buffers; nothing is copied
+        root = DatasetVersion(0, label, list(data.columns), len(data),
+                              changed={col: data[col] for col in data.columns})
+        self._versions.append(root)
+        self.current = 0
+        self._remember(0, data)
+
+    def commit(self, data: pd.DataFrame, label: str, changed_columns: Optional[List[str]] = None,
+               keep_mask: Optional[np.ndarray] = None, appended: Optional[pd.DataFrame] = None,
+               metrics: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Record a new version after the current one, discarding undone versions.
+
+        Args:
+            data: The new DataFrame
+            label: Description of the change
+            changed_columns: Columns whose values changed; defaults to all
+            keep_mask: Rows of the current version that were kept, if rows were dropped
+            appended: Rows added after the kept rows, if any
+            metrics: Per-step metrics of the change
+
+        Returns:
+            The new version id
+        """
+        if self.current is None:
+            self.reset(data, label)
+            return 0
+
+        # A new change after an undo starts a new branch of history
+        for version_id in range(self.current + 1, len(self._versions)):
+            self._frames.pop(version_id, None)
+            self._profiles.pop(version_id, None)
+        del self._versions[self.current + 1:]
+
+        if changed_columns is None:
+            changed_columns = list(data.columns)
+        previous_columns = set(self._versions[self.current].columns)
+        # Columns that did not exist before must be stored in full
+        changed_columns = set(changed_columns) | {col for col in data.columns if col not in previous_columns}
+
+        version = DatasetVersion(
+            len(self._versions), label, list(data.columns), len(data),
+            changed={col: data[col] for col in data.columns if col in changed_columns},
+            keep_mask=None if keep_mask is None or keep_mask.all() else keep_mask,
+            appended=appended,
+            metrics=list(metrics or [])
+        )
+        self._versions.append(version)
+        self.current = version.version_id
+        self._remember(version.version_id, data)
+
+        logger.info(f"Recorded version {version.version_id} ({label}): {len(version.changed)} columns changed, "
+                    f"{version.rows_removed} rows removed, {version.rows_appended} rows appended")
+        return version.version_id
+
+    def _remember(self, version_id: int, data: pd.DataFrame):
+        """Cache a materialized frame, evicting the least recently used ones."""
+        # A shallow copy so column assignments on the caller's frame do not leak in
+        self._frames[version_id] = data.copy(deep=False)
+        self._frames.move_to_end(version_id)
+        while len(self._frames) > self.max_materialized:
+            self._frames.popitem(last=False)
+
+    def remember_profile(self, profile: Any, version_id: Optional[int] = None):
+        """
+        Cache the profile of a version, evicting the least recently used ones.
+
+        The profile must not be updated in place afterwards; update a copy.
+
+        Args:
+            profile: DataProfile of the version's data
+            version_id: Version it describes; defaults to the current one
+        """
+        version_id = self.current if version_id is None else version_id
+        if version_id is None:
+            return
+        self._profiles[version_id] = profile
+        self._profiles.move_to_end(version_id)
+        while len(self._profiles) > self.max_materialized:
+            self._profiles.popitem(last=False)
+
+    def cached_profile(self, version_id: int) -> Optional[Any]:
+        """Get the cached profile of a version, or None if it was not kept."""
+        if version_id not in self._profiles:
+            return None
+        self._profiles.move_to_end(version_id)
+        return self._profiles[version_id]
+
+    def profile_memory_usage(self) -> int:
+        """Memory held by cached profiles of versions other than the current one."""
+        return sum(profile.nbytes for version_id, profile in list(self._profiles.items())
+                   if version_id != self.current)
+
+    def materialize(self, version_id: int) -> pd.DataFrame:
+        """
+        Rebuild the full DataFrame of a version.
+
+        Deltas are replayed forward from the nearest cached version or the root.
+
+        Args:
+            version_id: Version to rebuild
+
+        Returns:
+            The version's DataFrame
+        """
+        if version_id in self._frames:
+            self._frames.move_to_end(version_id)
+            return self._frames[version_id].copy(deep=False)
+
+        start = version_id
+        while start > 0 and start not in self._frames:
+            start -= 1
+
+        if start in self._frames:
+            frame = self._frames[start].copy(deep=False)
+        else:
+            root = self._versions[0]
+            frame = pd.DataFrame(root.changed, columns=root.columns)
+
+        for version in self._versions[start + 1:version_id + 1]:
+            if version.keep_mask is not None:
+                frame = frame[version.keep_mask]
+            if version.appended is not None:
+                frame = pd.concat([frame, version.appended])
+            frame = frame.copy(deep=False)
+            for col, series in version.changed.items():
+                # Positional assignment; the delta was recorded on the same rows
+                frame[col] = series.array
+            frame = frame[version.columns]
+
+        self._remember(version_id, frame)
+        return frame.copy(deep=False)
+
+    def undo(self) -> Optional[pd.DataFrame]:
+        """
+        Step back one version.
+
+        Returns:
+            The previous version's DataFrame, or None if there is none
+        """
+        if not self.can_undo:
+            return None
+        self.current -= 1
+        return self.materialize(self.current)
+
+    def redo(self) -> Optional[pd.DataFrame]:
+        """
+        Step forward to the version that was undone.
+
+        Returns:
+            The next version's DataFrame, or None if there is none
+        """
+        if not self.can_redo:
+            return None
+        self.current += 1
+        return self.materialize(self.current)
+
+    def drop_frames(self) -> int:
+        """
+        Forget the cached materialized frames and the profiles of versions
+        other than the current one; versions are rebuilt on demand.
+
+        Returns:
+            Number of frames dropped
+        """
+        dropped = len(self._frames)
+        self._frames.clear()
+        current = self._profiles.get(self.current)
+        self._profiles.clear()
+        if current is not None:
+            self._profiles[self.current] = current
+        return dropped
+
+    def replace_buffer(self, old: pd.Series, new: pd.Series):
+        """
+        Point stored columns that share old's buffer at new instead.
+
+        Used when a column moves to a memory-mapped file, so the history does
+        not keep the in-memory copy alive.
+
+        Args:
+            old: Column as it was stored
+            new: The same values in their new home
+        """
+        old_values = old.to_numpy()
+        for version in self._versions:
+            for col, series in version.changed.items():
+                if len(series) == len(old) and np.may_share_memory(series.to_numpy(), old_values):
+                    version.changed[col] = new
+        self._frames.clear()
+
+    def version(self, version_id: int) -> DatasetVersion:
+        """Get the record of a version."""
+        return self._versions[version_id]
+
+    def memory_usage(self) -> int:
+        """Memory held by the deltas after the loaded version."""
+        return sum(version.memory_bytes for version in self._versions[1:])
+
+    def history(self) -> List[Dict[str, Any]]:
+        """
+        Describe every version.
+
+        Returns:
+            One dictionary per version, oldest first
+        """
+        return [{
+            'version': v.version_id,
+            'label': v.label,
+            'rows': v.rows,
+            'columns': len(v.columns),
+            'changed_columns': list(v.changed) if v.version_id > 0 else [],
+            'rows_removed': v.rows_removed,
+            'rows_appended': v.rows_appended,
+            'memory_bytes': v.memory_bytes if v.version_id > 0 else 0,
+            'current': v.version_id == self.current
+        } for v in self._versions]
+
+    def changed_between(self, first: int, second: int) -> List[str]:
+        """
+        Get the columns whose values changed between two versions.
+
+        Args:
+            first: Earlier version id
+            second: Later version id
+
+        Returns:
+            Column names in the later version's order
+        """
+        first, second = sorted((first, second))
+        changed = set()
+        for version in self._versions[first + 1:second + 1]:
+            changed.update(version.changed)
+        return [col for col in self._versions[second].columns if col in changed]
+
+
+def compare_frames(before: pd.DataFrame, after: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
+    """
+    Summarize how a set of columns differ between two frames.
+
+    Args:
+        before: Earlier DataFrame
+        after: Later DataFrame
+        columns: Columns to compare
+
+    Returns:
+        Dictionary with row counts and per-column missing counts and means
+    """
+    comparison = {
+        'rows': {'before': len(before), 'after': len(after)},
+        'columns': {}
+    }
+    for col in columns:
+        entry = {
+            'missing': {
+                'before': int(before[col].isna().sum()) if col in before else None,
+                'after': int(after[col].isna().sum()) if col in after else None
+            },
+            'dtype': {
+                'before': str(before[col].dtype) if col in before else None,
+                'after': str(after[col].dtype) if col in after else None
+            }
+        }
+        if all(col in frame and pd.api.types.is_numeric_dtype(frame[col]) and
+               not pd.api.types.is_bool_dtype(frame[col]) for frame in (before, after)):
+            entry['mean'] = {'before': float(before[col].mean()), 'after': float(after[col].mean())}
+        comparison['columns'][col] = entry
+    return comparison
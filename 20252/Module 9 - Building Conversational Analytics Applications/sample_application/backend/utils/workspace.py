@@ -0,0 +1,494 @@
+# install streamlit transformers torch
+# pip install streamlit transformers torch
+
+"""
+Multi-dataset workspace for the conversational analytics application.
+Holds several named tables that are loaded lazily, accounts for their memory
+together, spills the least recently used ones to disk when over budget and
+joins tables into new ones.
+"""
+
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+import pandas as pd
+from typing import Dict, Any, Tuple, List, Optional
+import logging
+
+from backend.utils.data_processor import DataProcessor
+from backend.utils.dataset_cache import DatasetCache
+from backend.utils.memory_budget import get_memory_manager
+from backend.utils.string_pool import align_categories, get_default_pool
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOIN_TYPES = ('inner', 'left', 'right', 'outer')
+
+
+def _default_memory_budget() -> Optional[int]:
+    """Loaded tables may use up to half of physical memory."""
+    budget_mb = os.getenv('WORKSPACE_MEMORY_MB')
+    if budget_mb:
+        return int(budget_mb) * 1024 * 1024
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (AttributeError, ValueError, OSError):  # Not available on Windows
+        return None
+
+
+@dataclass
+class WorkspaceTable:
+    """A named table in the workspace and where its data currently lives."""
+    name: str
+    source_path: Optional[str] = None
+    sheet_name: Optional[str] = None
+    processor: Optional[DataProcessor] = None
+    spill_key: Optional[str] = None
+    load_stats: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def state(self) -> str:
+        """'loaded', 'spilled' (on disk) or 'unloaded' (not read yet)."""
+        if self.processor is not None and self.processor.data is not None:
+            return 'loaded'
+        return 'spilled' if self.spill_key else 'unloaded'
+
+    @property
+    def memory_bytes(self) -> int:
+        """Memory used by the loaded data and its undo history, 0 when not in memory."""
+        if self.state != 'loaded':
+            return 0
+        # Memory-mapped columns are paged in and out by the OS and not counted
+        return self.processor.memory_usage()['resident']
+
+
+class _TableFrames(Mapping):
+    """Read-only mapping of table names to copy-on-write frames, loaded on access."""
+
+    def __init__(self, workspace: 'Workspace'):
+        self._workspace = workspace
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        processor = self._workspace.get_processor(name)
+        if processor is None:
+            raise KeyError(name)
+        return processor.get_data_for_analysis()
+
+    def __iter__(self):
+        return iter(self._workspace.table_names())
+
+    def __len__(self) -> int:
+        return len(self._workspace.table_names())
+
+
+class Workspace:
+    """Named tables sharing one memory budget, with LRU spill to disk."""
+
+    def __init__(self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        """
+        Initialize the workspace.
+
+        Args:
+            memory_budget: Maximum bytes of loaded table data. Defaults to the
+                WORKSPACE_MEMORY_MB environment variable or half of physical memory.
+            spill_dir: Directory for spilled tables. Defaults to a new temp directory.
+        """
+        self.memory_budget = memory_budget or _default_memory_budget()
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix='workspace_spill_')
+        self.spills = 0
+        self.restores = 0
+        self.active_table = None
+
+        # Spilled tables must never be evicted, so the spill store is unbounded
+        self._spill_cache = DatasetCache(self.spill_dir, max_bytes=2 ** 62)
+        self._tables: Dict[str, WorkspaceTable] = {}
+        self._recency = OrderedDict()  # loaded table names, least recently used first
+
+        # Under process-wide memory pressure inactive tables are spilled before
+        # any column is memory-mapped. Their processors report the memory
+        # themselves, so the workspace reports none.
+        get_memory_manager().register(f"workspace-{id(self)}", 'dataset', self._no_usage,
+                                      self._release_tables, priority=0)
+        logger.info("Workspace initialized")
+
+    def table_names(self) -> List[str]:
+        """Get the table names in the order they were added."""
+        return list(self._tables)
+
+    def add_table(self, name: str, file_path: str, sheet_name: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Register a CSV or Excel file as a table. The file is only read on first use.
+
+        Args:
+            name: Table name
+            file_path: Path to the CSV or Excel file
+            sheet_name: Worksheet to use for Excel files. Defaults to the first sheet.
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if not os.path.exists(file_path):
+            return False, f"File not found: {file_path}"
+
+        self.remove_table(name)
+        self._tables[name] = WorkspaceTable(name=name, source_path=file_path, sheet_name=sheet_name)
+        if self.active_table is None:
+            self.active_table = name
+        logger.info(f"Registered table '{name}' from {file_path}")
+        return True, f"Registered table '{name}'"
+
+    def add_dataframe(self, name: str, data: pd.DataFrame,
+                      load_stats: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        Add an in-memory DataFrame as a table.
+
+        Args:
+            name: Table name
+            data: DataFrame holding the table
+            load_stats: Statistics describing where the data came from
+
+        Returns:
+            Tuple of (success, message)
+        """
+        processor = DataProcessor()
+        success, message = processor.load_dataframe(data, load_stats)
+        if not success:
+            return False, message
+
+        self.remove_table(name)
+        self._tables[name] = WorkspaceTable(name=name, processor=processor,
+                                            load_stats=processor.load_stats)
+        if self.active_table is None:
+            self.active_table = name
+        self._touch(name)
+        return True, f"Added table '{name}': {message[len('Successfully loaded '):]}"
+
+    def remove_table(self, name: str):
+        """Drop a table and any spilled copy of it."""
+        table = self._tables.pop(name, None)
+        if table is None:
+            return
+
+        self._recency.pop(name, None)
+        if table.spill_key:
+            self._spill_cache.remove(table.spill_key)
+        if self.active_table == name:
+            self.active_table = next(iter(self._tables), None)
+
+    def set_active(self, name: str) -> Tuple[bool, str]:
+        """
+        Make a table the one questions are asked about.
+
+        Args:
+            name: Table name
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if name not in self._tables:
+            return False, f"Unknown table '{name}'"
+        self.active_table = name
+        return True, f"Active table is now '{name}'"
+
+    def load(self, name: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Bring a table into memory, reading or restoring it if needed.
+
+        Args:
+            name: Table name. Defaults to the active table.
+
+        Returns:
+            Tuple of (success, message)
+        """
+        name = name or self.active_table
+        table = self._tables.get(name)
+        if table is None:
+            return False, f"Unknown table '{name}'"
+
+        message = f"Table '{name}' is loaded"
+        if table.state == 'unloaded':
+            processor = DataProcessor()
+            success, message = processor.load_file(table.source_path, table.sheet_name)
+            if not success:
+                logger.error(f"Could not load table '{name}': {message}")
+                return False, message
+            table.processor = processor
+            table.load_stats = processor.load_stats
+        elif table.state == 'spilled':
+            self._restore(table)
+
+        self._touch(name)
+        return True, message
+
+    def get_processor(self, name: Optional[str] = None) -> Optional[DataProcessor]:
+        """
+        Get the processor holding a table, loading or restoring it if needed.
+
+        Args:
+            name: Table name. Defaults to the active table.
+
+        Returns:
+            DataProcessor with the table loaded, or None if it cannot be loaded
+        """
+        name = name or self.active_table
+        success, _ = self.load(name)
+        return self._tables[name].processor if success else None
+
+    def frames(self) -> Mapping:
+        """
+        Get a lazy mapping of table names to DataFrames for generated code.
+
+        Returns:
+            Mapping that loads a table the first time it is looked up
+        """
+        return _TableFrames(self)
+
+    def _touch(self, name: str):
+        """Mark a table as most recently used and enforce the memory budget."""
+        self._recency[name] = None
+        self._recency.move_to_end(name)
+        self._enforce_budget(keep=name)
+
+    def memory_usage(self) -> int:
+        """Get the total bytes of loaded table data."""
+        return sum(table.memory_bytes for table in self._tables.values())
+
+    def _enforce_budget(self, keep: str):
+        """Spill least recently used tables until loaded data fits the budget."""
+        if self.memory_budget is None:
+            return
+
+        for name in list(self._recency):
+            if self.memory_usage() <= self.memory_budget:
+                return
+            if name == keep:
+                continue
+            self._spill(self._tables[name])
+
+        excess = self.memory_usage() - self.memory_budget
+        if excess > 0 and self._tables[keep].processor is not None:
+            # Keep the table loaded but move its coldest columns out of memory
+            self._tables[keep].processor.spill_cold_columns(excess)
+        if self.memory_usage() > self.memory_budget:
+            logger.warning(f"Table '{keep}' alone exceeds the workspace memory budget")
+
+    def _no_usage(self) -> int:
+        return 0
+
+    def _release_tables(self, nbytes: int) -> int:
+        """Spill least recently used tables other than the active one."""
+        freed = 0
+        for name in list(self._recency):
+            if freed >= nbytes:
+                break
+            if name == self.active_table:
+                continue
+            before = self.memory_usage()
+            self._spill(self._tables[name])
+            freed += before - self.memory_usage()
+        return freed
+
+    def _spill(self, table: WorkspaceTable):
+        """Write a table to the spill store and release its memory."""
+        self._recency.pop(table.name, None)
+        processor = table.processor
+
+        # Streamed tables only hold a sample; their sketches cannot be rebuilt
+        if processor.out_of_core:
+            return
+
+        if not self._spill_cache.available:
+            logger.warning("pyarrow not installed - cannot spill tables, keeping them in memory")
+            return
+
+        key = f"{table.name.encode('utf-8').hex()}-{processor.generation}"
+        if not self._spill_cache.put(key, processor.data, processor.load_stats):
+            logger.warning(f"Could not spill table '{table.name}', keeping it in memory")
+            return
+
+        if table.spill_key and table.spill_key != key:
+            self._spill_cache.remove(table.spill_key)
+        table.spill_key = key
+        table.load_stats = processor.load_stats
+        table.processor = None
+        self.spills += 1
+        logger.info(f"Spilled table '{table.name}' to disk")
+
+    def _restore(self, table: WorkspaceTable):
+        """Bring a spilled table back into memory."""
+        processor = DataProcessor()
+        processor.load_dataframe(self._spill_cache.get(table.spill_key), table.load_stats)
+        table.processor = processor
+        self.restores += 1
+        logger.info(f"Restored table '{table.name}' from disk")
+
+    def join(self, left: str, right: str, on: Optional[List[str]] = None,
+             left_on: Optional[List[str]] = None, right_on: Optional[List[str]] = None,
+             how: str = 'inner', name: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Hash-join two tables into a new table.
+
+        Without explicit keys the tables are joined on their shared columns,
+        preferring id-like columns.
+
+        Args:
+            left: Left table name
+            right: Right table name
+            on: Key columns present in both tables
+            left_on: Key columns of the left table
+            right_on: Key columns of the right table
+            how: 'inner', 'left', 'right' or 'outer'
+            name: Name of the result table. Defaults to '<left>_<right>'.
+
+        Returns:
+            Tuple of (success, message)
+        """
+        try:
+            if how not in JOIN_TYPES:
+                return False, f"Unsupported join type '{how}', use one of {', '.join(JOIN_TYPES)}"
+
+            left_processor = self.get_processor(left)
+            right_processor = self.get_processor(right)
+            if left_processor is None or right_processor is None:
+                missing = left if left_processor is None else right
+                return False, f"Table '{missing}' is not available"
+
+            left_data = left_processor.get_data_for_analysis()
+            right_data = right_processor.get_data_for_analysis()
+
+            if on is None and left_on is None and right_on is None:
+                on = find_join_keys(left_data, right_data)
+                if not on:
+                    return False, f"Tables '{left}' and '{right}' share no columns to join on"
+
+            left_keys = on or left_on or []
+            right_keys = on or right_on or []
+            for table_name, data, keys in ((left, left_data, left_keys), (right, right_data, right_keys)):
+                missing = [key for key in keys if key not in data.columns]
+                if missing:
+                    return False, f"Table '{table_name}' has no column(s) {', '.join(missing)}"
+
+            # Encoded keys with one shared dictionary are matched on their codes
+            for left_key, right_key in zip(left_keys, right_keys):
+                keys = (left_data[left_key], right_data[right_key])
+                if not any(isinstance(key.dtype, pd.CategoricalDtype) for key in keys):
+                    continue
+                if not all(isinstance(key.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(key)
+                           for key in keys):
+                    continue
+                pool = get_default_pool()
+                left_values, right_values = align_categories(pool.encode(keys[0]), pool.encode(keys[1]), pool)
+                left_data = left_data.assign(**{left_key: left_values})
+                right_data = right_data.assign(**{right_key: right_values})
+
+            joined = pd.merge(left_data, right_data, how=how, on=on, left_on=left_on,
+                              right_on=right_on, suffixes=(f'_{left}', f'_{right}'))
+
+            name = name or f"{left}_{right}"
+            load_stats = {'source': 'join', 'left': left, 'right': right, 'how': how,
+                          'keys': list(left_keys) if on else [list(left_keys), list(right_keys)]}
+            success, message = self.add_dataframe(name, joined, load_stats)
+            if not success:
+                return False, message
+
+            logger.info(f"Joined '{left}' and '{right}' on {left_keys} into '{name}'")
+            return True, (f"Joined '{left}' and '{right}' ({how} join on {', '.join(left_keys)}) "
+                          f"into '{name}' with {len(joined)} rows")
+
+        except Exception as e:
+            logger.error(f"Error joining tables: {str(e)}")
+            return False, f"Error joining tables: {str(e)}"
+
+    def list_tables(self) -> List[Dict[str, Any]]:
+        """
+        Describe every table without loading any of them.
+
+        Returns:
+            List of dictionaries with name, state, shape and memory usage
+        """
+        tables = []
+        for table in self._tables.values():
+            info = {
+                'name': table.name,
+                'state': table.state,
+                'active': table.name == self.active_table,
+                'memory_bytes': table.memory_bytes,
+                'source': table.source_path or table.load_stats.get('source')
+            }
+            if table.state == 'loaded':
+                info['shape'] = table.processor.data_info.get('shape')
+                info['columns'] = table.processor.data_info.get('columns')
+            tables.append(info)
+        return tables
+
+    def describe_tables(self) -> str:
+        """
+        Summarize the tables for LLM prompts.
+
+        Returns:
+            One line per table with its shape and columns where known
+        """
+        lines = []
+        for info in self.list_tables():
+            if 'shape' in info:
+                rows, cols = info['shape']
+                lines.append(f"- {info['name']}: {rows} rows x {cols} columns "
+                             f"({', '.join(map(str, info['columns']))})")
+            else:
+                lines.append(f"- {info['name']}: {info['state']}")
+        return "\n".join(lines)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get workspace memory statistics.
+
+        Returns:
+            Dictionary with table counts, memory usage and spill counters
+        """
+        states = [table.state for table in self._tables.values()]
+        return {
+            'tables': len(states),
+            'loaded': states.count('loaded'),
+            'spilled': states.count('spilled'),
+            'memory_bytes': self.memory_usage(),
+            'memory_budget': self.memory_budget,
+            'spills': self.spills,
+            'restores': self.restores,
+            'string_pool': get_default_pool().stats()
+        }
+
+    def clear(self):
+        """Remove every table and delete the spill directory."""
+        self._tables.clear()
+        self._recency.clear()
+        self.active_table = None
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._spill_cache = DatasetCache(self.spill_dir, max_bytes=2 ** 62)
+        logger.info("Workspace cleared")
+
+
+def find_join_keys(left: pd.DataFrame, right: pd.DataFrame) -> List[str]:
+    """
+    Guess the columns two tables should be joined on.
+
+    Args:
+        left: Left DataFrame
+        right: Right DataFrame
+
+    Returns:
+        A single shared id-like column if there is one, otherwise every shared
+        column with compatible dtypes
+    """
+    def compatible(col: str) -> bool:
+        left_numeric = pd.api.types.is_numeric_dtype(left[col])
+        return left_numeric == pd.api.types.is_numeric_dtype(right[col])
+
+    shared = [col for col in left.columns if col in right.columns and compatible(col)]
+    id_like = [col for col in shared if str(col).lower() == 'id' or str(col).lower().endswith(('_id', 'id'))]
+    return id_like[:1] if id_like else shared
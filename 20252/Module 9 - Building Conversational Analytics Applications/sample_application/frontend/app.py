@@ -139,7 +139,9 @@ def render_upload_tab(file_upload: FileUploadComponent, session_manager: Session
                 session_manager.set_analytics_system(analytics_system)
                 
                 # Load data
-                load_result = analytics_system.load_data(uploaded_file_path)
+                load_result = analytics_system.load_data(
+                    uploaded_file_path, sheet_name=file_upload.selected_sheet
+                )
                 
                 if load_result['success']:
                     session_manager.set_data_loaded(
@@ -183,10 +185,11 @@ def render_chat_tab(chat_interface: ChatInterfaceComponent, session_manager: Ses
     if question:
         try:
             session_manager.set_analysis_in_progress(True)
-            st.rerun()
             
-            # Process the question
-            result = analytics_system.process_question(question)
+            # Process the question, showing progress and the summary as they arrive
+            result = chat_interface.render_streaming_analysis(analytics_system.process_question_stream(question))
+            if result is None:
+                result = {'success': False, 'message': 'The analysis ended without a result'}
             
             if result['success']:
                 # Add to conversation history
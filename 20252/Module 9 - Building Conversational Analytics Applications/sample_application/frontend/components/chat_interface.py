@@ -8,13 +8,23 @@ Handles the conversation flow and displays analysis results.
 
 import streamlit as st
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Status line shown while each workflow stage runs
+STAGE_LABELS = {
+    'manager': "🤖 Manager agent coordinating workflow...",
+    'data_cleaner': "🧹 Data cleaner agent analyzing data quality...",
+    'analyst': "📊 Analyst agent performing statistical analysis...",
+    'code_executor': "💻 Code executor agent generating analysis code...",
+    'report_writer': "📝 Report writer agent creating final report...",
+    'summary': "✍️ Writing the executive summary..."
+}
+
 
 class ChatInterfaceComponent:
     """Component for handling the chat interface and conversation flow."""
@@ -137,6 +147,50 @@ class ChatInterfaceComponent:
         progress_bar.empty()
         status_text.empty()
     
+    def render_streaming_analysis(self, events: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Show a question's progress live and stream the summary as it is written.
+        
+        Args:
+            events: Events from ConversationalAnalytics.process_question_stream
+            
+        Returns:
+            The final result dictionary, or None if the stream ended without one
+        """
+        st.subheader("🔄 Analysis in Progress")
+        status_text = st.empty()
+        summary_box = st.empty()
+        
+        summary = ""
+        result = None
+        for event in events:
+            if event['type'] == 'status':
+                status_text.text(STAGE_LABELS.get(event['stage'], f"Running {event['stage']}..."))
+            elif event['type'] == 'token':
+                summary += event['text']
+                # The cursor shows more text is coming
+                summary_box.markdown(summary + "▌")
+            elif event['type'] == 'result':
+                result = event['result']
+        
+        status_text.empty()
+        if summary:
+            summary_box.markdown(summary)
+        
+        timing = (result or {}).get('timing', {})
+        if 'first_token_seconds' in timing:
+            st.caption(f"First words after {timing['first_token_seconds']:.2f}s "
+                       f"(summary started streaming {timing['summary_ttfb_seconds']:.2f}s after it was requested), "
+                       f"complete after {timing['total_seconds']:.2f}s")
+        
+        usage = (result or {}).get('token_usage', {})
+        if usage.get('calls'):
+            truncated = f", {usage['truncated_calls']} prompts shortened to fit" if usage['truncated_calls'] else ""
+            st.caption(f"{usage['calls']} model calls ({usage['cached_calls']} cached): "
+                       f"{usage['prompt_tokens']:,} tokens in, {usage['completion_tokens']:,} out, "
+                       f"about ${usage['cost']:.4f}{truncated}")
+        return result
+    
     def _display_analysis_results(self):
         """Display the current analysis results."""
         if not st.session_state.current_analysis:
@@ -180,7 +234,10 @@ class ChatInterfaceComponent:
         st.subheader("🤖 Agent Results")
         
         for agent_name, results in agent_results.items():
-            if agent_name == 'data_cleaner' and results:
+            if results and results.get('success') is False and agent_name != 'code_executor':
+                st.error(f"**{agent_name.replace('_', ' ').title()}:** {results.get('error')}")
+            
+            elif agent_name == 'data_cleaner' and results:
                 with st.expander("🧹 Data Cleaning Results", expanded=False):
                     if 'quality_analysis' in results:
                         st.write("**Quality Analysis:**")
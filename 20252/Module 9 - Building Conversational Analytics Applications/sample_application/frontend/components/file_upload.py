@@ -3,7 +3,7 @@
 
 """
 File upload component for the Streamlit frontend.
-Handles CSV file upload and validation.
+Handles CSV and Excel file upload and validation.
 """
 
 import streamlit as st
@@ -13,6 +13,10 @@ import os
 from typing import Optional, Tuple
 import logging
 
+from backend.utils.csv_ingest import CsvIngestor
+from backend.utils.dataset_cache import get_default_cache
+from backend.utils.excel_ingest import ExcelIngestor
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +28,8 @@ class FileUploadComponent:
     def __init__(self):
         """Initialize the file upload component."""
         self.supported_types = ['csv', 'xlsx', 'xls']
+        # Worksheet chosen for the last uploaded workbook
+        self.selected_sheet = None
         logger.info("File upload component initialized")
     
     def render_upload_section(self) -> Optional[str]:
@@ -142,16 +148,16 @@ class FileUploadComponent:
             # Try to preview the data
             try:
                 if file_path.endswith('.csv'):
-                    df = pd.read_csv(file_path, nrows=5)
+                    self.selected_sheet = None
+                    df, shape = self._preview_csv(uploaded_file, file_path)
                 else:
-                    df = pd.read_excel(file_path, nrows=5)
+                    df, shape = self._preview_excel(file_path)
                 
                 st.subheader("📊 Data Preview")
                 st.dataframe(df, use_container_width=True)
                 
                 # Show data shape
-                full_df = pd.read_csv(file_path) if file_path.endswith('.csv') else pd.read_excel(file_path)
-                st.info(f"Full dataset: {full_df.shape[0]} rows × {full_df.shape[1]} columns")
+                st.info(f"Full dataset: {shape[0]} rows × {shape[1]} columns")
                 
             except Exception as e:
                 st.warning(f"Could not preview data: {str(e)}")
@@ -161,6 +167,59 @@ class FileUploadComponent:
             logger.error(f"Error displaying file info: {str(e)}")
             st.error(f"Error displaying file information: {str(e)}")
     
+    def _preview_csv(self, uploaded_file, file_path: str) -> Tuple[pd.DataFrame, Tuple[int, int]]:
+        """
+        Get a preview and the shape of an uploaded CSV file.
+        
+        The file is parsed once into the dataset cache, so the preview, the
+        row count and the later backend load all read the cached copy.
+        
+        Args:
+            uploaded_file: Streamlit uploaded file object
+            file_path: Path to saved file
+            
+        Returns:
+            Tuple of (preview DataFrame, (rows, columns))
+        """
+        cache = get_default_cache()
+        if not cache.available:
+            df, _ = CsvIngestor().read(file_path)
+            return df.head(5), df.shape
+        
+        key = cache.key_for_bytes(uploaded_file.getvalue())
+        cache.register_file(file_path, key)
+        
+        if not cache.contains(key):
+            df, load_stats = CsvIngestor().read(file_path)
+            load_stats['cache'] = 'miss'
+            cache.put(key, df, load_stats)
+            return df.head(5), df.shape
+        
+        return cache.head(key, 5), cache.get_metadata(key)['shape']
+    
+    def _preview_excel(self, file_path: str) -> Tuple[pd.DataFrame, Tuple[int, int]]:
+        """
+        Let the user pick a worksheet and get its preview and shape.
+        
+        Only the first rows are read; the shape comes from the workbook
+        metadata, so the sheet is not loaded here.
+        
+        Args:
+            file_path: Path to saved file
+            
+        Returns:
+            Tuple of (preview DataFrame, (rows, columns))
+        """
+        ingestor = ExcelIngestor()
+        sheets = ingestor.sheet_names(file_path)
+        if len(sheets) > 1:
+            self.selected_sheet = st.selectbox("Worksheet", sheets, key="excel_sheet")
+        else:
+            self.selected_sheet = sheets[0]
+        
+        return (ingestor.preview(file_path, self.selected_sheet, 5),
+                ingestor.sheet_shape(file_path, self.selected_sheet))
+    
     def cleanup_temp_file(self, file_path: str):
         """
         Clean up temporary file.
@@ -193,7 +252,7 @@ class FileUploadComponent:
             if file_path.endswith('.csv'):
                 pd.read_csv(file_path, nrows=1)
             else:
-                pd.read_excel(file_path, nrows=1)
+                ExcelIngestor().preview(file_path, n=1)
             
             return True, "File is valid and readable"
             
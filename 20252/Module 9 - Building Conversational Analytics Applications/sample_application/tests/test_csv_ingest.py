@@ -0,0 +1,50 @@
+"""
+Tests of the chunked CSV ingestor.
+Files are small, with chunks of a few hundred rows, so values that only
+appear past the sampled rows land in a later chunk.
+"""
+
+import pandas as pd
+import numpy as np
+
+from backend.utils.csv_ingest import CsvIngestor
+
+
+def write_csv(tmp_path, rows: int = 3000, bad_row: int = 2600):
+    data = pd.DataFrame({
+        'num': np.arange(rows),
+        'when': pd.date_range('2024-01-01', periods=rows, freq='h').strftime('%Y-%m-%d %H:%M'),
+        'score': np.linspace(0, 1, rows)
+    }).astype({'num': object, 'when': object})
+    data.loc[bad_row, 'num'] = '12x'
+    data.loc[bad_row, 'when'] = 'unknown'
+    data.loc[5, 'when'] = None
+    path = tmp_path / 'data.csv'
+    data.to_csv(path, index=False)
+    return path
+
+
+def test_a_stray_value_in_a_later_chunk_makes_the_whole_column_text(tmp_path):
+    path = write_csv(tmp_path)
+    data, stats = CsvIngestor(sample_rows=100, chunk_rows=500).read(str(path))
+
+    assert stats['chunks'] == 6
+    expected = pd.read_csv(path)
+    for col in ('num', 'when'):
+        assert set(map(type, data[col].dropna())) == {str}
+        assert data[col].fillna('').tolist() == expected[col].fillna('').tolist()
+    assert data['when'].isna().sum() == 1
+    assert data['num'].sort_values().iloc[0] == '0'
+
+    # Columns without stray values keep their compact dtype
+    assert pd.api.types.is_float_dtype(data['score'])
+
+
+def test_columns_keep_their_inferred_dtypes_when_every_chunk_fits(tmp_path):
+    path = tmp_path / 'clean.csv'
+    pd.DataFrame({'num': np.arange(3000), 'when': pd.date_range('2024-01-01', periods=3000, freq='h')}
+                 ).to_csv(path, index=False)
+    data, _ = CsvIngestor(sample_rows=100, chunk_rows=500).read(str(path))
+
+    assert pd.api.types.is_integer_dtype(data['num'])
+    assert pd.api.types.is_datetime64_any_dtype(data['when'])
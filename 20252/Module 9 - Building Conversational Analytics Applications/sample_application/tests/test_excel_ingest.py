@@ -0,0 +1,41 @@
+"""
+Tests of the streaming spreadsheet ingestor.
+Workbooks are written with openpyxl and read in chunks of a few hundred
+rows, so a cell that does not fit the inferred type lands in a later chunk.
+"""
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from backend.utils.excel_ingest import ExcelIngestor
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def write_workbook(tmp_path, rows: int = 1200, bad_row: int = 1100):
+    book = openpyxl.Workbook()
+    sheet = book.active
+    sheet.append(['num', 'when', 'score'])
+    start = datetime.datetime(2024, 1, 1)
+    for i in range(rows):
+        num = 'twelve' if i == bad_row else i
+        when = 'unknown' if i == bad_row else start + datetime.timedelta(hours=i)
+        sheet.append([num, when, i / rows])
+    path = tmp_path / 'data.xlsx'
+    book.save(path)
+    return path
+
+
+def test_a_text_cell_in_a_later_chunk_makes_the_whole_column_text(tmp_path):
+    path = write_workbook(tmp_path)
+    data, stats = ExcelIngestor(sample_rows=100, chunk_rows=400).read(str(path))
+
+    assert stats['chunks'] == 3
+    for col in ('num', 'when'):
+        assert set(map(type, data[col].dropna())) == {str}
+    assert data['num'].iloc[:3].tolist() == ['0', '1', '2']
+    assert data['num'].iloc[1100] == 'twelve'
+    assert data['when'].iloc[1] == '2024-01-01 01:00:00'
+    assert pd.api.types.is_float_dtype(data['score'])
@@ -0,0 +1,74 @@
+"""
+Tests of how the Gemini client reports calls the model could not answer.
+The local stand-in provider is made to fail, so no network access is needed.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.utils.gemini_client import (GeminiClient, ModelUnavailableError, UNAVAILABLE_MESSAGE,
+                                         BUDGET_EXHAUSTED_MESSAGE)
+from backend.utils.llm_providers import LocalProvider
+from backend.utils.request_scheduler import RequestScheduler
+
+
+class FailingProvider(LocalProvider):
+    """Stand-in whose every request fails with a retryable error."""
+
+    def __init__(self):
+        super().__init__(latency=0, tokens_per_second=0)
+        self.requests = 0
+
+    async def generate(self, prompt, temperature=None):
+        self.requests += 1
+        raise ConnectionError("connection reset")
+
+    async def stream(self, prompt, temperature=None):
+        self.requests += 1
+        raise ConnectionError("connection reset")
+        yield
+
+
+def make_client(provider, **kwargs) -> GeminiClient:
+    scheduler = RequestScheduler(max_concurrency=2, max_retries=1, base_delay=0.01, max_delay=0.02,
+                                 failure_threshold=2, reset_seconds=60)
+    return GeminiClient(provider=provider, scheduler=scheduler, use_cache=False, **kwargs)
+
+
+def test_failures_raise_instead_of_returning_apology_text():
+    provider = FailingProvider()
+    client = make_client(provider)
+
+    with pytest.raises(ModelUnavailableError, match='connection reset'):
+        client.generate_response("What is the average salary?")
+    with pytest.raises(ModelUnavailableError):
+        list(client.stream_response("Summarize the data"))
+    assert provider.requests == 4
+
+    # The circuit is open now; calls are refused without a request
+    with pytest.raises(ModelUnavailableError) as refused:
+        client.generate_response("What is the average salary?")
+    assert str(refused.value) == UNAVAILABLE_MESSAGE
+    assert provider.requests == 4
+
+
+def test_async_stream_raises_on_the_callers_loop():
+    client = make_client(FailingProvider())
+
+    async def consume():
+        return [text async for text in client.astream_response("Summarize the data")]
+
+    with pytest.raises(ModelUnavailableError):
+        asyncio.run(consume())
+
+
+def test_exhausted_question_budget_raises():
+    client = make_client(LocalProvider(latency=0, tokens_per_second=0), question_token_budget=100)
+    client.begin_question()
+    try:
+        with pytest.raises(ModelUnavailableError) as exhausted:
+            client.generate_response("What is the average salary?")
+        assert str(exhausted.value) == BUDGET_EXHAUSTED_MESSAGE
+    finally:
+        client.end_question()
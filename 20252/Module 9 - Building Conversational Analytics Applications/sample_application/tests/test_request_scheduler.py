@@ -0,0 +1,200 @@
+"""
+Tests of the request scheduler against a local fake HTTP server.
+The server answers each request with the next scripted status and delay,
+so retries, deadlines and circuit breaker transitions are exercised over a
+real socket without network access.
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from backend.utils.request_scheduler import (RequestScheduler, CircuitOpenError,
+                                             DeadlineExceededError)
+
+
+class APIError(Exception):
+    """Error response from the fake server."""
+
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FakeServer:
+    """Minimal HTTP server replying from a script of (status, delay seconds)."""
+
+    def __init__(self, script, default=(200, 0.0)):
+        self.script = list(script)
+        self.default = default
+        self.requests = 0
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        self.requests += 1
+        status, delay = self.script.pop(0) if self.script else self.default
+        try:
+            await asyncio.sleep(delay)
+            body = b'ok' if status == 200 else b'error'
+            writer.write(b'HTTP/1.1 %d X\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s'
+                         % (status, len(body), body))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def call(self) -> str:
+        """Send one request and return the body, raising APIError for other statuses than 200."""
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            writer.write(b'POST /generate HTTP/1.1\r\nHost: fake\r\nContent-Length: 0\r\n\r\n')
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            body = (await reader.read()).split(b'\r\n\r\n', 1)[-1]
+        finally:
+            writer.close()
+        if status != 200:
+            raise APIError(status)
+        return body.decode()
+
+
+def make_scheduler(**kwargs) -> RequestScheduler:
+    options = dict(max_retries=3, base_delay=0.01, max_delay=0.02, failure_threshold=2, reset_seconds=0.2)
+    options.update(kwargs)
+    return RequestScheduler(**options)
+
+
+def test_retries_transient_errors_until_success():
+    async def scenario():
+        scheduler = make_scheduler()
+        async with FakeServer([(503, 0), (500, 0)]) as server:
+            assert await scheduler.run(server.call) == 'ok'
+            assert server.requests == 3
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.metrics.retries == 2
+    assert scheduler.metrics.succeeded == 1
+    assert scheduler.breaker.failures == 0
+
+
+def test_client_errors_are_not_retried():
+    async def scenario():
+        scheduler = make_scheduler()
+        async with FakeServer([(400, 0)]) as server:
+            with pytest.raises(APIError):
+                await scheduler.run(server.call)
+            assert server.requests == 1
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.breaker.state == 'closed'
+
+
+def test_a_call_counts_against_the_breaker_once_after_its_retries():
+    async def scenario():
+        scheduler = make_scheduler(failure_threshold=3)
+        async with FakeServer([], default=(503, 0)) as server:
+            with pytest.raises(APIError):
+                await scheduler.run(server.call)
+            assert server.requests == 4
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.breaker.failures == 1
+    assert scheduler.breaker.state == 'closed'
+
+
+def test_rate_limiting_does_not_open_the_circuit():
+    async def scenario():
+        scheduler = make_scheduler(max_retries=1)
+        async with FakeServer([], default=(429, 0)) as server:
+            for _ in range(5):
+                with pytest.raises(APIError):
+                    await scheduler.run(server.call)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.metrics.rate_limited == 10
+    assert scheduler.breaker.failures == 0
+    assert scheduler.breaker.state == 'closed'
+
+
+def test_attempt_timeout_is_retried_and_deadline_bounds_the_call():
+    async def scenario():
+        scheduler = make_scheduler()
+        async with FakeServer([(200, 0.5)]) as server:
+            assert await scheduler.run(server.call, attempt_timeout=0.1) == 'ok'
+            assert scheduler.metrics.retries == 1
+
+        async with FakeServer([], default=(200, 1.0)) as server:
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceededError):
+                await scheduler.run(server.call, deadline_seconds=0.3)
+            assert time.monotonic() - started < 0.6
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.metrics.deadlines_exceeded == 1
+
+
+def test_breaker_opens_rejects_and_recovers_through_a_trial_call():
+    async def scenario():
+        scheduler = make_scheduler(max_retries=0)
+        async with FakeServer([(500, 0), (500, 0), (500, 0)]) as server:
+            for _ in range(2):
+                with pytest.raises(APIError):
+                    await scheduler.run(server.call)
+            assert scheduler.breaker.state == 'open'
+
+            # Refused without reaching the server
+            with pytest.raises(CircuitOpenError):
+                await scheduler.run(server.call)
+            assert server.requests == 2
+
+            # A failed trial opens the circuit again
+            await asyncio.sleep(0.25)
+            assert scheduler.breaker.state == 'half_open'
+            with pytest.raises(APIError):
+                await scheduler.run(server.call)
+            assert scheduler.breaker.state == 'open'
+
+            # A successful trial closes it
+            await asyncio.sleep(0.25)
+            assert await scheduler.run(server.call) == 'ok'
+            assert scheduler.breaker.state == 'closed'
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.metrics.circuit_rejections == 1
+
+
+def test_trial_call_may_retry_in_half_open_state():
+    async def scenario():
+        scheduler = make_scheduler(max_retries=0)
+        async with FakeServer([(500, 0), (500, 0)]) as server:
+            for _ in range(2):
+                with pytest.raises(APIError):
+                    await scheduler.run(server.call)
+
+        scheduler.max_retries = 2
+        await asyncio.sleep(0.25)
+        async with FakeServer([(503, 0)]) as server:
+            assert await scheduler.run(server.call) == 'ok'
+            assert server.requests == 2
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.breaker.state == 'closed'
@@ -0,0 +1,57 @@
+"""
+Tests of the outlier rows picked for prompt samples.
+The rows come from positions recorded in the profile, which incremental
+updates have to keep pointing at the rows that hold the extremes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.profiler import build_profile
+from backend.utils.sampling import outlier_positions
+
+
+def assert_extremes_located(profile, data):
+    for name in profile.columns_of_kind('numeric'):
+        col = profile.column(name)
+        values = data[name].to_numpy()
+        assert values[col.min_row] == col.min
+        assert values[col.max_row] == col.max
+
+
+def test_outlier_rows_come_from_the_profile():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'x': rng.normal(size=500), 'y': rng.normal(size=500)})
+    data.loc[[3, 40], 'x'] = np.nan
+    profile = build_profile(data)
+    assert_extremes_located(profile, data)
+
+    expected = {data['x'].argmin(), data['x'].argmax(), data['y'].argmin(), data['y'].argmax()}
+    assert set(outlier_positions(data, profile, 2)) == expected
+
+
+def test_extreme_rows_follow_appends_removals_and_fills():
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({'x': rng.normal(size=500)})
+    data.loc[7, 'x'] = np.nan
+    profile = build_profile(data)
+
+    added = pd.DataFrame({'x': [np.nan, -50.0]}, index=[500, 501])
+    profile.append_rows(added)
+    data = pd.concat([data, added])
+    assert profile.column('x').min_row == 501
+
+    # Drop the new minimum and some rows before the maximum
+    keep = np.ones(len(data), dtype=bool)
+    keep[[0, 1, 501]] = False
+    profile.remove_rows(data[~keep], keep)
+    data = data[keep]
+    profile.refresh_rows(data, np.zeros(len(data), dtype=bool))
+    assert_extremes_located(profile, data)
+
+    missing = int(data['x'].isna().sum())
+    data = data.fillna({'x': 100.0})
+    profile.fill_missing('x', 100.0, missing, str(data['x'].dtype))
+    profile.refresh_rows(data, np.zeros(len(data), dtype=bool))
+    assert_extremes_located(profile, data)
+    assert profile.column('x').max == 100.0
@@ -0,0 +1,39 @@
+"""
+Tests of how the string pool gives memory back.
+Strings are built at run time so none of them is a shared interned constant.
+"""
+
+import gc
+
+import pandas as pd
+
+from backend.utils.memory_budget import get_memory_manager
+from backend.utils.string_pool import StringPool, encode_text_column, get_default_pool
+
+
+def text_column(prefix: str, distinct: int) -> pd.Series:
+    return pd.Series([f'{prefix}-{i % distinct}' for i in range(1000)])
+
+
+def test_only_strings_of_live_categoricals_stay_pooled():
+    pool = StringPool()
+    cities = encode_text_column(text_column('city', 50), pool)
+    towns = encode_text_column(text_column('town', 30), pool)
+    gc.collect()
+    assert pool.release_unused() == 0
+    assert len(pool) == 80
+
+    del towns
+    gc.collect()
+    assert pool.release_unused() > 0
+    assert len(pool) == 50 and pool.stats()['released'] == 30
+
+    # A later dataset shares the strings that were kept
+    again = encode_text_column(text_column('city', 50), pool)
+    assert all(x is y for x, y in zip(again.cat.categories, cities.cat.categories))
+
+
+def test_default_pool_is_a_cache_of_the_memory_manager():
+    pool = get_default_pool()
+    consumers = get_memory_manager().stats()['consumers']
+    assert consumers['string_pool'] == pool.nbytes